@@ -112,7 +112,7 @@ else:
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import Config, HomeAssistant
-from homeassistant.helpers import device_registry
+from homeassistant.helpers import device_registry, entity_registry
 import homeassistant.helpers.config_validation as cv
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -212,6 +212,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     # Register Central System Device
     hass.data[DOMAIN][entry.entry_id] = cs
 
+    # Le modifiche delle opzioni (es. filtri dei sensori) ricaricano l'integrazione
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     # for platform in PLATFORMS:
     #     await hass.config_entries.async_forward_entry_setup(
     #         entry, platform
@@ -231,6 +234,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     central_sys = hass.data[DOMAIN][entry.entry_id]
 
+    # Le callback "async_add_entities" delle piattaforme non saranno più valide
+    central_sys.unregister_ha_platforms()
+    # Rimozione dei servizi registrati dalla Central System (es. get_meter_statistics)
+    central_sys.async_remove_ha_services()
+    # Smette di seguire le modifiche dei registri di Home Assistant
+    central_sys.ha_registry_cache.async_stop()
+    # Ferma i worker della pipeline di configurazione delle connessioni (le configurazioni in coda vengono annullate)
+    await central_sys.ha_boot_pipeline.async_stop()
+    await central_sys.ha_loop_lag_monitor.async_stop()
+    # Scrive subito lo snapshot delle metriche persistenti (senza attendere il salvataggio ritardato)
+    await central_sys.ha_metrics_store.async_save()
+
     central_sys.websocket_server.close()
     await central_sys.websocket_server.wait_closed()
 
@@ -251,6 +266,29 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unloaded
 
 
+# Aggiornamento del 17/10/2026
+# Rimozione di un dispositivo (Charge Point / Charging Station, EVSE, Connettore) da parte dell'utente: i suoi valori
+# vengono rimossi anche dallo snapshot delle metriche (vedi ha_store.py). Il dispositivo della Central System non può
+# essere rimosso.
+async def async_remove_config_entry_device(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    device_entry: device_registry.DeviceEntry
+) -> bool:
+
+    identifiers = [identifier for domain, identifier in device_entry.identifiers if domain == DOMAIN]
+    if entry.data.get(CONF_CSID, DEFAULT_CSID) in identifiers:
+        return False
+
+    central_sys = hass.data[DOMAIN][entry.entry_id]
+    entity_entries = entity_registry.async_entries_for_device(
+        entity_registry.async_get(hass), device_entry.id, include_disabled_entities=True
+    )
+    number_unique_ids = [entity_entry.unique_id for entity_entry in entity_entries if entity_entry.domain == NUMBER]
+    central_sys.ha_metrics_store.async_remove_device(identifiers, number_unique_ids)
+    return True
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
 
     """Reload config entry."""
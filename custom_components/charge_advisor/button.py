@@ -18,6 +18,7 @@ from homeassistant.components.button import (
     ButtonEntity,
     ButtonEntityDescription,
 )
+from homeassistant.core import callback
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -32,7 +33,7 @@ from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 # Local files
 # ----------------------------------------------------------------------------------------------------------------------
 
-from .const import DOMAIN
+from .const import BUTTON, DOMAIN
 from .enums import HAChargePointServices, SubProtocol
 
 
@@ -67,33 +68,37 @@ CHARGE_POINT_CONNECTOR_BUTTONS: Final = [
 ]
 
 
-async def async_setup_entry(hass, entry, async_add_devices):
-    """Configure the button platform."""
-
-    central_system = hass.data[DOMAIN][entry.entry_id]
+def get_charge_point_entities(central_system, charge_point):
+    """Return the button entities of a Charge Point and its Connectors."""
 
     entities = []
 
-    for cp_id in central_system.charge_points:
-        
-        charge_point: HomeAssistantChargePoint = central_system.charge_points[cp_id]
+    for ent in CHARGE_POINT_BUTTONS:
+        entities.append(ChargePointButtonEntity(central_system, charge_point, ent))
+
+    if charge_point.connection_ocpp_version == SubProtocol.OcppV16.value:
+        for connector in charge_point.connectors:
+            for ent in CHARGE_POINT_CONNECTOR_BUTTONS:
+                entities.append(ChargePointConnectorButtonEntity(central_system, charge_point, connector, ent))
+    elif charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
+        pass
 
-        for ent in CHARGE_POINT_BUTTONS:
-            entities.append(ChargePointButtonEntity(central_system, charge_point, ent))
+    return entities
 
-        if charge_point.connection_ocpp_version == SubProtocol.OcppV16.value:
-            for connector in charge_point.connectors:
-                for ent in CHARGE_POINT_CONNECTOR_BUTTONS:
-                    entities.append(ChargePointConnectorButtonEntity(central_system, charge_point, connector, ent))
-        elif charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
-            pass
 
-    # Aggiungiamo gli unique_id di ogni entità registrata in fase di setup al
-    # Charge Point o al Connector
-    for entity in entities:
-        entity.append_entity_unique_id()
+async def async_setup_entry(hass, entry, async_add_devices):
+    """Configure the button platform."""
+
+    central_system = hass.data[DOMAIN][entry.entry_id]
 
-    async_add_devices(entities, False)
+    # Le entità di ogni Charge Point vengono aggiunte a blocchi, dopo aver aggiunto i loro unique_id al Charge Point o
+    # al Connector. La piattaforma viene poi registrata presso la Central System, per poter aggiungere in seguito le
+    # sole entità di nuovi Charge Point o Connettori senza ricaricare la piattaforma
+    await central_system.async_setup_ha_platform(
+        BUTTON,
+        async_add_devices,
+        lambda charge_point: get_charge_point_entities(central_system, charge_point)
+    )
 
 
 class ChargePointButtonEntity(ButtonEntity):
@@ -122,6 +127,9 @@ class ChargePointButtonEntity(ButtonEntity):
             identifiers={(DOMAIN, self._charge_point.id)},
             via_device=(DOMAIN, self._central_system.id),
         )
+        # Lo stato viene scritto quando cambia la disponibilità del target
+        self._attr_should_poll = False
+        self._last_written_available = None
 
     @property
     def target(self):
@@ -137,7 +145,24 @@ class ChargePointButtonEntity(ButtonEntity):
 
     def append_entity_unique_id(self):
         if self.unique_id not in self.target.ha_entity_unique_ids:
-            self.target.ha_entity_unique_ids.append(self.unique_id)
+            self.target.ha_entity_unique_ids.add(self.unique_id)
+        # Lo stato del pulsante dipende dalle metriche solo per la disponibilità
+        self.target.add_ha_entity(self)
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Il pulsante è indicizzato dal target (vedi "append_entity_unique_id") fino alla sua rimozione
+        self.async_on_remove(lambda: self.target.remove_ha_entity(self))
+
+    # Scrive lo stato in Home Assistant solo se è cambiata la disponibilità
+    @callback
+    def async_write_ha_state_if_changed(self):
+        if self.hass is None:
+            return
+        if self.available == self._last_written_available:
+            return
+        self._last_written_available = self.available
+        self.async_write_ha_state()
 
 
 class ChargePointConnectorButtonEntity(ChargePointButtonEntity):
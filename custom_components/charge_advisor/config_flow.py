@@ -5,6 +5,7 @@
 # ----------------------------------------------------------------------------------------------------------------------
 
 from homeassistant import config_entries
+from homeassistant.core import callback
 
 # ----------------------------------------------------------------------------------------------------------------------
 # External packages
@@ -52,6 +53,36 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Required(
             CONF_SKIP_SCHEMA_VALIDATION, default=DEFAULT_SKIP_SCHEMA_VALIDATION
         ): bool,
+        vol.Required(
+            CONF_STATE_FLUSH_WINDOW, default=DEFAULT_STATE_FLUSH_WINDOW
+        ): int,
+        vol.Required(
+            CONF_LAZY_DEVICE_MODEL_SENSORS, default=DEFAULT_LAZY_DEVICE_MODEL_SENSORS
+        ): bool,
+        vol.Required(
+            CONF_METER_STATISTICS_SENSORS, default=DEFAULT_METER_STATISTICS_SENSORS
+        ): bool,
+        vol.Required(
+            CONF_OFFLOAD_DECODING, default=DEFAULT_OFFLOAD_DECODING
+        ): bool,
+        vol.Required(
+            CONF_POD_NOTIFY_CONCURRENCY, default=DEFAULT_POD_NOTIFY_CONCURRENCY
+        ): int,
+        vol.Required(
+            CONF_POD_NOTIFY_TIMEOUT, default=DEFAULT_POD_NOTIFY_TIMEOUT
+        ): int,
+        vol.Required(
+            CONF_ADMISSION_CONCURRENCY, default=DEFAULT_ADMISSION_CONCURRENCY
+        ): int,
+        vol.Required(
+            CONF_ADMISSION_RECONNECT_BURST, default=DEFAULT_ADMISSION_RECONNECT_BURST
+        ): int,
+        vol.Required(
+            CONF_ADMISSION_RECONNECT_INTERVAL, default=DEFAULT_ADMISSION_RECONNECT_INTERVAL
+        ): int,
+        vol.Required(
+            CONF_BOOT_JITTER, default=DEFAULT_BOOT_JITTER
+        ): vol.Coerce(float),
         #vol.Required(
         #    CONF_FORCE_SMART_CHARGING, default=DEFAULT_FORCE_SMART_CHARGING
         #): bool,
@@ -99,6 +130,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     """
     async def async_step_measurands(self, user_input=None):
         # Select the measurands to be shown.
@@ -118,4 +155,33 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=STEP_USER_MEASURANDS_SCHEMA,
             errors=errors,
         )
-    """
\ No newline at end of file
+    """
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of OCPP."""
+
+    def __init__(self, config_entry):
+        """Initialize."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the sensors include / exclude patterns."""
+
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options_schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_SENSORS_INCLUDE,
+                    default=self.config_entry.options.get(CONF_SENSORS_INCLUDE, "")
+                ): str,
+                vol.Optional(
+                    CONF_SENSORS_EXCLUDE,
+                    default=self.config_entry.options.get(CONF_SENSORS_EXCLUDE, "")
+                ): str,
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=options_schema)
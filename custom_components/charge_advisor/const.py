@@ -29,10 +29,7 @@ from ocpp_central_system.const import *
 # Local files
 # ----------------------------------------------------------------------------------------------------------------------
 
-from .enums import HAChargePointSensors
-
-# Number of seconds to wait in case an Home Assistant element is already updating od adding its own entities
-HA_UPDATE_ENTITIES_WAITING_SECS = 1
+from .enums import HAChargePointSensors, HALatencySensors, HASchemaValidationLevel
 
 # Home Assistant Notify Title
 HA_NOTIFY_TITLE = "Charge Advisor"
@@ -52,6 +49,55 @@ CONF_PORT = ha.CONF_PORT
 CONF_STEP = input_number.CONF_STEP
 CONF_UNIT_OF_MEASUREMENT = ha.CONF_UNIT_OF_MEASUREMENT
 CONF_USERNAME = ha.CONF_USERNAME
+CONF_STATE_FLUSH_WINDOW = "state_flush_window"
+CONF_LAZY_DEVICE_MODEL_SENSORS = "lazy_device_model_sensors"
+CONF_SENSORS_INCLUDE = "sensors_include"
+CONF_SENSORS_EXCLUDE = "sensors_exclude"
+CONF_METER_STATISTICS_SENSORS = "meter_statistics_sensors"
+
+# Finestra (in millisecondi) entro cui i cambiamenti delle metriche di un Charge Point vengono scritti in un unico lotto
+DEFAULT_STATE_FLUSH_WINDOW = 250
+
+# Numero massimo di metriche di un Charge Point in attesa di essere scritte in Home Assistant
+STATE_FLUSH_QUEUE_SIZE = 512
+
+# Numero massimo di entità aggiunte in Home Assistant in un solo blocco durante il setup di una piattaforma: tra un
+# blocco e l'altro l'event loop può servire i messaggi OCPP (es. Heartbeat) ed i ping dei websocket
+HA_ENTITIES_CHUNK_SIZE = 200
+
+# Numero massimo di insiemi di descrizioni dei sensori (uno per tipo di Charge Point) conservati in memoria
+SENSOR_DESCRIPTIONS_CACHE_SIZE = 32
+
+# Sensori del device model OCPP 2.0.1 creati solo alla ricezione del primo valore (modalità "lazy")
+DEFAULT_LAZY_DEVICE_MODEL_SENSORS = False
+
+# Chiavi (pattern fnmatch) delle metriche del device model OCPP 2.0.1 che diventano comunque sensori in fase di setup
+LAZY_DEVICE_MODEL_SENSORS_ALLOWLIST = [
+    "ChargingStation.*",
+    "EVSE.*",
+    "Connector.*",
+]
+
+# Notifiche al backend Charge Advisor dello stato dei Point Of Delivery all'arresto di un Charge Point: numero massimo
+# di notifiche contemporanee e tempo massimo (in secondi) per l'invio di tutte le notifiche
+CONF_POD_NOTIFY_CONCURRENCY = "pod_notify_concurrency"
+CONF_POD_NOTIFY_TIMEOUT = "pod_notify_timeout"
+DEFAULT_POD_NOTIFY_CONCURRENCY = 8
+DEFAULT_POD_NOTIFY_TIMEOUT = 30
+
+# Controllo di ammissione delle connessioni dei Charge Point (vedi ha_admission.py e ha_boot.py): numero di worker che
+# eseguono la configurazione (post_connect) delle connessioni e, per ogni Charge Point, numero massimo di connessioni
+# consecutive (burst) ed intervallo (in secondi) dopo il quale viene concessa una nuova connessione
+CONF_ADMISSION_CONCURRENCY = "admission_concurrency"
+CONF_ADMISSION_RECONNECT_BURST = "admission_reconnect_burst"
+CONF_ADMISSION_RECONNECT_INTERVAL = "admission_reconnect_interval"
+DEFAULT_ADMISSION_CONCURRENCY = 10
+DEFAULT_ADMISSION_RECONNECT_BURST = 3
+DEFAULT_ADMISSION_RECONNECT_INTERVAL = 60
+
+# Ritardo casuale massimo (in secondi) prima della configurazione (post_connect) di ogni connessione (vedi ha_boot.py)
+CONF_BOOT_JITTER = "boot_jitter"
+DEFAULT_BOOT_JITTER = 1.0
 
 # Home Assistant Platforms
 SENSOR = "sensor"
@@ -94,6 +140,17 @@ UNITS_OCCP_TO_HA = {
     UnitOfMeasure.hertz: ha.UnitOfFrequency.HERTZ,
 }
 
+# Aggiornamento del 17/10/2026
+# Normalizzazione dei valori dei measurand (vedi ha_units.py): unità OCPP -> (unità OCPP normalizzata, fattore). Energia
+# e potenza vengono riportate alle unità HA_ENERGY_UNIT e HA_POWER_UNIT (e ai corrispettivi reattivi / apparenti).
+UNITS_OCPP_NORMALIZATION = {
+    UnitOfMeasure.wh: (UnitOfMeasure.kwh, 0.001),
+    UnitOfMeasure.w: (UnitOfMeasure.kw, 0.001),
+    UnitOfMeasure.varh: (UnitOfMeasure.kvarh, 0.001),
+    UnitOfMeasure.var: (UnitOfMeasure.kvar, 0.001),
+    UnitOfMeasure.va: (UnitOfMeasure.kva, 0.001),
+}
+
 # Home Assistant Charge Point Diagnostic sensors
 HA_CHARGE_POINT_DIAGNOSTIC_SENSORS = [
     HAChargePointSensors.identifier.value,
@@ -109,6 +166,11 @@ HA_CHARGE_POINT_DIAGNOSTIC_SENSORS = [
 ]
 
 DOMAIN = "charge_advisor"
+
+# Home Assistant Dispatcher Signals
+# Il segnale globale DATA_UPDATED è riservato agli eventi che riguardano l'intera flotta: ogni dispositivo (Charge Point /
+# Charging Station, EVSE, Connector) ha un proprio segnale, a cui sono sottoscritte solamente le sue entità.
+DATA_UPDATED_DEVICE = DOMAIN + "_data_updated_{}"
 CONFIG = "config"
 ICON = "mdi:ev-station"
 
@@ -154,6 +216,86 @@ MEASURAND_ICON = {
     Measurand.temperature.value: "mdi:ev-station",
 }
 
+# Regole di pubblicazione delle metriche (vedi OcppSensorDescription e HomeAssistantEntityMetrics):
+# - deadband: variazione assoluta minima (nella unità di misura della metrica) perché il nuovo valore venga scritto
+# - deadband_relative: variazione minima rispetto all'ultimo valore scritto (es. 0.01 = 1%)
+# - min_interval: intervallo minimo (in secondi) tra due scritture
+# - heartbeat: silenzio massimo (in secondi) dopo il quale una variazione viene comunque scritta
+METRIC_PUBLISH_RULES = {
+    Measurand.voltage.value: {"deadband": 1.0, "heartbeat": 300},
+    Measurand.current_import.value: {"deadband": 0.1, "heartbeat": 300},
+    Measurand.current_offered.value: {"deadband": 0.1, "heartbeat": 300},
+    Measurand.power_active_import.value: {"deadband_relative": 0.01, "heartbeat": 300},
+    Measurand.power_offered.value: {"deadband_relative": 0.01, "heartbeat": 300},
+    Measurand.frequency.value: {"deadband": 0.05, "heartbeat": 300},
+    Measurand.temperature.value: {"deadband": 0.5, "min_interval": 10, "heartbeat": 600},
+}
+
+# Snapshot delle metriche e dei valori dei numeri (vedi ha_store.py): versione del file e ritardo (in secondi) con cui
+# le modifiche vengono scritte su disco
+METRICS_STORAGE_VERSION = 1
+METRICS_STORAGE_SAVE_DELAY = 10
+
+# Finestre scorrevoli dei campioni recenti dei measurand di ogni Connettore (vedi ha_meter_samples.py): measurand seguiti
+# e numero di campioni per measurand. Memoria per Connettore: measurand x campioni x 16 byte (24 KiB con i valori sotto)
+METER_SAMPLES_MEASURANDS = [
+    Measurand.power_active_import.value,
+    Measurand.current_import.value,
+    Measurand.voltage.value,
+]
+METER_SAMPLES_SIZE = 512
+
+# Sensori opzionali delle statistiche sulle finestre scorrevoli: chiave della metrica -> (measurand, statistica,
+# finestra in secondi). Le statistiche disponibili sono mean, min, max, p50, p95 e p99.
+DEFAULT_METER_STATISTICS_SENSORS = False
+METER_STATISTICS_SENSORS = {
+    "Power.Active.Import.Mean.1m": (Measurand.power_active_import.value, "mean", 60),
+    "Power.Active.Import.Mean.5m": (Measurand.power_active_import.value, "mean", 300),
+    "Power.Active.Import.Mean.15m": (Measurand.power_active_import.value, "mean", 900),
+    "Power.Active.Import.P95.15m": (Measurand.power_active_import.value, "p95", 900),
+    "Current.Import.Max.5m": (Measurand.current_import.value, "max", 300),
+}
+
+# Intervallo (in secondi) con cui vengono ricalcolate le statistiche dei sensori sopra, se sono arrivati nuovi campioni
+METER_STATISTICS_UPDATE_INTERVAL = 30
+
+# Finestra (in secondi) di default del servizio get_meter_statistics
+DEFAULT_METER_STATISTICS_WINDOW = 300
 
+# Livello di validazione dello schema delle chiamate OCPP ricevute, per azione (vedi ha_validation.py): le azioni non
+# elencate vengono sempre validate, quelle "sampled" una volta ogni CONF_SCHEMA_VALIDATION_SAMPLE_RATE chiamate. Se
+# CONF_SKIP_SCHEMA_VALIDATION è attivo nessuna chiamata viene validata.
+SCHEMA_VALIDATION_POLICY = {
+    "MeterValues": HASchemaValidationLevel.sampled,
+    "TransactionEvent": HASchemaValidationLevel.sampled,
+    "Heartbeat": HASchemaValidationLevel.none,
+}
+CONF_SCHEMA_VALIDATION_SAMPLE_RATE = "schema_validation_sample_rate"
+DEFAULT_SCHEMA_VALIDATION_SAMPLE_RATE = 10
+
+# Decodifica e validazione nell'executor dei messaggi OCPP ricevuti più grandi della soglia (in caratteri), vedi
+# ha_decoder.py
+CONF_OFFLOAD_DECODING = "offload_decoding"
+CONF_OFFLOAD_DECODING_THRESHOLD = "offload_decoding_threshold"
+DEFAULT_OFFLOAD_DECODING = False
+DEFAULT_OFFLOAD_DECODING_THRESHOLD = 16384
 
+# Misura del ritardo dell'event loop (vedi ha_loop_monitor.py): intervallo di campionamento e soglia di avviso (secondi)
+LOOP_LAG_INTERVAL = 1.0
+LOOP_LAG_WARNING_THRESHOLD = 0.1
 
+# Latenza end-to-end delle chiamate OCPP ricevute (vedi ha_latency.py): limiti superiori dei bucket degli istogrammi (in
+# secondi), un messaggio misurato ogni LATENCY_SAMPLE_RATE ed intervallo minimo (in secondi) tra due pubblicazioni dei
+# percentili. Sensore -> (percorso misurato, percentile)
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+LATENCY_SAMPLE_RATE = 4
+LATENCY_PUBLISH_INTERVAL = 30
+LATENCY_SENSORS_SCALE = 4
+LATENCY_SENSORS = {
+    HALatencySensors.response_p50.value: ("response", 50),
+    HALatencySensors.response_p95.value: ("response", 95),
+    HALatencySensors.response_p99.value: ("response", 99),
+    HALatencySensors.state_p50.value: ("state", 50),
+    HALatencySensors.state_p95.value: ("state", 95),
+    HALatencySensors.state_p99.value: ("state", 99),
+}
@@ -25,6 +25,18 @@ from ocpp_central_system.enums import *
 class HACentralSystemServices(str, Enum):
     service_ems_communication_start = "ems_communication_start"
     service_ems_communication_stop = "ems_communication_stop"
+    service_get_meter_statistics = "get_meter_statistics"
+    service_get_metrics_memory_report = "get_metrics_memory_report"
+    service_get_admission_report = "get_admission_report"
+    service_get_validation_report = "get_validation_report"
+    service_get_event_loop_report = "get_event_loop_report"
+    service_get_latency_report = "get_latency_report"
+
+class HASchemaValidationLevel(str, Enum):
+    """Schema validation level of the incoming OCPP calls of an action."""
+    full = "full"
+    sampled = "sampled"
+    none = "none"
 
 class HAChargePointServices(str, Enum):
     """Charging Station status conditions to report in home assistant."""
@@ -65,6 +77,16 @@ class HAChargePointSensors(str, Enum):
     data_transfer = ChargingStationStatus.data_transfer.value
     config_response = ChargingStationStatus.config_response.value
 
+class HALatencySensors(str, Enum):
+    """End-to-end latency percentiles of the inbound OCPP calls (charger and fleet)."""
+
+    response_p50 = "Latency.Response.P50"
+    response_p95 = "Latency.Response.P95"
+    response_p99 = "Latency.Response.P99"
+    state_p50 = "Latency.State.P50"
+    state_p95 = "Latency.State.P95"
+    state_p99 = "Latency.State.P99"
+
 class HAEVSESensors(str, Enum):
     availability = EVSEStatus.availability.value
     connectors = EVSEStatus.connectors.value
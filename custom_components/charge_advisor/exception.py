@@ -25,3 +25,9 @@ class ConfigurationError(Exception):
     """Error used to signal a error while configuring the charger."""
 
     pass
+
+
+class AdmissionRejectedError(Exception):
+    """Error used to signal that a charger connection was refused by the admission control."""
+
+    pass
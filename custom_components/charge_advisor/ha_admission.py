@@ -0,0 +1,102 @@
+"""
+La classe HomeAssistantAdmissionController regola l'ammissione delle connessioni dei Charge Point / Charging Station:
+ogni Charge Point dispone di un token bucket e le connessioni (e le riconnessioni) troppo frequenti vengono rifiutate.
+La configurazione delle connessioni ammesse (post_connect) avviene tramite la pipeline di boot (vedi ha_boot.py), con un
+numero limitato di worker: in questo modo, dopo un'interruzione di corrente, la riconnessione contemporanea di tutta la
+flotta non satura l'event loop di Home Assistant.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+import time
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .exception import AdmissionRejectedError
+from .logger import OcppLog
+
+
+class HomeAssistantAdmissionController:
+    """Admission control of the charger connections."""
+
+    def __init__(
+        self,
+        reconnect_burst: int,
+        reconnect_interval: float
+    ):
+        # Token bucket di ogni Charge Point: id -> (token disponibili, istante dell'ultimo aggiornamento)
+        self._reconnect_burst = max(1, reconnect_burst)
+        self._reconnect_interval = reconnect_interval
+        self._buckets: dict[str, tuple[float, float]] = {}
+        # Istante dell'ultima rimozione dei bucket inutilizzati (vedi "_prune_buckets")
+        self._pruned_at = time.monotonic()
+        # Contatori
+        self._admitted = 0
+        self._rejected = 0
+
+    @property
+    def admitted(self) -> int:
+        return self._admitted
+
+    @property
+    def rejected(self) -> int:
+        return self._rejected
+
+    def get_report(self) -> dict:
+        return {
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "buckets": len(self._buckets),
+        }
+
+    # Consuma un token del Charge Point: se non ce ne sono, la connessione viene rifiutata
+    def check_connection(self, cp_id: str):
+        now = time.monotonic()
+        self._prune_buckets(now)
+        tokens, updated_at = self._buckets.get(cp_id, (self._reconnect_burst, now))
+        if self._reconnect_interval > 0:
+            tokens = min(self._reconnect_burst, tokens + (now - updated_at) / self._reconnect_interval)
+        else:
+            tokens = self._reconnect_burst
+        if tokens < 1:
+            self._buckets[cp_id] = (tokens, now)
+            self._rejected += 1
+            retry_in = (1 - tokens) * self._reconnect_interval
+            OcppLog.log_w(
+                f"Connessione del Charge Point {cp_id} rifiutata: riconnessioni troppo frequenti "
+                f"(nuovo tentativo possibile tra {retry_in:.0f} s)"
+            )
+            raise AdmissionRejectedError(f"Charge Point {cp_id} reconnects too often")
+        self._buckets[cp_id] = (tokens - 1, now)
+        self._admitted += 1
+
+    # Un bucket che, dall'ultimo aggiornamento, ha avuto il tempo di ricaricarsi completamente equivale ad un bucket
+    # mai creato: viene rimosso, così che i Charge Point che non si connettono più non occupino memoria. La scansione
+    # avviene al più una volta per tempo di ricarica completa di un bucket.
+    def _prune_buckets(self, now: float):
+        refill_time = self._reconnect_burst * self._reconnect_interval
+        if now - self._pruned_at < refill_time:
+            return
+        self._pruned_at = now
+        self._buckets = {
+            cp_id: (tokens, updated_at)
+            for cp_id, (tokens, updated_at) in self._buckets.items()
+            if now - updated_at < (self._reconnect_burst - tokens) * self._reconnect_interval
+        }
@@ -0,0 +1,207 @@
+"""
+La classe HomeAssistantBootPipeline esegue la configurazione delle connessioni dei Charge Point / Charging Station
+(post_connect: aggiornamento del dispositivo, configurazione OCPP, registrazione delle entità e dei servizi) tramite un
+numero limitato di worker. Le connessioni in attesa sono servite in ordine di priorità (prima i Charge Point con
+transazioni in corso) e ogni configurazione inizia dopo un ritardo casuale (jitter), così che la riconnessione di tutta
+la flotta dopo un'interruzione richieda un tempo prevedibile senza bloccare l'event loop di Home Assistant.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+import asyncio
+import itertools
+import random
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from homeassistant.core import HomeAssistant
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .logger import OcppLog
+
+# Priorità delle configurazioni (valori più bassi vengono serviti prima)
+BOOT_PRIORITY_ACTIVE_TRANSACTION = 0
+BOOT_PRIORITY_DEFAULT = 1
+
+
+class HomeAssistantBootPipeline:
+    """Bounded, prioritized and jittered worker pool for the post-connect bootstrap of the chargers."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        workers: int,
+        jitter: float
+    ):
+        self._hass = hass
+        self._workers_count = max(1, workers)
+        self._jitter = max(0.0, jitter)
+        # Coda delle configurazioni: (priorità, ordine di arrivo, id del Charge Point, coroutine function, future)
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers: list[asyncio.Task] = []
+        # Contatori
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._running = 0
+        self._peak_waiting = 0
+        # Worker occupati (dal prelievo dalla coda al termine della configurazione) e configurazioni che, al momento
+        # dell'invio, non hanno trovato un worker libero e sono rimaste in coda
+        self._busy = 0
+        self._queued = 0
+        # Tempi di esecuzione di ogni fase: nome -> [esecuzioni, tempo totale, tempo massimo]
+        self._stages: dict[str, list] = {}
+
+    @property
+    def waiting(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def async_start(self):
+        for index in range(self._workers_count):
+            self._workers.append(
+                self._hass.async_create_background_task(
+                    self._async_worker(),
+                    f"charge_advisor boot worker {index}"
+                )
+            )
+
+    async def async_stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # Le configurazioni ancora in coda non verranno eseguite
+        while not self._queue.empty():
+            *_, future = self._queue.get_nowait()
+            future.cancel()
+
+    # Mette in coda la configurazione del Charge Point ed attende che venga eseguita da un worker
+    async def run(self, cp_id: str, priority: int, bootstrap: Callable[[], Awaitable[None]]):
+        future = asyncio.get_running_loop().create_future()
+        if self._busy + self._queue.qsize() >= self._workers_count:
+            self._queued += 1
+        self._queue.put_nowait((priority, next(self._sequence), cp_id, bootstrap, future))
+        self._submitted += 1
+        self._peak_waiting = max(self._peak_waiting, self._queue.qsize())
+        return await future
+
+    # Misura la durata di una fase della configurazione (es. "device_info", "configuration", "entities", "services")
+    @asynccontextmanager
+    async def stage(self, name: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            stage = self._stages.setdefault(name, [0, 0.0, 0.0])
+            stage[0] += 1
+            stage[1] += elapsed
+            stage[2] = max(stage[2], elapsed)
+
+    def get_report(self) -> dict:
+        return {
+            "workers": self._workers_count,
+            "submitted": self._submitted,
+            "queued": self._queued,
+            "completed": self._completed,
+            "failed": self._failed,
+            "waiting": self.waiting,
+            "peak_waiting": self._peak_waiting,
+            "running": self._running,
+            "stages": {
+                name: {
+                    "runs": runs,
+                    "mean": total / runs if runs else 0.0,
+                    "max": maximum,
+                }
+                for name, (runs, total, maximum) in self._stages.items()
+            },
+        }
+
+    async def _async_worker(self):
+        while True:
+            priority, _, cp_id, bootstrap, future = await self._queue.get()
+            self._busy += 1
+            try:
+                if not future.cancelled():
+                    await self._async_run(priority, cp_id, bootstrap, future)
+            except asyncio.CancelledError:
+                # Chi attende la configurazione non deve restare bloccato. Solo l'arresto del worker (e non
+                # l'annullamento della singola configurazione) ne termina il ciclo.
+                future.cancel()
+                if asyncio.current_task().cancelling():
+                    raise
+            finally:
+                self._busy -= 1
+                self._queue.task_done()
+
+    async def _async_bootstrap(self, bootstrap):
+        async with self.stage("total"):
+            return await bootstrap()
+
+    async def _async_run(self, priority, cp_id, bootstrap, future):
+        if self._jitter > 0:
+            await asyncio.sleep(random.uniform(0, self._jitter))
+        if future.cancelled():
+            return
+        self._running += 1
+        start = time.monotonic()
+        # La configurazione viene eseguita in un task proprio, annullato se chi la attende viene annullato (es. chiusura
+        # della connessione durante la configurazione)
+        task = self._hass.async_create_background_task(
+            self._async_bootstrap(bootstrap),
+            f"charge_advisor boot {cp_id}"
+        )
+
+        def cancel_bootstrap(_future):
+            if _future.cancelled():
+                task.cancel()
+
+        future.add_done_callback(cancel_bootstrap)
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            # L'arresto del worker annulla anche il task della configurazione (attesa con "await")
+            if asyncio.current_task().cancelling():
+                raise
+            self._failed += 1
+            future.cancel()
+        except Exception as e:
+            self._failed += 1
+            if not future.cancelled():
+                future.set_exception(e)
+        else:
+            self._completed += 1
+            if not future.cancelled():
+                future.set_result(result)
+        finally:
+            self._running -= 1
+            future.remove_done_callback(cancel_bootstrap)
+        OcppLog.log_d(
+            f"Configurazione del Charge Point {cp_id} (priorità {priority}) completata in "
+            f"{time.monotonic() - start:.2f} s, {self.waiting} in attesa"
+        )
@@ -6,6 +6,7 @@
 
 from __future__ import annotations
 import asyncio
+from collections.abc import Callable
 from threading import Thread
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -22,9 +23,12 @@ from threading import Thread
 # ----------------------------------------------------------------------------------------------------------------------
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
 from homeassistant.const import STATE_OK
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
 
 
 
@@ -42,9 +46,46 @@ from ocpp_central_system.charging_station_management_system import ChargingStati
 from .ha_metric import HomeAssistantEntityMetrics
 from .ha_charge_point import HomeAssistantChargePoint
 from .const import *
-from .enums import HACentralSystemServices
+from .enums import HACentralSystemServices, SubProtocol
 from .logger import OcppLog
 from .ha_charging_station_v201 import HomeAssistantChargingStationV201
+from .exception import AdmissionRejectedError
+from .ha_admission import HomeAssistantAdmissionController
+from .ha_boot import HomeAssistantBootPipeline
+from .ha_decoder import HomeAssistantMessageDecoder
+from .ha_latency import HomeAssistantLatencyTracker
+from .ha_loop_monitor import HomeAssistantLoopLagMonitor
+from .ha_registry_cache import HomeAssistantRegistryCache
+from .ha_sensor_filter import HomeAssistantSensorFilter
+from .ha_validation import HomeAssistantValidationPolicy
+from .ha_store import HomeAssistantMetricsStore
+from .ha_scheduler import HomeAssistantUpdateScheduler
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant Voluptuous SCHEMAS
+# ----------------------------------------------------------------------------------------------------------------------
+
+METER_STATISTICS_SERVICE_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Required("charge_point_id"): cv.string,
+        vol.Optional("evse_id"): cv.positive_int,
+        vol.Optional("connector_id"): cv.positive_int,
+        vol.Optional("measurands"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("window"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+METRICS_MEMORY_REPORT_SERVICE_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Optional("compact", default=False): cv.boolean,
+    }
+)
+
+EVENT_LOOP_REPORT_SERVICE_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Optional("reset", default=False): cv.boolean,
+    }
+)
 
 class HomeAssistantCentralSystem(
     ChargingStationManagementSystem,
@@ -63,9 +104,57 @@ class HomeAssistantCentralSystem(
         """ Home Assistant inizialization """
         self._hass = hass
         self._config_entry = config_entry
-        self._adding_entities = False
-        self._updating_entities = False
-        self.ha_entity_unique_ids: list[str] = []
+        self._ha_add_scheduler = HomeAssistantUpdateScheduler(
+            "Central System",
+            self._async_add_ha_entities
+        )
+        self.ha_entity_unique_ids: set[str] = set()
+        # Cache delle interrogazioni del device registry e dell'entity registry, condivisa da tutti i dispositivi
+        self.ha_registry_cache = HomeAssistantRegistryCache(hass)
+        self.ha_registry_cache.async_start()
+        # Controllo di ammissione delle connessioni dei Charge Point
+        self.ha_admission_controller = HomeAssistantAdmissionController(
+            config_entry.data.get(CONF_ADMISSION_RECONNECT_BURST, DEFAULT_ADMISSION_RECONNECT_BURST),
+            config_entry.data.get(CONF_ADMISSION_RECONNECT_INTERVAL, DEFAULT_ADMISSION_RECONNECT_INTERVAL)
+        )
+        # Pipeline di configurazione (post_connect) delle connessioni ammesse (i worker vengono avviati in "get_instance")
+        self.ha_boot_pipeline = HomeAssistantBootPipeline(
+            hass,
+            config_entry.data.get(CONF_ADMISSION_CONCURRENCY, DEFAULT_ADMISSION_CONCURRENCY),
+            config_entry.data.get(CONF_BOOT_JITTER, DEFAULT_BOOT_JITTER)
+        )
+        # Livello di validazione dello schema delle chiamate OCPP ricevute, per azione
+        self.ha_validation_policy = HomeAssistantValidationPolicy(
+            config_entry.data.get(CONF_SKIP_SCHEMA_VALIDATION, DEFAULT_SKIP_SCHEMA_VALIDATION),
+            config_entry.data.get(CONF_SCHEMA_VALIDATION_SAMPLE_RATE, DEFAULT_SCHEMA_VALIDATION_SAMPLE_RATE),
+            SCHEMA_VALIDATION_POLICY
+        )
+        # Decodifica e validazione nell'executor dei messaggi OCPP di grandi dimensioni (opzionale) e misura del ritardo
+        # dell'event loop (il monitor viene avviato in "get_instance")
+        self.ha_message_decoder = HomeAssistantMessageDecoder(
+            hass,
+            config_entry.data.get(CONF_OFFLOAD_DECODING, DEFAULT_OFFLOAD_DECODING),
+            config_entry.data.get(CONF_OFFLOAD_DECODING_THRESHOLD, DEFAULT_OFFLOAD_DECODING_THRESHOLD)
+        )
+        self.ha_loop_lag_monitor = HomeAssistantLoopLagMonitor(hass, LOOP_LAG_INTERVAL, LOOP_LAG_WARNING_THRESHOLD)
+        # Istogrammi della latenza end-to-end delle chiamate OCPP ricevute da tutta la flotta (i campioni vengono
+        # registrati dai tracker dei singoli Charge Point)
+        self.ha_latency_tracker = HomeAssistantLatencyTracker(self, 1, LATENCY_PUBLISH_INTERVAL)
+        # Snapshot delle metriche persistenti e dei valori dei numeri di tutti i dispositivi (caricato in "get_instance")
+        self.ha_metrics_store = HomeAssistantMetricsStore(hass, config_entry.entry_id)
+        # Filtro dei measurand e delle variabili del device model che diventano sensori (opzioni dell'integrazione)
+        self.ha_sensor_filter = HomeAssistantSensorFilter(
+            config_entry.options.get(CONF_SENSORS_INCLUDE, ""),
+            config_entry.options.get(CONF_SENSORS_EXCLUDE, "")
+        )
+        # Piattaforme Home Assistant già configurate: per ognuna la callback "async_add_entities" fornita da Home
+        # Assistant e la funzione che restituisce le entità della piattaforma per uno specifico Charge Point
+        self._ha_platforms: dict[str, tuple[Callable, Callable]] = {}
+        # Charge Point le cui nuove entità verranno aggiunte al termine del setup delle piattaforme (vedi
+        # "async_add_or_defer_charge_point_ha_entities")
+        self._ha_deferred_charge_points: dict[str, object] = {}
+        # Piattaforme il cui setup è in corso (vedi "async_setup_ha_platform")
+        self._ha_platforms_in_setup: set[str] = set()
         self._status = STATE_OK
 
         """ Central Station Management System inizialization """
@@ -162,11 +251,24 @@ class HomeAssistantCentralSystem(
     def is_available(self):
         return self.status == STATE_OK
 
+    # overridden
+    # Gli eventi del Central System riguardano l'intera flotta: viene usato il segnale globale
+    @property
+    def ha_data_updated_signal(self) -> str:
+        return DATA_UPDATED
+
     @staticmethod
     async def get_instance(params={}):
         hass = params.get("hass")
         entry = params.get("entry")
-        return HomeAssistantCentralSystem(hass, entry)
+        ha_central_system = HomeAssistantCentralSystem(hass, entry)
+        # Lo snapshot viene caricato una sola volta, prima della creazione dei dispositivi e delle entità
+        await ha_central_system.ha_metrics_store.async_load()
+        ha_central_system.ha_metrics_store.seed(ha_central_system)
+        ha_central_system.async_register_ha_services()
+        ha_central_system.ha_boot_pipeline.async_start()
+        ha_central_system.ha_loop_lag_monitor.async_start()
+        return ha_central_system
 
     def async_create_remote_start_transaction_task(
         self,
@@ -229,6 +331,185 @@ class HomeAssistantCentralSystem(
             )
         )
 
+    # Aggiornamento del 17/10/2026
+    # Invia in parallelo al backend Charge Advisor le notifiche di stato dei Point Of Delivery di un Charge Point (una per
+    # connettore), con al più "concurrency" notifiche contemporanee ed entro "timeout" secondi complessivi: le notifiche
+    # non ancora completate allo scadere del tempo vengono annullate. L'esito viene riportato in un unico log.
+    async def notify_points_of_delivery_status_to_charge_advisor_backend(
+        self,
+        charging_station_id,
+        notifications: list[dict]
+    ):
+        if len(notifications) == 0:
+            return
+        concurrency = self._config_entry.data.get(CONF_POD_NOTIFY_CONCURRENCY, DEFAULT_POD_NOTIFY_CONCURRENCY)
+        timeout = self._config_entry.data.get(CONF_POD_NOTIFY_TIMEOUT, DEFAULT_POD_NOTIFY_TIMEOUT)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def notify(params):
+            async with semaphore:
+                await self.notify_point_of_delivery_status_to_charge_advisor_backend(
+                    charging_station_id=charging_station_id,
+                    **params
+                )
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tasks = [asyncio.create_task(notify(params)) for params in notifications]
+        pending = set(tasks)
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+        finally:
+            # Le notifiche non completate (anche se l'attesa viene annullata) vengono annullate ed attese, così che
+            # nessun task resti in esecuzione o con un'eccezione mai letta
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        failed = [task.exception() for task in done if task.exception() is not None]
+        elapsed = loop.time() - start
+
+        message = (
+            f"Notifica dello stato dei Point Of Delivery del Charge Point {charging_station_id}: "
+            f"{len(done) - len(failed)} inviate, {len(failed)} fallite, {len(pending)} annullate "
+            f"su {len(tasks)} in {elapsed:.2f} s"
+        )
+        if failed or pending:
+            OcppLog.log_w(message + (f" (primo errore: {failed[0]!r})" if failed else ""))
+        else:
+            OcppLog.log_i(message)
+
+    # Aggiornamento del 17/10/2026
+    # Setup di una piattaforma (sensor.py, switch.py, ecc.): le entità vengono prodotte un Charge Point alla volta ed
+    # aggiunte in blocchi di al più HA_ENTITIES_CHUNK_SIZE entità, restituendo il controllo all'event loop tra un blocco
+    # e l'altro. Al termine la piattaforma viene registrata per le successive aggiunte incrementali; le aggiunte
+    # richieste nel frattempo (es. da un Charge Point appena connesso) vengono rimandate al termine del setup.
+    async def async_setup_ha_platform(
+        self,
+        platform: str,
+        async_add_entities: Callable,
+        get_charge_point_entities: Callable,
+        entities: list | None = None
+    ):
+        self._ha_platforms_in_setup.add(platform)
+        try:
+            await self._async_setup_ha_platform(platform, async_add_entities, get_charge_point_entities, entities)
+        finally:
+            self._ha_platforms_in_setup.discard(platform)
+
+    async def _async_setup_ha_platform(
+        self,
+        platform: str,
+        async_add_entities: Callable,
+        get_charge_point_entities: Callable,
+        entities: list | None
+    ):
+        loop = asyncio.get_running_loop()
+        setup_start = loop.time()
+        chunk = list(entities or [])
+        chunks = 0
+        added = 0
+
+        def add_chunk(chunk_start):
+            nonlocal chunks, added
+            for entity in chunk:
+                entity.append_entity_unique_id()
+            async_add_entities(chunk, False)
+            chunks += 1
+            added += len(chunk)
+            OcppLog.log_d(
+                f"Piattaforma {platform}: blocco {chunks} di {len(chunk)} entità aggiunto in "
+                f"{(loop.time() - chunk_start) * 1000:.1f} ms"
+            )
+
+        chunk_start = loop.time()
+        for charge_point in list(self.charge_points.values()):
+            chunk.extend(get_charge_point_entities(charge_point))
+            while len(chunk) >= HA_ENTITIES_CHUNK_SIZE:
+                chunk, remaining = chunk[:HA_ENTITIES_CHUNK_SIZE], chunk[HA_ENTITIES_CHUNK_SIZE:]
+                add_chunk(chunk_start)
+                chunk = remaining
+                # Restituiamo il controllo all'event loop
+                await asyncio.sleep(0)
+                chunk_start = loop.time()
+        if len(chunk) > 0:
+            add_chunk(chunk_start)
+
+        OcppLog.log_i(
+            f"Piattaforma {platform}: {added} entità aggiunte in {chunks} blocchi in "
+            f"{(loop.time() - setup_start) * 1000:.1f} ms"
+        )
+
+        self.register_ha_platform(platform, async_add_entities, get_charge_point_entities)
+
+    # Aggiornamento del 17/10/2026
+    # Ogni piattaforma (sensor.py, switch.py, ecc.), al termine della propria "async_setup_entry", registra la callback
+    # "async_add_entities" ricevuta da Home Assistant e la funzione che costruisce le proprie entità per un Charge Point.
+    # In questo modo le entità di un nuovo Charge Point, EVSE o Connettore possono essere aggiunte in maniera
+    # incrementale, senza scaricare e ricaricare tutte le piattaforme.
+    def register_ha_platform(
+        self,
+        platform: str,
+        async_add_entities: Callable,
+        get_charge_point_entities: Callable
+    ):
+        self._ha_platforms[platform] = (async_add_entities, get_charge_point_entities)
+        if not self._ha_add_scheduler.running:
+            self.async_add_deferred_charge_point_ha_entities()
+
+    def unregister_ha_platforms(self):
+        self._ha_platforms.clear()
+
+    def is_ha_platforms_setup(self):
+        return all(platform in self._ha_platforms for platform in PLATFORMS)
+
+    # Indica se il setup delle piattaforme è in corso: alcune piattaforme sono in fase di setup o già registrate (ma non
+    # tutte), oppure è in corso il ricaricamento completo
+    def is_ha_platforms_setup_in_progress(self):
+        return (
+            bool(self._ha_platforms_in_setup)
+            or self._ha_add_scheduler.running
+            or (bool(self._ha_platforms) and not self.is_ha_platforms_setup())
+        )
+
+    # Aggiunge in Home Assistant le sole entità del Charge Point non ancora registrate (ad esempio quelle di un
+    # Connettore o di un EVSE appena aggiunto). Restituisce il numero di entità aggiunte.
+    @callback
+    def async_add_charge_point_ha_entities(self, charge_point):
+        added = 0
+        for platform, (async_add_entities, get_charge_point_entities) in self._ha_platforms.items():
+            entities = [
+                entity
+                for entity in get_charge_point_entities(charge_point)
+                if entity.unique_id not in entity.target.ha_entity_unique_ids
+            ]
+            if len(entities) == 0:
+                continue
+            for entity in entities:
+                entity.append_entity_unique_id()
+            async_add_entities(entities, False)
+            added += len(entities)
+        return added
+
+    # Aggiornamento del 17/10/2026
+    # Aggiunge le nuove entità del Charge Point se tutte le piattaforme sono configurate, altrimenti le rimanda al
+    # termine del loro setup. Non richiede mai il ricaricamento completo delle piattaforme (es. creazione dei sensori
+    # "lazy").
+    @callback
+    def async_add_or_defer_charge_point_ha_entities(self, charge_point):
+        if self.is_ha_platforms_setup() and not self._ha_add_scheduler.running:
+            self.async_add_charge_point_ha_entities(charge_point)
+        else:
+            self._ha_deferred_charge_points[charge_point.id] = charge_point
+
+    # Aggiunge le entità dei Charge Point rimandate, se tutte le piattaforme sono configurate
+    @callback
+    def async_add_deferred_charge_point_ha_entities(self):
+        if not self._ha_deferred_charge_points or not self.is_ha_platforms_setup():
+            return
+        deferred, self._ha_deferred_charge_points = self._ha_deferred_charge_points, {}
+        for charge_point in deferred.values():
+            self.async_add_charge_point_ha_entities(charge_point)
+
     # Aggiornamento del 08/02/2023
     # Questa funzione vale a livello d'intera integrazione. Viene chiamata per assicurare che tutte le entità della
     # integrazione vengano aggiunte in Home Assistant per ogni piattaforma: sensor, switch, button o number.
@@ -237,27 +518,40 @@ class HomeAssistantCentralSystem(
     # b) aggiunte TUTTE le entità (funzione "async_forward_entry_setup").
     # È compito di ogni piattaforma, nel proprio corrispettivo file (sensor.py, switch.py, ecc.) gestire la aggiunta
     # delle entità in base allo stato del sistema (Charge Point e Connector connessi) nela funzione "async_setup_entry"
-    async def add_ha_entities(self):
+    # Aggiornamento del 17/10/2026
+    # Se viene indicato il Charge Point che ha richiesto la aggiunta e tutte le piattaforme sono già configurate,
+    # vengono aggiunte solo le entità mancanti di quel Charge Point. Il ricaricamento completo resta come fallback.
+    async def add_ha_entities(self, charge_point=None):
+
+        if (
+            charge_point is not None
+            and self.is_ha_platforms_setup()
+            and not self._ha_add_scheduler.running
+        ):
+            self.async_add_charge_point_ha_entities(charge_point)
+            return
+
+        # Durante il setup delle piattaforme le entità del Charge Point vengono aggiunte al suo termine, senza
+        # richiedere un nuovo ricaricamento completo
+        if charge_point is not None and self.is_ha_platforms_setup_in_progress():
+            self.async_add_or_defer_charge_point_ha_entities(charge_point)
+            return
 
         # Aggiornamento del 08/02/2023
         # Ho aggiunto questo check, nel caso in cui differenti Charge Point richiamino contemporaneamente questa
         # funzione. Nel caso in cui ciò avvenga, le chiamate avvengono in maniera sequenziale
-        while self._adding_entities or self._updating_entities:
-            msg = f"Central System is already "
-            if self._adding_entities:
-                msg += "adding"
-            elif self._updating_entities:
-                msg += "updating"
-            msg += f" its own Home Assistant entities > Waiting {HA_UPDATE_ENTITIES_WAITING_SECS} sec"
-            OcppLog.log_w(msg)
-            await asyncio.sleep(HA_UPDATE_ENTITIES_WAITING_SECS)
+        # Aggiornamento del 17/10/2026
+        # Le chiamate concorrenti vengono accorpate dallo scheduler: tutte quelle arrivate durante un ricaricamento
+        # in corso vengono servite da UN solo ricaricamento successivo
+        await self._ha_add_scheduler.async_request_update()
 
-
-
-        self._adding_entities = True
+    async def _async_add_ha_entities(self):
 
         # OcppLog.log_d(f"Removing and adding all platforms' entities (called by {id})...")
 
+        # Le callback registrate dalle piattaforme non sono più valide una volta scaricate le piattaforme
+        self.unregister_ha_platforms()
+
         for platform in PLATFORMS:
 
             await self._hass.config_entries.async_forward_entry_unload(
@@ -272,11 +566,24 @@ class HomeAssistantCentralSystem(
             self._config_entry, PLATFORMS
         )
 
-        self._adding_entities = False
+        # Le entità rimandate durante il ricaricamento vengono aggiunte solo ora (quelle già create dal setup delle
+        # piattaforme vengono scartate)
+        self.async_add_deferred_charge_point_ha_entities()
 
         # OcppLog.log_d(f"Removed and added all platforms' entities (called by {id})")
 
+    # Aggiornamento del 17/10/2026
+    # Le connessioni (e le riconnessioni) troppo frequenti di un Charge Point vengono chiuse con il codice 1013 ("Try
+    # Again Later") prima di creare o riattivare il Charge Point
+    async def async_check_ha_admission(self, cp_id, connection):
+        try:
+            self.ha_admission_controller.check_connection(cp_id)
+        except AdmissionRejectedError:
+            await connection.close(code=1013, reason="Try again later")
+            raise
+
     async def get_charge_point_instance(self, cp_id, websocket):
+        await self.async_check_ha_admission(cp_id, websocket)
         # Create an instance of HomeAssistantChargePoint class
         ha_charge_point = HomeAssistantChargePoint(
             cp_id,
@@ -294,10 +601,13 @@ class HomeAssistantCentralSystem(
             model="OCPP 1.6 Charge Point",
             via_device=(DOMAIN, self._id),
         )
+        # Le metriche persistenti vengono ripristinate prima della creazione delle entità
+        self.ha_metrics_store.seed(ha_charge_point)
 
         return ha_charge_point
 
     async def get_charging_station_instance(self, cp_id, websocket):
+        await self.async_check_ha_admission(cp_id, websocket)
         #OcppLog.log_w(f"Istanziazione di un Charge Point integrato...")
         # Create an instance of HomeAssistantChargePoint class
         ha_charging_station = HomeAssistantChargingStationV201(
@@ -321,8 +631,172 @@ class HomeAssistantCentralSystem(
             # manufacturer=hacp.vendor
         )
         #OcppLog.log_w(f"Aggiunta del Charge Point integrato al registro dispositivi completata.")
+        # Le metriche persistenti vengono ripristinate prima della creazione delle entità
+        self.ha_metrics_store.seed(ha_charging_station)
         return ha_charging_station
 
+    # ------------------------------------------------------------------------------------------------------------------
+    # Aggiornamento del 17/10/2026
+    # Servizi Home Assistant della Central System: registrati una sola volta per l'intera flotta e rimossi alla
+    # rimozione dell'integrazione (vedi async_unload_entry)
+    # ------------------------------------------------------------------------------------------------------------------
+
+    @callback
+    def async_register_ha_services(self):
+        self._hass.services.async_register(
+            DOMAIN,
+            HACentralSystemServices.service_get_meter_statistics.value,
+            self._async_handle_get_meter_statistics,
+            METER_STATISTICS_SERVICE_DATA_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+        self._hass.services.async_register(
+            DOMAIN,
+            HACentralSystemServices.service_get_metrics_memory_report.value,
+            self._async_handle_get_metrics_memory_report,
+            METRICS_MEMORY_REPORT_SERVICE_DATA_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+        self._hass.services.async_register(
+            DOMAIN,
+            HACentralSystemServices.service_get_admission_report.value,
+            self._async_handle_get_admission_report,
+            supports_response=SupportsResponse.ONLY,
+        )
+        self._hass.services.async_register(
+            DOMAIN,
+            HACentralSystemServices.service_get_validation_report.value,
+            self._async_handle_get_validation_report,
+            supports_response=SupportsResponse.ONLY,
+        )
+        self._hass.services.async_register(
+            DOMAIN,
+            HACentralSystemServices.service_get_event_loop_report.value,
+            self._async_handle_get_event_loop_report,
+            EVENT_LOOP_REPORT_SERVICE_DATA_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+        self._hass.services.async_register(
+            DOMAIN,
+            HACentralSystemServices.service_get_latency_report.value,
+            self._async_handle_get_latency_report,
+            supports_response=SupportsResponse.ONLY,
+        )
+
+    @callback
+    def async_remove_ha_services(self):
+        self._hass.services.async_remove(DOMAIN, HACentralSystemServices.service_get_meter_statistics.value)
+        self._hass.services.async_remove(DOMAIN, HACentralSystemServices.service_get_metrics_memory_report.value)
+        self._hass.services.async_remove(DOMAIN, HACentralSystemServices.service_get_admission_report.value)
+        self._hass.services.async_remove(DOMAIN, HACentralSystemServices.service_get_validation_report.value)
+        self._hass.services.async_remove(DOMAIN, HACentralSystemServices.service_get_event_loop_report.value)
+        self._hass.services.async_remove(DOMAIN, HACentralSystemServices.service_get_latency_report.value)
+
+    # Tutti i livelli della flotta: Central System, Charge Point / Charging Station, EVSE e Connettori
+    def iter_ha_tiers(self):
+        yield self
+        for charge_point in list(self.charge_points.values()):
+            yield charge_point
+            if charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
+                for evse in charge_point.evses:
+                    yield evse
+                    yield from evse.connectors
+            else:
+                yield from charge_point.connectors
+
+    # Contatori del controllo di ammissione e della pipeline di configurazione delle connessioni dei Charge Point
+    async def _async_handle_get_admission_report(self, call: ServiceCall) -> ServiceResponse:
+        return {
+            "admission": self.ha_admission_controller.get_report(),
+            "boot": self.ha_boot_pipeline.get_report(),
+        }
+
+    # Contatori delle chiamate OCPP ricevute validate e non validate, per azione
+    async def _async_handle_get_validation_report(self, call: ServiceCall) -> ServiceResponse:
+        return self.ha_validation_policy.get_report()
+
+    # Ritardo dell'event loop e contatori della decodifica nell'executor dei messaggi OCPP (eventualmente azzerando le
+    # statistiche del ritardo, per confrontarle prima e dopo una modifica della configurazione)
+    async def _async_handle_get_event_loop_report(self, call: ServiceCall) -> ServiceResponse:
+        report = {
+            "loop_lag": self.ha_loop_lag_monitor.get_report(),
+            "decoder": self.ha_message_decoder.get_report(),
+        }
+        if call.data.get("reset", False):
+            self.ha_loop_lag_monitor.reset()
+        return report
+
+    # Istogrammi della latenza end-to-end delle chiamate OCPP ricevute, per azione: intera flotta e singoli Charge Point
+    async def _async_handle_get_latency_report(self, call: ServiceCall) -> ServiceResponse:
+        return {
+            "fleet": self.ha_latency_tracker.get_report(),
+            "charge_points": {
+                cp_id: charge_point.ha_latency_tracker.get_report()
+                for cp_id, charge_point in list(self.charge_points.items())
+            },
+        }
+
+    # Occupazione di memoria delle metriche di ogni livello (ed eventuale rimozione delle metriche vuote)
+    async def _async_handle_get_metrics_memory_report(self, call: ServiceCall) -> ServiceResponse:
+        compact = call.data.get("compact", False)
+        tiers = {}
+        totals = {"tiers": 0, "metrics": 0, "empty_metrics": 0, "metrics_bytes": 0, "compacted_metrics": 0}
+        for tier in self.iter_ha_tiers():
+            if compact:
+                totals["compacted_metrics"] += tier.compact_ha_metrics()
+            usage = tier.get_ha_metrics_memory_usage()
+            tiers[tier.ha_device_identifier] = usage
+            totals["tiers"] += 1
+            for key in ("metrics", "empty_metrics", "metrics_bytes"):
+                totals[key] += usage[key]
+        # Coda degli aggiornamenti di ogni Charge Point (vedi ha_flusher.py)
+        flushers = {
+            cp_id: charge_point.ha_state_flusher.get_report()
+            for cp_id, charge_point in list(self.charge_points.items())
+            if charge_point.ha_state_flusher is not None
+        }
+        totals["flush_peak_depth"] = max((report["peak_depth"] for report in flushers.values()), default=0)
+        totals["flush_merged"] = sum(report["merged"] for report in flushers.values())
+        totals["flush_dropped"] = sum(report["dropped"] for report in flushers.values())
+        return {
+            "totals": totals,
+            "tiers": tiers,
+            "flushers": flushers,
+            # Interrogazioni dei registri di Home Assistant servite dalla cache (vedi ha_registry_cache.py)
+            "registry_cache": self.ha_registry_cache.get_report(),
+        }
+
+    # Statistiche sulla finestra scorrevole dei campioni recenti dei measurand di un Connettore
+    async def _async_handle_get_meter_statistics(self, call: ServiceCall) -> ServiceResponse:
+        cp_id = call.data["charge_point_id"]
+        evse_id = call.data.get("evse_id")
+        connector_id = call.data.get("connector_id", 1)
+        window = call.data.get("window", DEFAULT_METER_STATISTICS_WINDOW)
+
+        charge_point = self.charge_points.get(cp_id)
+        if charge_point is None:
+            raise HomeAssistantError(f"Charge Point {cp_id} not found")
+        if evse_id is not None:
+            evse = charge_point.get_evse_by_id(evse_id)
+            connector = evse.get_connector_by_id(connector_id) if evse is not None else None
+        else:
+            connector = charge_point.get_connector_by_id(connector_id)
+        if connector is None or connector.ha_meter_samples is None:
+            raise HomeAssistantError(f"Connector {connector_id} of Charge Point {cp_id} not found")
+
+        samples = connector.ha_meter_samples
+        measurands = call.data.get("measurands") or samples.measurands
+        return {
+            "charge_point_id": cp_id,
+            "evse_id": evse_id,
+            "connector_id": connector_id,
+            "window": window,
+            "statistics": {
+                measurand: samples.get_statistics(measurand, window)
+                for measurand in measurands
+            },
+        }
+
     async def call_ha_service(
             self,
             service_name: str,
@@ -367,6 +841,7 @@ class HomeAssistantCentralSystem(
 
             return True
 
+        # Lo switch della comunicazione con l'EMS viene aggiornato dalla metrica
         self.set_metric_value(HACentralSystemServices.service_ems_communication_start.value, True)
 
         return True
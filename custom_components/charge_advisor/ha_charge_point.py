@@ -22,7 +22,7 @@ from ocpp.exceptions import NotImplementedError
 
 from homeassistant.components.persistent_notification import DOMAIN as PN_DOMAIN
 from homeassistant.const import STATE_OK, STATE_UNAVAILABLE
-from homeassistant.helpers import device_registry, entity_component, entity_registry
+from homeassistant.helpers import device_registry, entity_registry
 import homeassistant.helpers.config_validation as cv
 from ocpp.v16.enums import AvailabilityType, ChargePointStatus
 
@@ -41,6 +41,12 @@ from .enums import *
 from .logger import OcppLog
 from .ha_metric import HomeAssistantEntityMetrics
 from .ha_connector import HomeAssistantConnector
+from .ha_boot import BOOT_PRIORITY_ACTIVE_TRANSACTION, BOOT_PRIORITY_DEFAULT
+from .ha_decoder import HomeAssistantMessageDecoder
+from .ha_flusher import HomeAssistantStateFlusher
+from .ha_latency import HomeAssistantLatencyTracker
+from .ha_reconciler import HomeAssistantEntityReconciler
+from .ha_scheduler import HomeAssistantUpdateScheduler
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Home Assistant Voluptuous SCHEMAS
@@ -109,14 +115,40 @@ class HomeAssistantChargePoint(
         # Stato (di Home Assistant) del Charge Point
         self._status = STATE_OK
 
-        # Flag per tenere conto se il Charge Point sta aggiungendo le proprie entità
-        self._adding_entities = False
+        # Scheduler che serializza ed accorpa gli aggiornamenti delle entità del Charge Point
+        self._ha_update_scheduler = HomeAssistantUpdateScheduler(
+            f"Charge Point {id}",
+            self._async_update_ha_entities
+        )
+
+        # Accorpa in un unico lotto le scritture delle entità del Charge Point (e dei suoi figli)
+        self.ha_state_flusher = HomeAssistantStateFlusher(
+            hass,
+            f"Charge Point {id}",
+            config_entry.data.get(CONF_STATE_FLUSH_WINDOW, DEFAULT_STATE_FLUSH_WINDOW) / 1000,
+            STATE_FLUSH_QUEUE_SIZE
+        )
+
+        # Istogrammi (a campione) della latenza end-to-end delle chiamate OCPP ricevute, aggregati anche per la flotta
+        self.ha_latency_tracker = HomeAssistantLatencyTracker(
+            self,
+            LATENCY_SAMPLE_RATE,
+            LATENCY_PUBLISH_INTERVAL,
+            central.ha_latency_tracker
+        )
 
-        # Flag per tenere conto se il Charge Point sta aggiornando le proprie entità
-        self._updating_entities = False
+        # Chiamate decodificate nell'executor la cui risposta deve essere validata prima dell'invio: unique_id -> azione
+        # (vedi ha_decoder.py)
+        self.ha_pending_validated_responses: dict[str, str] = {}
 
-        # Lista di entità Home Assistant registrate in fase di setup
-        self.ha_entity_unique_ids: list[str] = []
+        # Insieme degli unique_id delle entità Home Assistant registrate in fase di setup
+        self.ha_entity_unique_ids: set[str] = set()
+
+        # Rimozione (una tantum) delle entità orfane del Charge Point e dei suoi connettori
+        self.ha_entity_reconciler = HomeAssistantEntityReconciler(
+            f"Charge Point {id}",
+            self.remove_orphan_ha_entities
+        )
 
         # Instantiate an OCPP ChargePoint
         ChargePoint.__init__(self, id, connection, central, skip_schema_validation)
@@ -208,72 +240,91 @@ class HomeAssistantChargePoint(
 
         self._status = STATE_OK
 
-        try:
-
-            if not self._booting:
+        # Aggiornamento del 17/10/2026
+        # La configurazione della connessione viene eseguita da un worker della pipeline di boot (vedi ha_boot.py), dopo
+        # un ritardo casuale e con precedenza ai Charge Point con transazioni in corso; la durata di ogni fase viene
+        # misurata. "super()" senza argomenti non è utilizzabile nella funzione annidata.
+        boot = self.central_system.ha_boot_pipeline
+        base_post_connect = super().post_connect
 
-                await self.async_update_ha_device_info()
+        async def bootstrap():
 
-                await super().post_connect()
+            try:
 
-                self._hass.async_create_task(
-                    self.update_ha_entities()
-                )
+                if not self._booting:
 
-                self._booting = True
+                    async with boot.stage("device_info"):
+                        await self.async_update_ha_device_info()
 
-                self.post_connect_success = False
+                    async with boot.stage("configuration"):
+                        await base_post_connect()
 
-                # ------------------------------------------------------------------------------------------------------
-                # REGISTRAZIONE DEI SERVIZI SU HOME ASSISTANT
-                # ------------------------------------------------------------------------------------------------------
+                    # Registrazione delle entità scoperte durante il boot (es. measurand, component)
+                    async with boot.stage("entities"):
+                        await self.add_ha_entities()
+                        self.ha_entity_reconciler.reconcile()
 
-                """ Register custom services with home assistant """
-                self._hass.services.async_register(
-                    DOMAIN,
-                    HAChargePointServices.service_configure.value,
-                    handle_configure,
-                    CONF_SERVICE_DATA_SCHEMA,
-                )
-                self._hass.services.async_register(
-                    DOMAIN,
-                    HAChargePointServices.service_get_configuration.value,
-                    handle_get_configuration,
-                    GCONF_SERVICE_DATA_SCHEMA,
-                )
-                self._hass.services.async_register(
-                    DOMAIN,
-                    HAChargePointServices.service_data_transfer.value,
-                    handle_data_transfer,
-                    TRANS_SERVICE_DATA_SCHEMA,
-                )
-                if Profiles.SMART in self.attr_supported_features:
-                    self._hass.services.async_register(
-                        DOMAIN,
-                        HAChargePointServices.service_clear_profile.value,
-                        handle_clear_profile
+                    self._hass.async_create_task(
+                        self.update_ha_entities()
                     )
 
-                if Profiles.FW in self.attr_supported_features:
-                    self._hass.services.async_register(
-                        DOMAIN,
-                        HAChargePointServices.service_update_firmware.value,
-                        handle_update_firmware,
-                        UFW_SERVICE_DATA_SCHEMA,
-                    )
-                    self._hass.services.async_register(
-                        DOMAIN,
-                        HAChargePointServices.service_get_diagnostics.value,
-                        handle_get_diagnostics,
-                        GDIAG_SERVICE_DATA_SCHEMA,
-                    )
+                    self._booting = True
+
+                    self.post_connect_success = False
+
+                    # --------------------------------------------------------------------------------------------------
+                    # REGISTRAZIONE DEI SERVIZI SU HOME ASSISTANT
+                    # --------------------------------------------------------------------------------------------------
+
+                    async with boot.stage("services"):
+                        """ Register custom services with home assistant """
+                        self._hass.services.async_register(
+                            DOMAIN,
+                            HAChargePointServices.service_configure.value,
+                            handle_configure,
+                            CONF_SERVICE_DATA_SCHEMA,
+                        )
+                        self._hass.services.async_register(
+                            DOMAIN,
+                            HAChargePointServices.service_get_configuration.value,
+                            handle_get_configuration,
+                            GCONF_SERVICE_DATA_SCHEMA,
+                        )
+                        self._hass.services.async_register(
+                            DOMAIN,
+                            HAChargePointServices.service_data_transfer.value,
+                            handle_data_transfer,
+                            TRANS_SERVICE_DATA_SCHEMA,
+                        )
+                        if Profiles.SMART in self.attr_supported_features:
+                            self._hass.services.async_register(
+                                DOMAIN,
+                                HAChargePointServices.service_clear_profile.value,
+                                handle_clear_profile
+                            )
+
+                        if Profiles.FW in self.attr_supported_features:
+                            self._hass.services.async_register(
+                                DOMAIN,
+                                HAChargePointServices.service_update_firmware.value,
+                                handle_update_firmware,
+                                UFW_SERVICE_DATA_SCHEMA,
+                            )
+                            self._hass.services.async_register(
+                                DOMAIN,
+                                HAChargePointServices.service_get_diagnostics.value,
+                                handle_get_diagnostics,
+                                GDIAG_SERVICE_DATA_SCHEMA,
+                            )
+
+                            self.post_connect_success = True
+
+            except NotImplementedError as e:
+                OcppLog.log_e(
+                    f"Configuration of the Charge Point {self.id} failed: {e}"
+                )
 
-                    self.post_connect_success = True
-
-        except NotImplementedError as e:
-            OcppLog.log_e(
-                f"Configuration of the Charge Point {self.id} failed: {e}"
-            )
+        await boot.run(self.id, self.ha_boot_priority, bootstrap)
 
         self._booting = False
 
@@ -284,42 +335,52 @@ class HomeAssistantChargePoint(
     # Updates the Charge Point Home Assistant Entities and
     # its Connectors Home Assistant Entities
     async def update_ha_entities(self):
+        await self._ha_update_scheduler.async_request_update()
 
-        while self._adding_entities or self._updating_entities:
-            msg = f"Charge Point {self.id} is already "
-            if self._adding_entities:
-                msg += "adding"
-            elif self._updating_entities:
-                msg += "updating"
-            msg += f" its own Home Assistant entities > Waiting {HA_UPDATE_ENTITIES_WAITING_SECS} sec"
-            OcppLog.log_w(msg)
-            await asyncio.sleep(HA_UPDATE_ENTITIES_WAITING_SECS)
-
-        self._updating_entities = True
+    async def _async_update_ha_entities(self):
+        # Le entità che dipendono da metriche cambiate sono già aggiornate da "set_metric_value"
+        self.refresh_ha_entities()
+        for conn in self._connectors:
+            await conn.update_ha_entities()
 
-        # Update sensors values in HA
+    # Rimuove dall'entity registry le entità del Charge Point (e dei suoi connettori) non più configurate
+    # dall'integrazione. Restituisce il numero di entità rimosse.
+    def remove_orphan_ha_entities(self) -> int:
+        removed = 0
         er = entity_registry.async_get(self._hass)
-        dr = device_registry.async_get(self._hass)
-        identifiers = self.get_device_registry_identifier()
-        cp_dev = dr.async_get_device(identifiers)
-        for cp_ent in entity_registry.async_entries_for_device(er, cp_dev.id):
-            if cp_ent.unique_id not in self.ha_entity_unique_ids:
+        registry_cache = self.central_system.ha_registry_cache
+        cp_entities = registry_cache.get_entities(self.get_device_registry_identifier())
+        for unique_id, entity_id in list(cp_entities.items()):
+            if unique_id not in self.ha_entity_unique_ids:
                 # source: https://github.com/home-assistant/core/blob/dev/homeassistant/helpers/entity_registry.py
                 # source: https://dev-docs.home-assistant.io/en/dev/api/helpers.html#module-homeassistant.helpers.entity_registry
-                # OcppLog.log_d(f"La entità {cp_ent.unique_id} è registrata in Home Assistant ma non è stata configurata dalla integrazione: verrà eliminata.")
-                er.async_remove(cp_ent.entity_id)
-            else:
-                await entity_component.async_update_entity(self._hass, cp_ent.entity_id)
+                # OcppLog.log_d(f"La entità {unique_id} è registrata in Home Assistant ma non è stata configurata dalla integrazione: verrà eliminata.")
+                er.async_remove(entity_id)
+                removed += 1
         for conn in self._connectors:
-            await conn.update_ha_entities()
-
-        self._updating_entities = False
+            removed += conn.remove_orphan_ha_entities()
+        return removed
 
     def is_available(self):
         return super().is_operative() and self.status == STATE_OK
 
+    # Aggiunge in Home Assistant solamente le entità del Charge Point (e dei suoi EVSE / Connettori) non ancora
+    # registrate, senza ricaricare le piattaforme dell'intera integrazione
     async def add_ha_entities(self):
-        await self.central_system.add_ha_entities()
+        await self.central_system.add_ha_entities(self)
+
+    # Indica se vengono creati i sensori delle statistiche sulle finestre scorrevoli dei measurand dei Connettori
+    @property
+    def ha_meter_statistics_sensors(self) -> bool:
+        return self._config_entry.data.get(CONF_METER_STATISTICS_SENSORS, DEFAULT_METER_STATISTICS_SENSORS)
+
+    # Priorità della configurazione della connessione nella pipeline di boot: i Charge Point con transazioni in corso
+    # vengono configurati per primi
+    @property
+    def ha_boot_priority(self) -> int:
+        if any(conn.has_active_transaction for conn in self._connectors):
+            return BOOT_PRIORITY_ACTIVE_TRANSACTION
+        return BOOT_PRIORITY_DEFAULT
 
     async def call_ha_service(
             self,
@@ -410,7 +471,9 @@ class HomeAssistantChargePoint(
 
     # overridden
     def post_on_meter_values(self):
-        self._hass.async_create_task(self.update_ha_entities())
+        # Le entità delle metriche cambiate (valore, unità di misura o attributi) vengono scritte dal flusher allo
+        # scadere della sua finestra
+        pass
 
     # overridden
     def create_remote_stop_transaction_task(self):
@@ -427,6 +490,7 @@ class HomeAssistantChargePoint(
     async def add_connectors(self, number_of_connectors):
         await super().add_connectors(number_of_connectors)
         await self.add_ha_entities()
+        self.ha_entity_reconciler.reconcile()
 
     # overridden
     async def get_connector_instance(self, connector_id):
@@ -447,6 +511,8 @@ class HomeAssistantChargePoint(
             via_device=(DOMAIN, self.id),
             manufacturer=self.vendor
         )
+        # Le metriche persistenti vengono ripristinate prima della creazione delle entità
+        self.central_system.ha_metrics_store.seed(ha_connector)
 
         return ha_connector
 
@@ -498,6 +564,8 @@ class HomeAssistantChargePoint(
         self._status = STATE_UNAVAILABLE
         # Set the Charge Point "Availability" metric to "Inoperative"
         await self.set_availability(AvailabilityType.inoperative.value)
+        # Point Of Delivery status notifications, sent to the Charge Advisor Backend all together
+        notifications = []
         # Loop over all the Charge Point Connectors
         for connector in self.connectors:
             # Set the Connector "Availability" metric to "Inoperative"
@@ -507,14 +575,15 @@ class HomeAssistantChargePoint(
             value = ChargePointStatus.unavailable.value
             connector.set_metric_value(key, value)
             # Notify Charge Advisor Backend of Point Of Delivery (associated to the Connector) status change
-            await asyncio.create_task(
-                self.central_system.notify_point_of_delivery_status_to_charge_advisor_backend(
-                    charging_station_id=self.id,
-                    connector_id=connector.id,
-                    status=value,
-                    ocpp_version=self.ocpp_protocol_version
-                )
-            )
+            notifications.append(dict(
+                connector_id=connector.id,
+                status=value,
+                ocpp_version=self.ocpp_protocol_version
+            ))
+        await self.central_system.notify_points_of_delivery_status_to_charge_advisor_backend(
+            charging_station_id=self.id,
+            notifications=notifications
+        )
         # Update all the Home Assistant entities associated to the Charge Point
         await self.update_ha_entities()
         # Call the spuer-class stop() function
@@ -523,6 +592,7 @@ class HomeAssistantChargePoint(
     # overridden
     async def close_connection(self):
         await super().close_connection()
+        self.ha_state_flusher.async_flush()
         await self.update_ha_entities()
 
     # overridden
@@ -535,9 +605,57 @@ class HomeAssistantChargePoint(
     def get_default_energy_unit():
         return HA_ENERGY_UNIT
 
+    # overridden
+    async def _handle_call(self, msg):
+        # Aggiornamento del 17/10/2026
+        # La validazione dello schema della chiamata ricevuta dipende dall'azione OCPP (vedi ha_validation.py)
+        self.central_system.ha_validation_policy.apply(self.route_map, msg.action)
+        self.ha_latency_tracker.set_action(msg.action)
+        return await super()._handle_call(msg)
+
+    # overridden
+    async def _send(self, message):
+        # Aggiornamento del 17/10/2026
+        # Validazione delle risposte alle chiamate decodificate e validate nell'executor (vedi ha_decoder.py)
+        if self.ha_pending_validated_responses:
+            HomeAssistantMessageDecoder.validate_response(
+                self.ha_pending_validated_responses,
+                message,
+                self._ocpp_version
+            )
+        await super()._send(message)
+
+    # overridden
+    async def route_message(self, raw_msg):
+        # Aggiornamento del 17/10/2026
+        # La latenza dall'arrivo del messaggio all'invio della risposta ed alla scrittura delle entità viene misurata a
+        # campione (vedi ha_latency.py)
+        self.ha_latency_tracker.begin(self.ha_state_flusher)
+        try:
+            # Aggiornamento del 17/10/2026
+            # I messaggi più grandi della soglia vengono decodificati e validati nell'executor (vedi ha_decoder.py)
+            decoder = self.central_system.ha_message_decoder
+            if not decoder.should_offload(raw_msg):
+                return await super().route_message(raw_msg)
+            base_handle_call = super()._handle_call
+
+            async def handle_call(msg):
+                self.ha_latency_tracker.set_action(msg.action)
+                return await base_handle_call(msg)
+
+            await decoder.async_route_message(self, raw_msg, handle_call)
+        finally:
+            self.ha_latency_tracker.end(self.ha_state_flusher)
+
     # overridden
     async def reconnect(self, connection):
+        # Le riconnessioni troppo frequenti vengono rifiutate (vedi ha_admission.py)
+        await self.central_system.async_check_ha_admission(self.id, connection)
         # Indichiamo lo stato Home Assistant di nuovo disponibile
         self._status = STATE_OK
         await super().reconnect(connection)
+        # Le entità del Charge Point e dei suoi connettori vengono rivalutate
+        self.dispatch_ha_data_updated()
+        for conn in self._connectors:
+            conn.dispatch_ha_data_updated()
 
@@ -26,7 +26,7 @@ from ocpp.routing import on
 
 from homeassistant.components.persistent_notification import DOMAIN as PN_DOMAIN
 from homeassistant.const import STATE_OK, STATE_UNAVAILABLE
-from homeassistant.helpers import device_registry, entity_component, entity_registry
+from homeassistant.helpers import device_registry, entity_registry
 from homeassistant.helpers.typing import UNDEFINED
 import homeassistant.helpers.config_validation as cv
 
@@ -46,6 +46,12 @@ from .enums import *
 from .logger import OcppLog
 from .ha_metric import HomeAssistantEntityMetrics
 from .ha_evse import HomeAssistantEVSEV201
+from .ha_boot import BOOT_PRIORITY_ACTIVE_TRANSACTION, BOOT_PRIORITY_DEFAULT
+from .ha_decoder import HomeAssistantMessageDecoder
+from .ha_flusher import HomeAssistantStateFlusher
+from .ha_latency import HomeAssistantLatencyTracker
+from .ha_reconciler import HomeAssistantEntityReconciler
+from .ha_scheduler import HomeAssistantUpdateScheduler
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Home Assistant Voluptuous SCHEMAS
@@ -116,14 +122,51 @@ class HomeAssistantChargingStationV201(
         # Stato (di Home Assistant) del Charge Point
         self._status = STATE_OK
 
-        # Flag per tenere conto se il Charge Point sta aggiungendo le proprie entità
-        self._adding_entities = False
+        # Scheduler che serializza ed accorpa gli aggiornamenti delle entità della Charging Station
+        self._ha_update_scheduler = HomeAssistantUpdateScheduler(
+            f"Charging Station {id}",
+            self._async_update_ha_entities
+        )
+
+        # Accorpa in un unico lotto le scritture delle entità del Charging Station (e dei suoi figli)
+        self.ha_state_flusher = HomeAssistantStateFlusher(
+            hass,
+            f"Charging Station {id}",
+            config_entry.data.get(CONF_STATE_FLUSH_WINDOW, DEFAULT_STATE_FLUSH_WINDOW) / 1000,
+            STATE_FLUSH_QUEUE_SIZE
+        )
+
+        # Istogrammi (a campione) della latenza end-to-end delle chiamate OCPP ricevute, aggregati anche per la flotta
+        self.ha_latency_tracker = HomeAssistantLatencyTracker(
+            self,
+            LATENCY_SAMPLE_RATE,
+            LATENCY_PUBLISH_INTERVAL,
+            central.ha_latency_tracker
+        )
+
+        # Chiamate decodificate nell'executor la cui risposta deve essere validata prima dell'invio: unique_id -> azione
+        # (vedi ha_decoder.py)
+        self.ha_pending_validated_responses: dict[str, str] = {}
 
-        # Flag per tenere conto se il Charge Point sta aggiornando le proprie entità
-        self._updating_entities = False
+        # Insieme degli unique_id delle entità Home Assistant registrate in fase di setup
+        self.ha_entity_unique_ids: set[str] = set()
 
-        # Lista di entità Home Assistant registrate in fase di setup
-        self.ha_entity_unique_ids: list[str] = []
+        # Numero di NotifyReport ricevuti: l'inventario del device model (vedi sensor.py) viene ricalcolato solo quando
+        # cambia, insieme alla generazione a cui si riferisce
+        self.ha_device_model_generation = 0
+        self.ha_sensor_inventory: tuple | None = None
+
+        # Creazione (accorpata) dei sensori del device model che hanno ricevuto il primo valore
+        self._ha_promotion_scheduler = HomeAssistantUpdateScheduler(
+            f"Charging Station {id} sensors promotion",
+            self._async_promote_ha_sensors
+        )
+
+        # Rimozione (una tantum) delle entità orfane della Charging Station e dei suoi EVSE / connettori
+        self.ha_entity_reconciler = HomeAssistantEntityReconciler(
+            f"Charging Station {id}",
+            self.remove_orphan_ha_entities
+        )
 
         # Instantiate an OCPP ChargePoint
         ChargingStationV201.__init__(self, id, connection, central, skip_schema_validation)
@@ -138,9 +181,8 @@ class HomeAssistantChargingStationV201(
         return self._status
 
     # Source: https://community.home-assistant.io/t/blocking-call-inside-event-loop/575796
-    # OVERRIDDEN
-    """async def call(self, payload, suppress=True):
-        return await self._hass.async_add_executor_job(super().call, payload, suppress)"""
+    # La decodifica e la validazione dei messaggi ricevuti di grandi dimensioni avviene nell'executor: vedi
+    # "route_message" e ha_decoder.py
 
     # overridden
     def _get_init_auth_id_tags(self):
@@ -209,52 +251,71 @@ class HomeAssistantChargingStationV201(
 
         self._status = STATE_OK
 
-        try:
+        # Aggiornamento del 17/10/2026
+        # La configurazione della connessione viene eseguita da un worker della pipeline di boot (vedi ha_boot.py), dopo
+        # un ritardo casuale e con precedenza ai Charge Point con transazioni in corso; la durata di ogni fase viene
+        # misurata. "super()" senza argomenti non è utilizzabile nella funzione annidata.
+        boot = self.central_system.ha_boot_pipeline
+        base_post_connect = super().post_connect
 
-            if not self._booting:
+        async def bootstrap():
 
-                await self.async_update_ha_device_info()
+            try:
 
-                await super().post_connect()
+                if not self._booting:
 
-                self._hass.async_create_task(
-                    self.update_ha_entities()
-                )
+                    async with boot.stage("device_info"):
+                        await self.async_update_ha_device_info()
 
-                self._booting = True
+                    async with boot.stage("configuration"):
+                        await base_post_connect()
 
-                self.post_connect_success = False
+                    # Registrazione delle entità scoperte durante il boot (es. measurand, component)
+                    async with boot.stage("entities"):
+                        await self.add_ha_entities()
+                        self.ha_entity_reconciler.reconcile()
 
-                # ----------------------------------------------------------------------------------------------------------
-                # REGISTRAZIONE DEI SERVIZI SU HOME ASSISTANT
-                # ----------------------------------------------------------------------------------------------------------
+                    self._hass.async_create_task(
+                        self.update_ha_entities()
+                    )
 
-                """ Register custom services with home assistant """
-                self._hass.services.async_register(
-                    DOMAIN,
-                    HAChargePointServices.service_configure.value,
-                    handle_configure,
-                    CONF_SERVICE_DATA_SCHEMA,
-                )
-                self._hass.services.async_register(
-                    DOMAIN,
-                    HAChargePointServices.service_get_configuration.value,
-                    handle_get_configuration,
-                    GCONF_SERVICE_DATA_SCHEMA,
-                )
-                self._hass.services.async_register(
-                    DOMAIN,
-                    HAChargePointServices.service_data_transfer.value,
-                    handle_data_transfer,
-                    TRANS_SERVICE_DATA_SCHEMA,
+                    self._booting = True
+
+                    self.post_connect_success = False
+
+                    # --------------------------------------------------------------------------------------------------
+                    # REGISTRAZIONE DEI SERVIZI SU HOME ASSISTANT
+                    # --------------------------------------------------------------------------------------------------
+
+                    async with boot.stage("services"):
+                        """ Register custom services with home assistant """
+                        self._hass.services.async_register(
+                            DOMAIN,
+                            HAChargePointServices.service_configure.value,
+                            handle_configure,
+                            CONF_SERVICE_DATA_SCHEMA,
+                        )
+                        self._hass.services.async_register(
+                            DOMAIN,
+                            HAChargePointServices.service_get_configuration.value,
+                            handle_get_configuration,
+                            GCONF_SERVICE_DATA_SCHEMA,
+                        )
+                        self._hass.services.async_register(
+                            DOMAIN,
+                            HAChargePointServices.service_data_transfer.value,
+                            handle_data_transfer,
+                            TRANS_SERVICE_DATA_SCHEMA,
+                        )
+
+                        self.post_connect_success = True
+
+            except NotImplementedError as e:
+                OcppLog.log_e(
+                    f"Configuration of the Charging Station {self.id} failed: {e}"
                 )
 
-                self.post_connect_success = True
-
-        except NotImplementedError as e:
-            OcppLog.log_e(
-                f"Configuration of the Charging Station {self.id} failed: {e}"
-            )
+        await boot.run(self.id, self.ha_boot_priority, bootstrap)
 
         self._booting = False
 
@@ -264,63 +325,43 @@ class HomeAssistantChargingStationV201(
 
     async def add_new_entities(self):
         await self.add_ha_entities()
+        self.ha_entity_reconciler.reconcile()
 
 
     # Updates the Charge Point Home Assistant Entities and
     # its EVSE Home Assistant Entities
     async def update_ha_entities(self):
+        await self._ha_update_scheduler.async_request_update()
 
-        while self._adding_entities or self._updating_entities:
-            msg = f"Charging Station {self.id} is already "
-            if self._adding_entities:
-                msg += "adding"
-            elif self._updating_entities:
-                msg += "updating"
-            msg += f" its own Home Assistant entities > Waiting {HA_UPDATE_ENTITIES_WAITING_SECS} sec"
-            OcppLog.log_w(msg)
-            await asyncio.sleep(HA_UPDATE_ENTITIES_WAITING_SECS)
-
-
-        self._updating_entities = True
+    async def _async_update_ha_entities(self):
+        # Le entità che dipendono da metriche cambiate sono già aggiornate da "set_metric_value"
+        self.refresh_ha_entities()
+        for evse in self._evses:
+            evse.refresh_ha_entities()
+            for conn in evse.connectors:
+                await conn.update_ha_entities()
 
-        # Update sensors values in HA
+    # Rimuove dall'entity registry le entità della Charging Station (e dei suoi EVSE / connettori) non più configurate
+    # dall'integrazione. Restituisce il numero di entità rimosse.
+    def remove_orphan_ha_entities(self) -> int:
+        removed = 0
         er = entity_registry.async_get(self._hass)
-        dr = device_registry.async_get(self._hass)
-        identifiers = self.get_device_registry_identifier()
-        charging_station_dev = dr.async_get_device(identifiers)
-        for charging_station_ent in entity_registry.async_entries_for_device(er, charging_station_dev.id):
-            if charging_station_ent.unique_id not in self.ha_entity_unique_ids:
+        registry_cache = self.central_system.ha_registry_cache
+        charging_station_entities = registry_cache.get_entities(self.get_device_registry_identifier())
+        for unique_id, entity_id in list(charging_station_entities.items()):
+            if unique_id not in self.ha_entity_unique_ids:
                 # source: https://github.com/home-assistant/core/blob/dev/homeassistant/helpers/entity_registry.py
                 # source: https://dev-docs.home-assistant.io/en/dev/api/helpers.html#module-homeassistant.helpers.entity_registry
                 OcppLog.log_w(f"L'entità Home Assistant "
-                              f"{charging_station_ent.unique_id} associata al Charge Point "
+                              f"{unique_id} associata al Charge Point "
                               f"{self.id} non è trovata, pertanto verrà rimossa")
                 er.async_remove(
-                    entity_id=charging_station_ent.entity_id
-                )
-            else:
-                await entity_component.async_update_entity(
-                    hass=self._hass,
-                    entity_id=charging_station_ent.entity_id
+                    entity_id=entity_id
                 )
+                removed += 1
         for evse in self._evses:
-            identifiers = {(DOMAIN, evse.identifier)}
-            evse_dev = dr.async_get_device(identifiers)
-            for evse_ent in entity_registry.async_entries_for_device(er, evse_dev.id):
-                if evse_ent.unique_id not in evse.ha_entity_unique_ids:
-                    er.async_remove(
-                        entity_id=evse_ent.entity_id
-                    )
-                else:
-                    # OcppLog.log_d(f"Updating entity {evse_ent.entity_id}...")
-                    await entity_component.async_update_entity(
-                        hass=self._hass,
-                        entity_id=evse_ent.entity_id
-                    )
-            for conn in evse.connectors:
-                await conn.update_ha_entities()
-
-        self._updating_entities = False
+            removed += evse.remove_orphan_ha_entities()
+        return removed
 
     # overridden
     async def post_start_transaction_event(self):
@@ -329,8 +370,37 @@ class HomeAssistantChargingStationV201(
     def get_device_registry_identifier(self):
         return {(DOMAIN, self.id)}
 
+    # Aggiunge in Home Assistant solamente le entità del Charge Point (e dei suoi EVSE / Connettori) non ancora
+    # registrate, senza ricaricare le piattaforme dell'intera integrazione
     async def add_ha_entities(self):
-        await self.central_system.add_ha_entities()
+        await self.central_system.add_ha_entities(self)
+
+    # Indica se i sensori del device model vengono creati solo alla ricezione del primo valore
+    @property
+    def ha_lazy_device_model_sensors(self) -> bool:
+        return self._config_entry.data.get(CONF_LAZY_DEVICE_MODEL_SENSORS, DEFAULT_LAZY_DEVICE_MODEL_SENSORS)
+
+    # Indica se vengono creati i sensori delle statistiche sulle finestre scorrevoli dei measurand dei Connettori
+    @property
+    def ha_meter_statistics_sensors(self) -> bool:
+        return self._config_entry.data.get(CONF_METER_STATISTICS_SENSORS, DEFAULT_METER_STATISTICS_SENSORS)
+
+    # Priorità della configurazione della connessione nella pipeline di boot: le Charging Station con transazioni in
+    # corso vengono configurate per prime
+    @property
+    def ha_boot_priority(self) -> int:
+        if any(evse.has_active_transaction for evse in self._evses):
+            return BOOT_PRIORITY_ACTIVE_TRANSACTION
+        return BOOT_PRIORITY_DEFAULT
+
+    # overridden
+    def request_ha_sensors_promotion(self):
+        self._hass.async_create_task(self._ha_promotion_scheduler.async_request_update())
+
+    # I sensori promossi vengono aggiunti in modo incrementale, o al termine del setup delle piattaforme se questo è
+    # ancora in corso: la promozione non richiede mai il ricaricamento completo delle piattaforme
+    async def _async_promote_ha_sensors(self):
+        self.central_system.async_add_or_defer_charge_point_ha_entities(self)
 
     async def call_ha_service(
             self,
@@ -453,6 +523,7 @@ class HomeAssistantChargingStationV201(
         await super().add_evses(number_of_evses)
         OcppLog.log_i(f"Aggiunta degli EVSE come entità lato integrazione HA.")
         await self.add_ha_entities()
+        self.ha_entity_reconciler.reconcile()
 
     # overridden
     async def get_evse_instance(self, evse_id):
@@ -476,6 +547,8 @@ class HomeAssistantChargingStationV201(
             via_device=(DOMAIN, self.id),
             manufacturer=self.vendor
         )
+        # Le metriche persistenti vengono ripristinate prima della creazione delle entità
+        self.central_system.ha_metrics_store.seed(ha_evse)
 
         return ha_evse
 
@@ -534,6 +607,8 @@ class HomeAssistantChargingStationV201(
         self._status = STATE_UNAVAILABLE
         # Set the Charge Point "Availability" metric to False
         self.set_availability_metric_value(False)
+        # Point Of Delivery status notifications, sent to the Charge Advisor Backend all together
+        notifications = []
         # Loop over all the Charging Station EVSEs
         for evse in self.evses:
             # Set the EVSE "AvailabilityState" metric to "Unavailable"
@@ -552,15 +627,16 @@ class HomeAssistantChargingStationV201(
                     ConnectorStatusType.unavailable.value
                 )
                 # Notify Charge Advisor Backend of Point Of Delivery (associated to the Connector) status change
-                await asyncio.create_task(
-                    self.central_system.notify_point_of_delivery_status_to_charge_advisor_backend(
-                        charging_station_id=self.id,
-                        evse_id=evse.id,
-                        connector_id=connector.id,
-                        status=ConnectorStatusType.unavailable.value,
-                        ocpp_version=self.ocpp_protocol_version
-                    )
-                )
+                notifications.append(dict(
+                    evse_id=evse.id,
+                    connector_id=connector.id,
+                    status=ConnectorStatusType.unavailable.value,
+                    ocpp_version=self.ocpp_protocol_version
+                ))
+        await self.central_system.notify_points_of_delivery_status_to_charge_advisor_backend(
+            charging_station_id=self.id,
+            notifications=notifications
+        )
         # Update all the Home Assistant entities associated to the Charging Station
         await self.update_ha_entities()
         # Call the spuer-class stop() function
@@ -569,6 +645,7 @@ class HomeAssistantChargingStationV201(
     # overridden
     async def close_connection(self):
         await super().close_connection()
+        self.ha_state_flusher.async_flush()
         await self.update_ha_entities()
 
     # overridden
@@ -581,15 +658,66 @@ class HomeAssistantChargingStationV201(
     def get_default_energy_unit():
         return HA_ENERGY_UNIT
 
+    # overridden
+    async def _handle_call(self, msg):
+        # Aggiornamento del 17/10/2026
+        # La validazione dello schema della chiamata ricevuta dipende dall'azione OCPP (vedi ha_validation.py)
+        self.central_system.ha_validation_policy.apply(self.route_map, msg.action)
+        self.ha_latency_tracker.set_action(msg.action)
+        return await super()._handle_call(msg)
+
+    # overridden
+    async def _send(self, message):
+        # Aggiornamento del 17/10/2026
+        # Validazione delle risposte alle chiamate decodificate e validate nell'executor (vedi ha_decoder.py)
+        if self.ha_pending_validated_responses:
+            HomeAssistantMessageDecoder.validate_response(
+                self.ha_pending_validated_responses,
+                message,
+                self._ocpp_version
+            )
+        await super()._send(message)
+
+    # overridden
+    async def route_message(self, raw_msg):
+        # Aggiornamento del 17/10/2026
+        # La latenza dall'arrivo del messaggio all'invio della risposta ed alla scrittura delle entità viene misurata a
+        # campione (vedi ha_latency.py)
+        self.ha_latency_tracker.begin(self.ha_state_flusher)
+        try:
+            # Aggiornamento del 17/10/2026
+            # I messaggi più grandi della soglia vengono decodificati e validati nell'executor (vedi ha_decoder.py)
+            decoder = self.central_system.ha_message_decoder
+            if not decoder.should_offload(raw_msg):
+                return await super().route_message(raw_msg)
+            base_handle_call = super()._handle_call
+
+            async def handle_call(msg):
+                self.ha_latency_tracker.set_action(msg.action)
+                return await base_handle_call(msg)
+
+            await decoder.async_route_message(self, raw_msg, handle_call)
+        finally:
+            self.ha_latency_tracker.end(self.ha_state_flusher)
+
     # overridden
     async def reconnect(self, connection):
+        # Le riconnessioni troppo frequenti vengono rifiutate (vedi ha_admission.py)
+        await self.central_system.async_check_ha_admission(self.id, connection)
         # Indichiamo lo stato Home Assistant di nuovo disponibile
         self._status = STATE_OK
         await super().reconnect(connection)
+        # Le entità della Charging Station e dei suoi EVSE / connettori vengono rivalutate
+        self.dispatch_ha_data_updated()
+        for evse in self._evses:
+            evse.dispatch_ha_data_updated()
+            for conn in evse.connectors:
+                conn.dispatch_ha_data_updated()
 
     @on(Action.NotifyReport)
     def on_notify_report(self, request_id, generated_at, tbc, seq_no, report_data, **kwargs):
         res = super().on_notify_report(request_id, generated_at, tbc, seq_no, report_data, **kwargs)
+        self.ha_device_model_generation += 1
         if not tbc:
             self._hass.async_create_task(self.add_new_entities())
             self._hass.async_create_task(self.update_ha_entities())
@@ -607,6 +735,6 @@ class HomeAssistantChargingStationV201(
         # --------------------------------------------------------------------------------------------------------------
         await super().read_meter_values(meter_values, evse, transaction_info)
         # --------------------------------------------------------------------------------------------------------------
-        # Then, update all the Home Assistant entities.
+        # Then, the Home Assistant entities of the changed metrics (value, unit or attributes) are written by the
+        # flusher in a single batch.
         # --------------------------------------------------------------------------------------------------------------
-        await self._hass.async_create_task(self.update_ha_entities())
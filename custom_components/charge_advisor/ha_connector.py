@@ -15,7 +15,7 @@ import asyncio
 # Home Assistant packages
 # ----------------------------------------------------------------------------------------------------------------------
 
-from homeassistant.helpers import device_registry, entity_component, entity_registry
+from homeassistant.helpers import entity_registry
 from homeassistant.const import UnitOfTime
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -28,8 +28,10 @@ from ocpp_central_system.connector import Connector
 # Local files
 # ----------------------------------------------------------------------------------------------------------------------
 
-from .const import DOMAIN, HA_UPDATE_ENTITIES_WAITING_SECS
+from .const import DOMAIN, METER_SAMPLES_MEASURANDS, METER_SAMPLES_SIZE, METER_STATISTICS_SENSORS
+from .ha_meter_samples import HomeAssistantMeterSamples
 from .ha_metric import HomeAssistantEntityMetrics
+from .ha_scheduler import HomeAssistantUpdateScheduler
 
 
 class HomeAssistantConnector(
@@ -47,18 +49,28 @@ class HomeAssistantConnector(
 
         self._hass = hass
 
-        # Flag per tenere conto se il Connettore sta aggiungendo le proprie entità
-        self._adding_entities = False
+        # Le scritture delle entità sono accorpate con quelle del Charge Point
+        self.ha_state_flusher = charge_point.ha_state_flusher
 
-        # Flag per tenere conto se il Connettore sta aggiornando le proprie entità
-        self._updating_entities = False
+        # Campioni recenti dei measurand (e statistiche derivate, se i relativi sensori sono abilitati)
+        self.ha_meter_samples = HomeAssistantMeterSamples(
+            METER_SAMPLES_MEASURANDS,
+            METER_SAMPLES_SIZE,
+            METER_STATISTICS_SENSORS if charge_point.ha_meter_statistics_sensors else None
+        )
 
-        # Lista di entità Home Assistant registrate in fase di setup
-        self.ha_entity_unique_ids: list[str] = []
+        # Insieme degli unique_id delle entità Home Assistant registrate in fase di setup
+        self.ha_entity_unique_ids: set[str] = set()
 
         Connector.__init__(self, charge_point, connector_id)
         HomeAssistantEntityMetrics.__init__(self)
 
+        # Scheduler che serializza ed accorpa gli aggiornamenti delle entità del Connettore
+        self._ha_update_scheduler = HomeAssistantUpdateScheduler(
+            f"Connector {self.identifier}",
+            self._async_update_ha_entities
+        )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Overridden Methods
     # ------------------------------------------------------------------------------------------------------------------
@@ -103,31 +115,34 @@ class HomeAssistantConnector(
 
     # Updates the Charge Point Home Assistant Entities and its Connectors Home Assistant Entities
     async def update_ha_entities(self):
+        await self._ha_update_scheduler.async_request_update()
 
-        while self._adding_entities or self._updating_entities:
-            msg = f"Connector {self.identifier} is already "
-            if self._adding_entities:
-                msg += "adding"
-            elif self._updating_entities:
-                msg += "updating"
-            msg += f" its own Home Assistant entities > Waiting {HA_UPDATE_ENTITIES_WAITING_SECS} sec"
-            OcppLog.log_w(msg)
-            await asyncio.sleep(HA_UPDATE_ENTITIES_WAITING_SECS)
-
-        self._updating_entities = True
-
-        # Update sensors values in HA
+    # overridden
+    @property
+    def ha_device_identifier(self) -> str:
+        return self.identifier
+
+    # Indica se sul connettore è in corso una transazione (vedi ha_boot_priority del Charge Point)
+    @property
+    def has_active_transaction(self) -> bool:
+        return bool(self.active_transaction_id)
+
+    async def _async_update_ha_entities(self):
+        # Le entità che dipendono da metriche cambiate sono già aggiornate da "set_metric_value"
+        self.refresh_ha_entities()
+
+    # Rimuove dall'entity registry le entità del connettore non più configurate dall'integrazione.
+    # Restituisce il numero di entità rimosse.
+    def remove_orphan_ha_entities(self) -> int:
+        removed = 0
         er = entity_registry.async_get(self._hass)
-        dr = device_registry.async_get(self._hass)
         identifiers = {(DOMAIN, self.identifier)}
-        conn_dev = dr.async_get_device(identifiers)
-        for conn_ent in entity_registry.async_entries_for_device(er, conn_dev.id):
-            if conn_ent.unique_id not in self.ha_entity_unique_ids:
+        conn_entities = self.charge_point.central_system.ha_registry_cache.get_entities(identifiers)
+        for unique_id, entity_id in list(conn_entities.items()):
+            if unique_id not in self.ha_entity_unique_ids:
                 # source: https://github.com/home-assistant/core/blob/dev/homeassistant/helpers/entity_registry.py
                 # source: https://dev-docs.home-assistant.io/en/dev/api/helpers.html#module-homeassistant.helpers.entity_registry
-                # OcppLog.log_d(f"La entità {conn_ent.unique_id} è registrata in Home Assistant ma non è stata configurata dalla integrazione: verrà eliminata.")
-                er.async_remove(conn_ent.entity_id)
-            else:
-                await entity_component.async_update_entity(self._hass, conn_ent.entity_id)
-
-        self._updating_entities = False
+                # OcppLog.log_d(f"La entità {unique_id} è registrata in Home Assistant ma non è stata configurata dalla integrazione: verrà eliminata.")
+                er.async_remove(entity_id)
+                removed += 1
+        return removed
@@ -0,0 +1,165 @@
+"""
+La classe HomeAssistantMessageDecoder sposta fuori dall'event loop di Home Assistant la decodifica JSON e la validazione
+dello schema dei messaggi OCPP ricevuti più grandi di una soglia (es. NotifyReport con l'intero device model di una
+Charging Station). La decodifica e la validazione vengono eseguite nell'executor (thread pool) di Home Assistant ed il
+messaggio già decodificato viene restituito all'event loop, dove viene gestito dagli handler della libreria ocpp. I
+messaggi più piccoli della soglia seguono il percorso normale, perché il passaggio all'executor costerebbe più della
+decodifica stessa.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+import time
+from collections.abc import Awaitable, Callable
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from homeassistant.core import HomeAssistant
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from ocpp.exceptions import OCPPError
+from ocpp.messages import MessageType, unpack, validate_payload
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .logger import OcppLog
+from .ha_validation import ROUTE_SKIP_SCHEMA_VALIDATION, HomeAssistantValidationPolicy
+
+
+class HomeAssistantMessageDecoder:
+    """Opt-in executor stage for the decoding and validation of large inbound OCPP frames."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        enabled: bool,
+        threshold: int
+    ):
+        self._hass = hass
+        self._enabled = enabled
+        self._threshold = threshold
+        # Contatori
+        self._inline = 0
+        self._offloaded = 0
+        self._offloaded_bytes = 0
+        self._errors = 0
+        # Tempo (in secondi) speso nell'executor per la decodifica e per la validazione
+        self._decode_time = 0.0
+        self._validate_time = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    # Indica se il messaggio deve essere decodificato nell'executor
+    def should_offload(self, raw_msg) -> bool:
+        if self._enabled and len(raw_msg) >= self._threshold:
+            return True
+        self._inline += 1
+        return False
+
+    def get_report(self) -> dict:
+        return {
+            "enabled": self._enabled,
+            "threshold": self._threshold,
+            "inline": self._inline,
+            "offloaded": self._offloaded,
+            "offloaded_bytes": self._offloaded_bytes,
+            "errors": self._errors,
+            "decode_time_ms": self._decode_time * 1000,
+            "validate_time_ms": self._validate_time * 1000,
+        }
+
+    # Equivalente di ChargePoint.route_message della libreria ocpp, con la decodifica e la validazione nell'executor.
+    # "handle_call" è il metodo _handle_call della libreria (la validazione è già stata eseguita).
+    async def async_route_message(self, charge_point, raw_msg, handle_call: Callable[..., Awaitable]):
+        self._offloaded += 1
+        self._offloaded_bytes += len(raw_msg)
+        try:
+            msg, elapsed = await self._hass.async_add_executor_job(self._decode, raw_msg)
+        except OCPPError as e:
+            self._errors += 1
+            OcppLog.log_e(f"Messaggio OCPP non valido ricevuto dal Charge Point {charge_point.id}: {e}")
+            return
+        self._decode_time += elapsed
+
+        if msg.message_type_id == MessageType.Call:
+            policy = charge_point.central_system.ha_validation_policy
+            try:
+                validate = policy.should_validate_call(charge_point.route_map, msg.action)
+                if validate:
+                    self._validate_time += await self._hass.async_add_executor_job(
+                        self._validate,
+                        msg,
+                        charge_point._ocpp_version
+                    )
+                await self._async_handle_validated_call(charge_point, msg, handle_call, validate)
+            except OCPPError as error:
+                self._errors += 1
+                OcppLog.log_e(f"Errore nella gestione della richiesta {msg.action} del Charge Point {charge_point.id}: "
+                              f"{error}")
+                response = msg.create_call_error(error).to_json()
+                await charge_point._send(response)
+
+        elif msg.message_type_id in (MessageType.CallResult, MessageType.CallError):
+            charge_point._response_queue.put_nowait(msg)
+
+    # La libreria ocpp usa lo stesso flag della route map per la validazione della chiamata e della risposta: la
+    # chiamata è già stata validata nell'executor, quindi il flag viene impostato per la sola durata di "handle_call" (e
+    # poi ripristinato) e, se la chiamata andava validata, la risposta (CALLRESULT) viene validata dal "_send" del
+    # Charge Point (vedi "validate_response"), che riconosce le risposte da validare dal loro unique_id
+    async def _async_handle_validated_call(self, charge_point, msg, handle_call, validate: bool):
+        handlers = charge_point.route_map.get(msg.action)
+        skip_validation = handlers.get(ROUTE_SKIP_SCHEMA_VALIDATION) if handlers is not None else None
+        HomeAssistantValidationPolicy.skip(charge_point.route_map, msg.action)
+        if validate:
+            charge_point.ha_pending_validated_responses[msg.unique_id] = msg.action
+        try:
+            await handle_call(msg)
+        finally:
+            charge_point.ha_pending_validated_responses.pop(msg.unique_id, None)
+            if handlers is not None:
+                if skip_validation is None:
+                    handlers.pop(ROUTE_SKIP_SCHEMA_VALIDATION, None)
+                else:
+                    handlers[ROUTE_SKIP_SCHEMA_VALIDATION] = skip_validation
+
+    # Viene chiamata dal "_send" del Charge Point solo se ci sono risposte in attesa di validazione ("pending":
+    # unique_id della chiamata -> azione): valida il messaggio in uscita se è la risposta (CALLRESULT) di una di queste chiamate
+    @staticmethod
+    def validate_response(pending: dict[str, str], message: str, ocpp_version: str):
+        response = unpack(message)
+        if response.message_type_id != MessageType.CallResult:
+            return
+        action = pending.get(response.unique_id)
+        if action is not None:
+            response.action = action
+            validate_payload(response, ocpp_version)
+
+    # Eseguito nell'executor
+    @staticmethod
+    def _decode(raw_msg):
+        start = time.perf_counter()
+        msg = unpack(raw_msg)
+        return msg, time.perf_counter() - start
+
+    # Eseguito nell'executor
+    @staticmethod
+    def _validate(msg, ocpp_version) -> float:
+        start = time.perf_counter()
+        validate_payload(msg, ocpp_version)
+        return time.perf_counter() - start
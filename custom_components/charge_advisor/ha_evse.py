@@ -22,7 +22,7 @@ from ocpp.exceptions import NotImplementedError
 
 from homeassistant.components.persistent_notification import DOMAIN as PN_DOMAIN
 from homeassistant.const import STATE_OK, STATE_UNAVAILABLE, UnitOfTime
-from homeassistant.helpers import device_registry, entity_component, entity_registry
+from homeassistant.helpers import device_registry, entity_registry
 from homeassistant.helpers.typing import UNDEFINED
 import homeassistant.helpers.config_validation as cv
 
@@ -42,6 +42,7 @@ from .enums import *
 from .logger import OcppLog
 from .ha_metric import HomeAssistantEntityMetrics
 from .ha_connector_v201 import HomeAssistantConnectorV201
+from .ha_scheduler import HomeAssistantUpdateScheduler
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Home Assistant Voluptuous SCHEMAS
@@ -108,19 +109,22 @@ class HomeAssistantEVSEV201(
         # Stato (di Home Assistant) del Charge Point
         self._status = STATE_OK
 
-        # Flag per tenere conto se il Charge Point sta aggiungendo le proprie entità
-        self._adding_entities = False
+        # Le scritture delle entità sono accorpate con quelle della Charging Station
+        self.ha_state_flusher = charge_point.ha_state_flusher
 
-        # Flag per tenere conto se il Charge Point sta aggiornando le proprie entità
-        self._updating_entities = False
-
-        # Lista di entità Home Assistant registrate in fase di setup
-        self.ha_entity_unique_ids: list[str] = []
+        # Insieme degli unique_id delle entità Home Assistant registrate in fase di setup
+        self.ha_entity_unique_ids: set[str] = set()
 
         # Istanziare la superclasse e le metriche.
         EVSEV201.__init__(self, charge_point, id)
         HomeAssistantEntityMetrics.__init__(self)
 
+        # Scheduler che serializza ed accorpa gli aggiornamenti delle entità dell'EVSE
+        self._ha_update_scheduler = HomeAssistantUpdateScheduler(
+            f"EVSE {self.identifier}",
+            self._async_update_ha_entities
+        )
+
         # Impostiamo le metriche
         self.set_metric_value(HAEVSESensors.identifier.value, id)
 
@@ -132,51 +136,63 @@ class HomeAssistantEVSEV201(
     # Updates the Charge Point Home Assistant Entities and
     # its Connectors Home Assistant Entities
     async def update_ha_entities(self):
+        await self._ha_update_scheduler.async_request_update()
 
-        while self._adding_entities or self._updating_entities:
-            msg = f"EVSE {self.identifier} is already "
-            if self._adding_entities:
-                msg += "adding"
-            elif self._updating_entities:
-                msg += "updating"
-            msg += f" its own Home Assistant entities > Waiting {HA_UPDATE_ENTITIES_WAITING_SECS} sec"
-            OcppLog.log_w(msg)
-            await asyncio.sleep(HA_UPDATE_ENTITIES_WAITING_SECS)
+    # overridden
+    @property
+    def ha_device_identifier(self) -> str:
+        return self.identifier
+
+    # Indica se sull'EVSE è in corso una transazione (vedi ha_boot_priority della Charging Station)
+    @property
+    def has_active_transaction(self) -> bool:
+        return bool(self._active_transaction_id)
 
-        self._updating_entities = True
+    async def _async_update_ha_entities(self):
 
         OcppLog.log_d(f"L'EVSE {self.identifier} ha INIZIATO l'aggiornamento le entità Home Assistant")
 
-        # Update sensors values in HA
+        # Le entità che dipendono da metriche cambiate sono già aggiornate da "set_metric_value"
+        self.refresh_ha_entities()
+
+        OcppLog.log_d(f"L'EVSE {self.identifier} ha TERMINATO l'aggiornamento le entità Home Assistant")
+
+        for conn in self._connectors:
+            #OcppLog.log_w(f"Tipo di connettore associato all'EVSE: {type(conn)}.")
+            await conn.update_ha_entities()
+
+    # Rimuove dall'entity registry le entità dell'EVSE (e dei suoi connettori) non più configurate dall'integrazione.
+    # Restituisce il numero di entità rimosse.
+    def remove_orphan_ha_entities(self) -> int:
+        removed = 0
         er = entity_registry.async_get(self._hass)
-        dr = device_registry.async_get(self._hass)
         identifiers = {(DOMAIN, self.identifier)}
         #OcppLog.log_d(f"Identificatori EVSE: {identifiers}.")
-        evse_dev = dr.async_get_device(identifiers)
+        evse_entities = self.charge_point.central_system.ha_registry_cache.get_entities(identifiers)
         #OcppLog.log_w(f"Entità registrate nell'EVSE: {self.ha_entity_unique_ids}.")
-        for evse_ent in entity_registry.async_entries_for_device(er, evse_dev.id):
-            OcppLog.log_d(f"Entità EVSE in esame: {evse_ent}")
-            if evse_ent.unique_id not in self.ha_entity_unique_ids:
+        for unique_id, entity_id in list(evse_entities.items()):
+            if unique_id not in self.ha_entity_unique_ids:
                 # source: https://github.com/home-assistant/core/blob/dev/homeassistant/helpers/entity_registry.py
                 # source: https://dev-docs.home-assistant.io/en/dev/api/helpers.html#module-homeassistant.helpers.entity_registry
-                # OcppLog.log_d(f"La entità {cp_ent.unique_id} è registrata in Home Assistant ma non è stata configurata dalla integrazione: verrà eliminata.")
-                er.async_remove(evse_ent.entity_id)
+                # OcppLog.log_d(f"La entità {unique_id} è registrata in Home Assistant ma non è stata configurata dalla integrazione: verrà eliminata.")
+                er.async_remove(entity_id)
+                removed += 1
                 #OcppLog.log_w(f"Entità associata all'EVSE non trovata, rimozione...")
-            else:
-                await entity_component.async_update_entity(self._hass, evse_ent.entity_id)
-
-        self._updating_entities = False
-
-        OcppLog.log_d(f"L'EVSE {self.identifier} ha TERMINATO l'aggiornamento le entità Home Assistant")
-
         for conn in self._connectors:
-            #OcppLog.log_w(f"Tipo di connettore associato all'EVSE: {type(conn)}.")
-            await conn.update_ha_entities()
+            removed += conn.remove_orphan_ha_entities()
+        return removed
 
     # ------------------------------------------------------------------------------------------------------------------
     # Event Loop Tasks
     # ------------------------------------------------------------------------------------------------------------------
 
+    async def add_ha_entities(self):
+        await self.charge_point.add_ha_entities()
+
+    # overridden
+    def request_ha_sensors_promotion(self):
+        self.charge_point.request_ha_sensors_promotion()
+
     # overridden
     async def add_connectors(self, number_of_connectors):
         await super().add_connectors(number_of_connectors)
@@ -184,12 +200,15 @@ class HomeAssistantEVSEV201(
 
     # overridden
     async def get_connector_instance(self, connector_id):
-        return HomeAssistantConnectorV201(
+        ha_connector = HomeAssistantConnectorV201(
             hass=self._hass,
             config_entry=self._config_entry,
             evse=self,
             connector_id=connector_id
         )
+        # Le metriche persistenti vengono ripristinate prima della creazione delle entità
+        self.charge_point.central_system.ha_metrics_store.seed(ha_connector)
+        return ha_connector
 
     # overridden
     async def add_connector(self, connector_id = None):
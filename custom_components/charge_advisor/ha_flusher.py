@@ -0,0 +1,252 @@
+"""
+La classe HomeAssistantStateFlusher raccoglie, all'interno di una finestra temporale configurabile, le metriche cambiate
+di un Charge Point / Charging Station (e dei suoi EVSE / Connettori) e ne scrive le entità Home Assistant in un unico
+lotto, in modo che una raffica di messaggi (es. MeterValues trifase ogni secondo) non produca una scrittura per ogni
+singolo valore ricevuto.
+
+Le metriche in attesa formano una coda limitata: la ricezione dei messaggi OCPP si limita ad accodare le metriche
+cambiate e non attende mai la scrittura delle entità. Se la coda è piena, le nuove metriche vengono scartate ed il flush
+successivo riscrive tutte le entità del Charge Point, così che nessun valore vada perso.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+from collections.abc import Callable
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .logger import OcppLog
+
+
+class HomeAssistantStateFlusher:
+    """Micro-batches the Home Assistant state writes of the dirty metrics of a charger."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        window: float,
+        max_depth: int
+    ):
+        self._hass = hass
+
+        # Nome del dispositivo (usato nei log)
+        self._name = name
+
+        # Durata (in secondi) della finestra di raccolta: 0 equivale a scrivere subito
+        self._window = window
+
+        # Metriche cambiate dall'ultimo flush: id del livello -> (livello, chiavi delle metriche)
+        self._pending: dict[int, tuple[object, set[str]]] = {}
+
+        # Numero massimo di metriche in attesa e numero di metriche attualmente in attesa
+        self._max_depth = max_depth
+        self._depth = 0
+
+        # Livelli (Charge Point, EVSE, Connettori) le cui metriche sono passate dal flusher: id -> livello
+        self._metrics: dict[int, object] = {}
+
+        # Flag che indica che sono state scartate delle metriche e il prossimo flush deve riscrivere tutte le entità
+        self._overflow = False
+
+        # Funzione che annulla il flush programmato (None se non c'è nessun flush programmato)
+        self._unsub_flush = None
+
+        # Callback da eseguire al termine del prossimo flush (es. misura della latenza, vedi ha_latency.py)
+        self._after_flush: list[Callable[[], None]] = []
+
+        # Contatori: cambiamenti di metrica raccolti, flush eseguiti, scritture di entità e dimensione dell'ultimo lotto
+        self._marks = 0
+        self._flushes = 0
+        self._writes = 0
+        self._last_batch_size = 0
+        self._merged = 0
+        self._dropped = 0
+        self._peak_depth = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def window(self) -> float:
+        return self._window
+
+    @property
+    def marks(self) -> int:
+        return self._marks
+
+    @property
+    def flushes(self) -> int:
+        return self._flushes
+
+    @property
+    def writes(self) -> int:
+        return self._writes
+
+    @property
+    def last_batch_size(self) -> int:
+        return self._last_batch_size
+
+    @property
+    def depth(self) -> int:
+        """Number of metrics waiting to be written to Home Assistant."""
+        return self._depth
+
+    @property
+    def max_depth(self) -> int:
+        return self._max_depth
+
+    @property
+    def peak_depth(self) -> int:
+        return self._peak_depth
+
+    @property
+    def merged(self) -> int:
+        """Number of metric changes merged into a metric already waiting in the queue."""
+        return self._merged
+
+    @property
+    def dropped(self) -> int:
+        """Number of metric changes discarded because the queue was full."""
+        return self._dropped
+
+    @property
+    def has_pending(self) -> bool:
+        """Whether some metric changes are waiting for the next flush."""
+        return bool(self._pending) or self._overflow
+
+    @property
+    def batching_ratio(self) -> float:
+        """Average number of metric changes written to Home Assistant by a single flush."""
+        return self._marks / self._flushes if self._flushes else 0.0
+
+    def get_report(self) -> dict:
+        return {
+            "window": self._window,
+            "marks": self._marks,
+            "flushes": self._flushes,
+            "writes": self._writes,
+            "last_batch_size": self._last_batch_size,
+            "batching_ratio": self.batching_ratio,
+            "depth": self._depth,
+            "max_depth": self._max_depth,
+            "peak_depth": self._peak_depth,
+            "merged": self._merged,
+            "dropped": self._dropped,
+        }
+
+    # Aggiornamento del 17/10/2026
+    # Viene chiamata quando il valore, l'unità di misura o gli attributi di una metrica cambiano: la chiave viene
+    # accodata ed il primo cambiamento della finestra programma il flush. I cambiamenti successivi, fino allo scadere
+    # della finestra, vengono scritti nello stesso lotto.
+    # Aggiornamento del 17/10/2026
+    # Una metrica già in coda viene accorpata (merge). A coda piena la metrica viene scartata (drop): il flush successivo
+    # riscrive tutte le entità dei livelli noti, quindi anche quelle della metrica scartata.
+    @callback
+    def mark_dirty(self, metrics, key: str):
+        self._marks += 1
+        self._metrics[id(metrics)] = metrics
+        pending = self._pending.get(id(metrics))
+        if pending is not None and key in pending[1]:
+            self._merged += 1
+        elif self._depth >= self._max_depth:
+            self._dropped += 1
+            self._overflow = True
+        else:
+            if pending is None:
+                pending = self._pending[id(metrics)] = (metrics, set())
+            pending[1].add(key)
+            self._depth += 1
+            self._peak_depth = max(self._peak_depth, self._depth)
+        if self._window <= 0:
+            self.async_flush()
+        elif self._unsub_flush is None:
+            self._unsub_flush = async_call_later(self._hass, self._window, self._async_handle_window_expired)
+
+    # Esegue la callback al termine del prossimo flush
+    @callback
+    def call_after_flush(self, after_flush: Callable[[], None]):
+        self._after_flush.append(after_flush)
+
+    @callback
+    def _async_handle_window_expired(self, _now):
+        self._unsub_flush = None
+        self.async_flush()
+
+    # Scrive in Home Assistant, una sola volta ciascuna, le entità che dipendono dalle metriche cambiate
+    @callback
+    def async_flush(self):
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if not self.has_pending:
+            self._async_run_after_flush()
+            return
+        pending, self._pending = self._pending, {}
+        overflow, self._overflow = self._overflow, False
+        self._depth = 0
+        entities = {}
+        if overflow:
+            for metrics in self._metrics.values():
+                for entity in metrics.get_ha_entities():
+                    entities[id(entity)] = entity
+        else:
+            for metrics, keys in pending.values():
+                for key in keys:
+                    for entity in metrics.get_metric_entities(key):
+                        entities[id(entity)] = entity
+        for entity in entities.values():
+            entity.async_write_ha_state_if_changed()
+        self._flushes += 1
+        self._writes += len(entities)
+        self._last_batch_size = sum(len(keys) for _, keys in pending.values())
+        OcppLog.log_d(
+            f"{self._name}: flush di {self._last_batch_size} metriche su {len(entities)} entità "
+            f"(rapporto medio di accorpamento {self.batching_ratio:.1f})"
+        )
+        if overflow:
+            OcppLog.log_w(
+                f"{self._name}: coda degli aggiornamenti piena ({self._max_depth} metriche), "
+                f"{self._dropped} metriche scartate in totale: sono state riscritte tutte le entità"
+            )
+        self._async_run_after_flush()
+
+    @callback
+    def _async_run_after_flush(self):
+        if not self._after_flush:
+            return
+        after_flush, self._after_flush = self._after_flush, []
+        for callback_function in after_flush:
+            callback_function()
+
+    # Annulla il flush programmato scartando le metriche in attesa
+    @callback
+    def async_cancel(self):
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        self._pending.clear()
+        self._depth = 0
+        self._overflow = False
+        self._after_flush.clear()
@@ -0,0 +1,174 @@
+"""
+Le classi HomeAssistantLatencyHistogram e HomeAssistantLatencyTracker misurano, a campione, la latenza end-to-end delle
+chiamate OCPP ricevute da un Charge Point / Charging Station:
+- "response": dall'arrivo del messaggio all'invio della risposta (CALLRESULT / CALLERROR);
+- "state": dall'arrivo del messaggio alla scrittura nella state machine di Home Assistant delle entità che il messaggio
+  ha modificato (vedi ha_flusher.py).
+
+I tempi vengono accumulati in istogrammi a bucket fissi (vedi LATENCY_BUCKETS in const.py), uno per azione OCPP ed uno
+complessivo: memoria costante e registrazione di un campione in tempo O(log bucket). I percentili p50, p95 e p99 sono
+stimati con il limite superiore del bucket che li contiene e pubblicati periodicamente come metriche del livello (e, per
+l'intera flotta, del Central System).
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+import math
+import time
+from bisect import bisect_left
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .const import LATENCY_BUCKETS, LATENCY_SENSORS
+
+# Percorsi misurati
+LATENCY_PATH_RESPONSE = "response"
+LATENCY_PATH_STATE = "state"
+
+# Azione fittizia dell'istogramma complessivo (tutte le azioni)
+LATENCY_ALL_ACTIONS = "*"
+
+
+class HomeAssistantLatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("_counts", "_count")
+
+    def __init__(self):
+        # Un contatore per bucket, più il bucket dei campioni oltre l'ultimo limite
+        self._counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def record(self, seconds: float):
+        self._counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self._count += 1
+
+    # Limite superiore (in secondi) del bucket che contiene il percentile (per i campioni oltre l'ultimo bucket,
+    # l'ultimo limite)
+    def get_percentile(self, percentile: float) -> float | None:
+        if self._count == 0:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * self._count))
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= rank:
+                return LATENCY_BUCKETS[min(index, len(LATENCY_BUCKETS) - 1)]
+        return LATENCY_BUCKETS[-1]
+
+    def get_report(self) -> dict:
+        return {
+            "samples": self._count,
+            "p50": self.get_percentile(50),
+            "p95": self.get_percentile(95),
+            "p99": self.get_percentile(99),
+            "buckets": {
+                (f"le_{bound}" if index < len(LATENCY_BUCKETS) else f"gt_{LATENCY_BUCKETS[-1]}"): count
+                for index, (bound, count) in enumerate(zip(list(LATENCY_BUCKETS) + [None], self._counts))
+                if count
+            },
+        }
+
+
+class HomeAssistantLatencyTracker:
+    """Sampled per-action latency histograms of the inbound OCPP calls of a tier."""
+
+    def __init__(
+        self,
+        metrics,
+        sample_rate: int,
+        publish_interval: float,
+        fleet: HomeAssistantLatencyTracker | None = None
+    ):
+        # Livello (Charge Point, Charging Station o Central System) su cui vengono pubblicati i percentili
+        self._metrics = metrics
+        self._sample_rate = max(1, sample_rate)
+        self._publish_interval = publish_interval
+        # Tracker della flotta (Central System) in cui vengono registrati anche i campioni di questo livello
+        self._fleet = fleet
+        # (percorso, azione) -> istogramma
+        self._histograms: dict[tuple[str, str], HomeAssistantLatencyHistogram] = {}
+        # Messaggi ricevuti e campione in corso: [istante di arrivo, flush eseguiti all'arrivo, azione]
+        self._messages = 0
+        self._current: list | None = None
+        self._last_publish = 0.0
+
+    # Viene chiamata all'arrivo di un messaggio: solo un messaggio ogni "sample_rate" viene misurato
+    def begin(self, flusher):
+        self._messages += 1
+        if self._messages % self._sample_rate:
+            self._current = None
+            return
+        self._current = [time.perf_counter(), flusher.flushes if flusher is not None else 0, None]
+
+    # Azione OCPP del messaggio in corso (solo le chiamate ricevute vengono misurate)
+    def set_action(self, action: str):
+        if self._current is not None:
+            self._current[2] = action
+
+    # Viene chiamata al termine della gestione del messaggio (risposta già inviata)
+    def end(self, flusher):
+        current, self._current = self._current, None
+        if current is None or current[2] is None:
+            return
+        start, flushes, action = current
+        self.record(LATENCY_PATH_RESPONSE, action, time.perf_counter() - start)
+        if flusher is None:
+            return
+        if flusher.has_pending:
+            # Le entità modificate dal messaggio vengono scritte al prossimo flush
+            flusher.call_after_flush(
+                lambda: self.record(LATENCY_PATH_STATE, action, time.perf_counter() - start)
+            )
+        elif flusher.flushes != flushes:
+            # Le entità sono già state scritte durante la gestione del messaggio (finestra di flush nulla)
+            self.record(LATENCY_PATH_STATE, action, time.perf_counter() - start)
+
+    def record(self, path: str, action: str, seconds: float):
+        for key in ((path, action), (path, LATENCY_ALL_ACTIONS)):
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = HomeAssistantLatencyHistogram()
+            histogram.record(seconds)
+        if self._fleet is not None:
+            self._fleet.record(path, action, seconds)
+        now = time.monotonic()
+        if now - self._last_publish >= self._publish_interval:
+            self._last_publish = now
+            self.publish()
+
+    # Pubblica i percentili complessivi come metriche del livello (vedi LATENCY_SENSORS in const.py)
+    def publish(self):
+        for metric_key, (path, percentile) in LATENCY_SENSORS.items():
+            histogram = self._histograms.get((path, LATENCY_ALL_ACTIONS))
+            if histogram is not None:
+                self._metrics.set_metric_value(metric_key, histogram.get_percentile(percentile))
+
+    def get_report(self) -> dict:
+        report = {}
+        if self._fleet is not None:
+            report.update(messages=self._messages, sample_rate=self._sample_rate)
+        for (path, action), histogram in sorted(self._histograms.items()):
+            report.setdefault(path, {})[action] = histogram.get_report()
+        return report
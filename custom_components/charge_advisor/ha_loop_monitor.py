@@ -0,0 +1,99 @@
+"""
+La classe HomeAssistantLoopLagMonitor misura il ritardo (lag) dell'event loop di Home Assistant: un task in background
+attende periodicamente un intervallo noto e registra di quanto il risveglio è in ritardo rispetto all'atteso. Un lag
+elevato indica che qualcosa (es. la decodifica di messaggi OCPP molto grandi) blocca l'event loop.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+import asyncio
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from homeassistant.core import HomeAssistant
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .logger import OcppLog
+
+
+class HomeAssistantLoopLagMonitor:
+    """Periodic sampler of the Home Assistant event loop lag."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        interval: float,
+        warning_threshold: float
+    ):
+        self._hass = hass
+        self._interval = interval
+        self._warning_threshold = warning_threshold
+        self._task: asyncio.Task | None = None
+        # Contatori: campioni, lag totale, lag massimo, campioni oltre la soglia di avviso
+        self._samples = 0
+        self._total_lag = 0.0
+        self._max_lag = 0.0
+        self._last_lag = 0.0
+        self._slow_samples = 0
+
+    def async_start(self):
+        if self._task is None:
+            self._task = self._hass.async_create_background_task(
+                self._async_run(),
+                "charge_advisor loop lag monitor"
+            )
+
+    async def async_stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # Azzera le statistiche (es. per confrontare il lag prima e dopo aver cambiato una configurazione)
+    def reset(self):
+        self._samples = 0
+        self._total_lag = 0.0
+        self._max_lag = 0.0
+        self._last_lag = 0.0
+        self._slow_samples = 0
+
+    def get_report(self) -> dict:
+        return {
+            "interval": self._interval,
+            "samples": self._samples,
+            "mean_lag_ms": self._total_lag / self._samples * 1000 if self._samples else 0.0,
+            "max_lag_ms": self._max_lag * 1000,
+            "last_lag_ms": self._last_lag * 1000,
+            "slow_samples": self._slow_samples,
+        }
+
+    async def _async_run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self._interval)
+            lag = max(0.0, loop.time() - start - self._interval)
+            self._samples += 1
+            self._total_lag += lag
+            self._last_lag = lag
+            if lag > self._max_lag:
+                self._max_lag = lag
+            if lag >= self._warning_threshold:
+                self._slow_samples += 1
+                OcppLog.log_d(f"Event loop in ritardo di {lag * 1000:.0f} ms")
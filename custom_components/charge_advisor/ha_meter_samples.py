@@ -0,0 +1,162 @@
+"""
+La classe HomeAssistantMeterSamples mantiene, per ogni measurand di un Connettore, una finestra scorrevole dei campioni
+più recenti in un buffer circolare di dimensione fissa (array numpy preallocati di istanti e valori). Le statistiche
+sulla finestra (media, minimo, massimo, percentili) sono calcolate in forma vettoriale, senza interrogare il recorder
+di Home Assistant. L'occupazione di memoria è costante: 2 x 8 byte per campione, per measurand, per Connettore.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+import time
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class HomeAssistantMeterSamples:
+    """Fixed-size ring buffers of the recent samples of the measurands of a connector."""
+
+    def __init__(
+        self,
+        measurands: list[str],
+        size: int,
+        statistics: dict[str, tuple[str, str, int]] | None = None
+    ):
+        # Measurand -> riga dei buffer
+        self._rows = {measurand: row for row, measurand in enumerate(measurands)}
+        self._size = size
+        # Istanti (time.monotonic) e valori dei campioni: NaN indica una posizione non ancora scritta
+        self._times = np.full((len(self._rows), size), np.nan)
+        self._values = np.full((len(self._rows), size), np.nan)
+        # Numero di campioni scritti per measurand (la posizione del prossimo campione è count % size)
+        self._counts = [0] * len(self._rows)
+        # Measurand -> metriche derivate: [(chiave, statistica, finestra in secondi)]
+        self._derived: dict[str, list[tuple[str, str, int]]] = {}
+        for metric_key, (measurand, statistic, window) in (statistics or {}).items():
+            if measurand in self._rows:
+                self._derived.setdefault(measurand, []).append((metric_key, statistic, window))
+        # Measurand con metriche derivate che hanno ricevuto nuovi campioni dall'ultimo calcolo
+        self._stale: set[str] = set()
+
+    @property
+    def measurands(self) -> list[str]:
+        return list(self._rows)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._times.nbytes + self._values.nbytes
+
+    def get_sample_count(self, measurand: str) -> int:
+        row = self._rows.get(measurand)
+        return min(self._counts[row], self._size) if row is not None else 0
+
+    # Aggiunge un campione (solo per i measurand seguiti e per valori numerici): restituisce True se il campione è stato
+    # memorizzato
+    def append(self, measurand: str, value, timestamp: float | None = None) -> bool:
+        row = self._rows.get(measurand)
+        if row is None or isinstance(value, bool):
+            return False
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return False
+        index = self._counts[row] % self._size
+        self._times[row, index] = time.monotonic() if timestamp is None else timestamp
+        self._values[row, index] = value
+        self._counts[row] += 1
+        if measurand in self._derived:
+            self._stale.add(measurand)
+        return True
+
+    # True se ci sono metriche derivate da ricalcolare (vedi "pop_stale_derived_values")
+    @property
+    def has_stale_derived(self) -> bool:
+        return bool(self._stale)
+
+    # Valori dei campioni degli ultimi "window" secondi (in ordine di buffer, non cronologico)
+    def get_window(self, measurand: str, window: float, now: float | None = None) -> np.ndarray:
+        row = self._rows.get(measurand)
+        if row is None:
+            return np.empty(0)
+        now = time.monotonic() if now is None else now
+        # Le posizioni non ancora scritte (NaN) non soddisfano il confronto
+        with np.errstate(invalid="ignore"):
+            mask = self._times[row] >= now - window
+        return self._values[row][mask]
+
+    def get_statistic(self, measurand: str, statistic: str, window: float, now: float | None = None) -> float | None:
+        values = self.get_window(measurand, window, now)
+        return self._compute(values, statistic)
+
+    def get_statistics(self, measurand: str, window: float, now: float | None = None) -> dict | None:
+        values = self.get_window(measurand, window, now)
+        if values.size == 0:
+            return None
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "samples": int(values.size),
+            "mean": float(values.mean()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+        }
+
+    # Valori aggiornati delle metriche derivate dal measurand (vedi METER_STATISTICS_SENSORS in const.py)
+    def get_derived_values(self, measurand: str, now: float | None = None) -> list[tuple[str, float | None]]:
+        derived = self._derived.get(measurand)
+        if not derived:
+            return []
+        now = time.monotonic() if now is None else now
+        return [
+            (metric_key, self.get_statistic(measurand, statistic, window, now))
+            for metric_key, statistic, window in derived
+        ]
+
+    # Valori aggiornati delle sole metriche derivate dai measurand che hanno ricevuto nuovi campioni dall'ultima
+    # chiamata: le statistiche vengono calcolate una volta per intervallo, non ad ogni campione
+    def pop_stale_derived_values(self, now: float | None = None) -> list[tuple[str, float | None]]:
+        now = time.monotonic() if now is None else now
+        values = []
+        for measurand in self._stale:
+            values.extend(self.get_derived_values(measurand, now))
+        self._stale.clear()
+        return values
+
+    @staticmethod
+    def _compute(values: np.ndarray, statistic: str) -> float | None:
+        if values.size == 0:
+            return None
+        match statistic:
+            case "mean":
+                return float(values.mean())
+            case "min":
+                return float(values.min())
+            case "max":
+                return float(values.max())
+            case "p50" | "p95" | "p99":
+                return float(np.percentile(values, int(statistic[1:])))
+        raise ValueError(f"Unknown meter statistic {statistic}")
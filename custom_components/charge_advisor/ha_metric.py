@@ -7,10 +7,21 @@ che sottendono a definire lo stato delle entità di Home Assistant (Switch, Sens
 # Python packages
 # ----------------------------------------------------------------------------------------------------------------------
 
+from __future__ import annotations
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+
 # ----------------------------------------------------------------------------------------------------------------------
 # Home Assistant packages
 # ----------------------------------------------------------------------------------------------------------------------
 
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+
 # ----------------------------------------------------------------------------------------------------------------------
 # External packages
 # ----------------------------------------------------------------------------------------------------------------------
@@ -25,26 +36,525 @@ from ocpp_central_system.metric import *
 # Local files
 # ----------------------------------------------------------------------------------------------------------------------
 from .logger import OcppLog
-from .const import UNITS_OCCP_TO_HA
+from .const import DATA_UPDATED_DEVICE, METER_STATISTICS_UPDATE_INTERVAL
+from .ha_units import resolve_unit_conversion
+
+
+# Attributi aggiuntivi restituiti in lettura per le metriche che non ne hanno (condivisi e di sola lettura)
+EMPTY_EXTRA_ATTR = MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class MetricPublishRule:
+    """Rules deciding whether a new value of a metric is written to Home Assistant."""
+
+    deadband: float | None = None
+    deadband_relative: float | None = None
+    min_interval: float | None = None
+    heartbeat: float | None = None
 
 
 class HomeAssistantEntityMetrics(EntityMetrics):
 
+    # Indici delle entità (dizionari ordinati per inserimento, usati come insiemi): valgono None finché non viene
+    # eseguito __init__
+    _metric_entities: dict[str, dict] | None = None
+    _ha_entities: dict | None = None
+    _ha_entity_metric_keys: dict | None = None
+
+    # Regole di pubblicazione delle metriche: valgono None finché non viene eseguito __init__
+    _metric_publish_rules: dict[str, MetricPublishRule] | None = None
+
+    # Flusher che accorpa le scritture delle entità del Charge Point a cui appartiene il livello (None: scrittura
+    # immediata, es. Central System)
+    ha_state_flusher = None
+
+    # Catalogo delle metriche del device model OCPP 2.0.1 non ancora rappresentate da un sensore (modalità "lazy"):
+    # vale None finché la piattaforma sensor non lo popola
+    ha_lazy_metric_keys: set[str] | None = None
+
+    # Snapshot delle metriche persistenti (vedi ha_store.py): vale None finché il livello non viene inizializzato dallo
+    # snapshot. Le chiavi delle metriche persistenti valgono None finché non viene eseguito __init__
+    ha_metrics_store = None
+    _ha_persistent_metric_keys: set[str] | None = None
+
+    # Finestre scorrevoli dei campioni recenti dei measurand (vedi ha_meter_samples.py): solo per i Connettori.
+    # Funzione che annulla il ricalcolo programmato delle statistiche derivate (None: nessun ricalcolo programmato)
+    ha_meter_samples = None
+    _ha_meter_statistics_update = None
+
     def __init__(self):
         # Home Assistant metrics needed to evaluate the entities (switches, buttons, etc.) states
-        self._metrics = defaultdict(lambda: HomeAssistantMetric(None, None))
+        # Aggiornamento del 17/10/2026
+        # Le metriche vengono create solo in scrittura (vedi HomeAssistantMetricTable): le letture di chiavi mancanti
+        # (es. "native_value", "is_on", "current_power_w") non allocano nulla
+        self._metrics = HomeAssistantMetricTable(self)
+        # Indice inverso: per ogni chiave di metrica, le entità Home Assistant che la rappresentano
+        self._metric_entities = {}
+        # Tutte le entità Home Assistant associate a questo livello e, per ognuna, le chiavi sotto cui è indicizzata
+        self._ha_entities = {}
+        self._ha_entity_metric_keys = {}
+        # Disponibilità del livello all'ultimo aggiornamento delle entità
+        self._ha_entities_available = None
+        # Regole di pubblicazione e, per ogni metrica soggetta ad una regola, ultimo valore pubblicato ed istante
+        self._metric_publish_rules = {}
+        self._metric_published = {}
+        # Pubblicazioni posticipate programmate per le variazioni soppresse: chiave -> funzione che le annulla
+        self._metric_trailing_publish = {}
+        # Metriche il cui ultimo valore viene salvato nello snapshot (sensori DIAGNOSTIC)
+        self._ha_persistent_metric_keys = set()
+
+    # overridden
+    # Le entità che dipendono dalla metrica vengono aggiornate dalla metrica stessa quando il suo valore cambia (vedi
+    # "on_ha_metric_changed"); qui vengono gestiti i sensori "lazy"
+    def set_metric_value(self, key, value, *args, **kwargs):
+        super().set_metric_value(key, value, *args, **kwargs)
+        if value is not None and self.ha_lazy_metric_keys and key in self.ha_lazy_metric_keys:
+            # Primo valore di una metrica del catalogo: il sensore che la rappresenta viene creato
+            self.ha_lazy_metric_keys.discard(key)
+            self.request_ha_sensors_promotion()
+
+    # Aggiornamento del 17/10/2026
+    # Viene chiamata dalla metrica (vedi HomeAssistantMetric) quando cambiano il suo valore, la sua unità di misura o i
+    # suoi attributi aggiuntivi, sia tramite "set_metric_value" sia con le scritture dirette del pacchetto
+    # ocpp_central_system (es. "self._metrics[key].value = value"). Vengono aggiornate le sole entità che dipendono
+    # dalla metrica: in presenza di un flusher allo scadere della sua finestra, insieme a quelle delle altre metriche
+    # cambiate. Le variazioni del valore sono soggette alle regole di pubblicazione.
+    def on_ha_metric_changed(self, key, value_changed: bool = True):
+        if value_changed and self.ha_meter_samples is not None:
+            self.record_ha_meter_sample(key)
+        if (
+            value_changed
+            and self.ha_metrics_store is not None
+            and self._ha_persistent_metric_keys
+            and key in self._ha_persistent_metric_keys
+        ):
+            self.ha_metrics_store.async_schedule_save()
+        if value_changed and not self.is_metric_publishable(key, self.get_metric_ha_value(key)):
+            return
+        self.mark_ha_metric_dirty(key)
+
+    # Richiede l'aggiornamento delle entità che dipendono dalla metrica "key"
+    def mark_ha_metric_dirty(self, key):
+        if self.ha_state_flusher is not None:
+            self.ha_state_flusher.mark_dirty(self, key)
+        else:
+            self.refresh_metric_entities(key)
+
+    # Aggiornamento del 17/10/2026
+    # Viene chiamata dalle funzioni "append_entity_unique_id" delle piattaforme (sensor.py, switch.py, number.py,
+    # button.py) per indicizzare l'entità sotto le chiavi delle metriche da cui dipende il suo stato.
+    # Registrazione e rimozione costano O(chiavi dell'entità), indipendentemente dal numero di entità del livello.
+    def add_ha_entity(self, entity, metric_keys=()):
+        self._ha_entities[entity] = None
+        entity_keys = self._ha_entity_metric_keys.setdefault(entity, set())
+        for key in metric_keys:
+            if key is None:
+                continue
+            self._metric_entities.setdefault(key, {})[entity] = None
+            entity_keys.add(key)
+
+    def remove_ha_entity(self, entity):
+        self._ha_entities.pop(entity, None)
+        for key in self._ha_entity_metric_keys.pop(entity, ()):
+            entities = self._metric_entities.get(key)
+            if entities is None:
+                continue
+            entities.pop(entity, None)
+            if len(entities) == 0:
+                self._metric_entities.pop(key)
+
+    # Aggiornamento del 17/10/2026
+    # Viene chiamata dai sensori (vedi "append_entity_unique_id" in sensor.py) per le metriche che hanno una regola di
+    # pubblicazione (deadband, intervallo minimo, heartbeat)
+    def set_metric_publish_rule(self, key, rule: MetricPublishRule | None):
+        if rule is None:
+            return
+        self._metric_publish_rules[key] = rule
+
+    # Indica se il nuovo valore della metrica deve essere scritto in Home Assistant. Le variazioni soppresse non
+    # aggiornano l'ultimo valore pubblicato, quindi piccole variazioni successive si sommano fino a superare la deadband.
+    # Aggiornamento del 17/10/2026
+    # Per una variazione soppressa viene programmata una pubblicazione posticipata (allo scadere dell'intervallo minimo
+    # o, per la deadband, dell'heartbeat) che scrive l'ultimo valore della metrica: un valore soppresso non resta mai
+    # indefinitamente non pubblicato. Una pubblicazione normale annulla quella posticipata.
+    def is_metric_publishable(self, key, value) -> bool:
+        if not self._metric_publish_rules:
+            return True
+        rule = self._metric_publish_rules.get(key)
+        if rule is None:
+            return True
+        now = time.monotonic()
+        published = self._metric_published.get(key)
+        if published is not None:
+            published_value, published_at = published
+            elapsed = now - published_at
+            if rule.heartbeat is None or elapsed < rule.heartbeat:
+                if rule.min_interval is not None and elapsed < rule.min_interval:
+                    self.schedule_metric_trailing_publish(key, rule.min_interval - elapsed)
+                    return False
+                if (
+                    isinstance(value, (int, float))
+                    and isinstance(published_value, (int, float))
+                    and not isinstance(value, bool)
+                ):
+                    delta = abs(value - published_value)
+                    relative_deadband = (
+                        abs(published_value) * rule.deadband_relative if rule.deadband_relative is not None else None
+                    )
+                    if (
+                        (rule.deadband is not None and delta < rule.deadband)
+                        or (relative_deadband is not None and delta < relative_deadband)
+                    ):
+                        if rule.heartbeat is not None:
+                            self.schedule_metric_trailing_publish(key, rule.heartbeat - elapsed)
+                        return False
+        self._metric_published[key] = (value, now)
+        self.cancel_metric_trailing_publish(key)
+        return True
+
+    # Valore (normalizzato) della metrica da mostrare in Home Assistant: per le metriche soggette ad una regola di
+    # pubblicazione, l'ultimo valore pubblicato (le variazioni soppresse non trapelano con le altre scritture)
+    def get_metric_published_ha_value(self, key):
+        if self._metric_publish_rules and key in self._metric_publish_rules:
+            published = self._metric_published.get(key)
+            if published is not None:
+                return published[0]
+        return self.get_metric_ha_value(key)
+
+    # Programma (se non già programmata) la pubblicazione posticipata dell'ultimo valore della metrica
+    def schedule_metric_trailing_publish(self, key, delay: float):
+        if key in self._metric_trailing_publish:
+            return
+
+        @callback
+        def publish(_now):
+            self._metric_trailing_publish.pop(key, None)
+            self._metric_published[key] = (self.get_metric_ha_value(key), time.monotonic())
+            self.mark_ha_metric_dirty(key)
+
+        self._metric_trailing_publish[key] = async_call_later(self._hass, max(0.0, delay), publish)
+
+    def cancel_metric_trailing_publish(self, key):
+        unsub = self._metric_trailing_publish.pop(key, None)
+        if unsub is not None:
+            unsub()
+
+    # Aggiornamento del 17/10/2026
+    # Viene chiamata dai sensori DIAGNOSTIC (vedi "append_entity_unique_id" in sensor.py): l'ultimo valore della metrica
+    # viene salvato nello snapshot e ripristinato al riavvio
+    def add_ha_persistent_metric_key(self, key):
+        if key is not None:
+            self._ha_persistent_metric_keys.add(key)
+
+    # Valori correnti delle metriche persistenti (solo quelli serializzabili nello snapshot)
+    def get_ha_metrics_snapshot(self) -> dict:
+        snapshot = {}
+        for key in self._ha_persistent_metric_keys or ():
+            value = self.get_metric_value(key)
+            if isinstance(value, (str, int, float, bool, datetime)):
+                snapshot[key] = value
+        return snapshot
+
+    # Aggiornamento del 17/10/2026
+    # Aggiunge l'ultimo valore della metrica ai campioni del measurand (se seguito). Viene chiamata dalla metrica ad
+    # ogni scrittura del valore, anche se invariato (vedi HomeAssistantMetric). Il valore è già normalizzato nella
+    # unità di misura Home Assistant (es. W -> kW): le finestre dei campioni lavorano sugli stessi valori mostrati dalle
+    # entità.
+    def record_ha_meter_sample(self, key):
+        ha_value = self.get_metric_ha_value(key)
+        if ha_value is None or not self.ha_meter_samples.append(key, ha_value):
+            return
+        if self.ha_meter_samples.has_stale_derived:
+            self.schedule_ha_meter_statistics_update()
+
+    # Programma (se non già programmato) il ricalcolo delle statistiche derivate dai measurand che hanno ricevuto nuovi
+    # campioni: al più una volta ogni METER_STATISTICS_UPDATE_INTERVAL secondi, qualunque sia la frequenza dei campioni
+    def schedule_ha_meter_statistics_update(self):
+        if self._ha_meter_statistics_update is not None:
+            return
+
+        @callback
+        def update(_now):
+            self._ha_meter_statistics_update = None
+            for derived_key, derived_value in self.ha_meter_samples.pop_stale_derived_values():
+                self.set_metric_value(derived_key, derived_value)
+
+        self._ha_meter_statistics_update = async_call_later(self._hass, METER_STATISTICS_UPDATE_INTERVAL, update)
+
+    # Richiede la creazione dei sensori delle metriche del catalogo che hanno ricevuto un valore (vedi OCPP 2.0.1)
+    def request_ha_sensors_promotion(self):
+        pass
+
+    def get_ha_entities(self):
+        return self._ha_entities.keys() if self._ha_entities is not None else ()
+
+    def get_metric_entities(self, key):
+        return self._metric_entities.get(key, {}).keys() if self._metric_entities else ()
+
+    # Aggiorna le entità che dipendono dalla metrica "key" (solo se il loro stato è cambiato)
+    def refresh_metric_entities(self, key):
+        for entity in list(self.get_metric_entities(key)):
+            entity.async_write_ha_state_if_changed()
+
+    # Aggiorna le entità del livello. Le entità che dipendono da una metrica sono già aggiornate da
+    # "set_metric_value": qui vengono aggiornate tutte solo se è cambiata la disponibilità del livello.
+    def refresh_ha_entities(self):
+        available = self.is_available()
+        if available == self._ha_entities_available:
+            return
+        self._ha_entities_available = available
+        for entity in list(self._ha_entities):
+            entity.async_write_ha_state_if_changed()
+
+    # Identificatore del dispositivo Home Assistant associato al livello
+    @property
+    def ha_device_identifier(self) -> str:
+        return self.id
+
+    # Segnale del dispatcher a cui sono sottoscritte le sole entità del livello
+    @property
+    def ha_data_updated_signal(self) -> str:
+        return DATA_UPDATED_DEVICE.format(self.ha_device_identifier)
+
+    # Notifica le sole entità del livello (e non quelle dell'intera integrazione)
+    def dispatch_ha_data_updated(self):
+        async_dispatcher_send(self._hass, self.ha_data_updated_signal)
 
     # Questa funzione restituisce il valore di una metrica in base alla chiave
     # se la metrica non è trovata, restiuisce None
     def get_metric_ha_unit(self, key):
-        metric = self.get_metric(key)
+        metric = self._metrics.get(key)
         return metric.ha_unit if metric is not None else None
 
+    # overridden
+    # Le letture non creano la metrica se questa non esiste
+    def get_metric_value(self, key):
+        metric = self._metrics.get(key)
+        return metric.value if metric is not None else None
+
+    # Valore della metrica nella unità di misura Home Assistant (vedi "get_metric_ha_unit")
+    def get_metric_ha_value(self, key):
+        metric = self._metrics.get(key)
+        return metric.ha_value if metric is not None else None
+
+    # Valore della metrica nell'unità base (es. W anziché kW), con il fattore di scala risolto alla scrittura
+    def get_metric_base_value(self, key):
+        metric = self._metrics.get(key)
+        return metric.base_value if metric is not None else None
 
-class HomeAssistantMetric(Metric):
+    # overridden
+    def get_metric_unit(self, key):
+        metric = self._metrics.get(key)
+        return metric.unit if metric is not None else None
+
+    # overridden
+    def get_metric_extra_attr(self, key):
+        metric = self._metrics.get(key)
+        if metric is None or not metric.has_extra_attr:
+            return EMPTY_EXTRA_ATTR
+        return metric.extra_attr
+
+    # Aggiornamento del 17/10/2026
+    # Rimuove le metriche vuote (senza valore, unità di misura ed attributi), create ad esempio dalle letture del
+    # pacchetto ocpp_central_system: le letture successive restituiscono comunque None
+    def compact_ha_metrics(self) -> int:
+        empty_keys = [key for key, metric in self._metrics.items() if metric.is_empty]
+        for key in empty_keys:
+            del self._metrics[key]
+        return len(empty_keys)
+
+    # Occupazione di memoria (approssimata, in byte) delle metriche del livello
+    def get_ha_metrics_memory_usage(self) -> dict:
+        metrics_bytes = sys.getsizeof(self._metrics)
+        empty_metrics = 0
+        for metric in self._metrics.values():
+            metrics_bytes += metric.get_size()
+            if metric.is_empty:
+                empty_metrics += 1
+        usage = {
+            "metrics": len(self._metrics),
+            "empty_metrics": empty_metrics,
+            "metrics_bytes": metrics_bytes,
+        }
+        if self.ha_meter_samples is not None:
+            usage["meter_samples_bytes"] = self.ha_meter_samples.nbytes
+        return usage
+
+
+class HomeAssistantMetricTable(dict):
+    """Metrics of a tier, created on write access only."""
+
+    def __init__(self, owner=None):
+        super().__init__()
+        # Livello a cui appartengono le metriche, notificato ad ogni loro cambiamento
+        self._owner = owner
+
+    # Le scritture del pacchetto ocpp_central_system (es. "self._metrics[key].value = value") creano la metrica; la
+    # chiave viene internata, così che tutti i livelli condividano la stessa stringa
+    def __missing__(self, key):
+        key = sys.intern(key) if type(key) is str else key
+        metric = HomeAssistantMetric(None, None, key, self._owner)
+        self[key] = metric
+        return metric
+
+
+class HomeAssistantMetricAttributes(dict):
+    """Extra attributes of a metric that notify the metric when they are changed in place."""
+
+    # Il pacchetto ocpp_central_system modifica gli attributi sul posto (es. "metric.extra_attr[name] = value"): ogni
+    # modifica effettiva viene notificata al livello proprietario della metrica, come un cambio di unità di misura
+    __slots__ = ("_metric",)
+
+    def __init__(self, metric, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metric = metric
+
+    def _notify(self):
+        self._metric.notify_changed(value_changed=False)
+
+    def __setitem__(self, key, value):
+        if key in self and self[key] == value:
+            return
+        super().__setitem__(key, value)
+        self._notify()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._notify()
+
+    def update(self, *args, **kwargs):
+        previous = dict(self)
+        super().update(*args, **kwargs)
+        if previous != self:
+            self._notify()
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key, *args):
+        missing = key not in self
+        value = super().pop(key, *args)
+        if not missing:
+            self._notify()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._notify()
+        return item
+
+    def clear(self):
+        if len(self) == 0:
+            return
+        super().clear()
+        self._notify()
+
+
+class HomeAssistantMetric:
     """Metric class."""
 
+    # Aggiornamento del 17/10/2026
+    # Record compatto (stessa interfaccia di Metric): niente __dict__ per istanza e dizionario degli attributi
+    # aggiuntivi creato solo al primo accesso.
+    # Il valore e l'unità di misura restano quelli scritti dal pacchetto ocpp_central_system; il valore normalizzato
+    # (es. W -> kW, Wh -> kWh) e la unità di misura Home Assistant sono calcolati una sola volta, alla scrittura.
+    # Ogni cambiamento di valore, unità di misura o attributi viene notificato al livello proprietario (vedi
+    # HomeAssistantEntityMetrics.on_ha_metric_changed), qualunque sia il percorso della scrittura.
+    __slots__ = ("_key", "_value", "_unit", "_extra_attr", "_conversion", "_ha_value", "_owner")
+
+    def __init__(self, value, unit, key=None, owner=None):
+        self._key = key
+        self._owner = owner
+        self._value = value
+        self._unit = unit
+        self._extra_attr = None
+        self._conversion = resolve_unit_conversion(key, unit)
+        self._ha_value = self._conversion.convert(value)
+
+    @property
+    def value(self):
+        """Get the value of the metric."""
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        """Set the value of the metric."""
+        changed = value != self._value
+        self._value = value
+        self._ha_value = self._conversion.convert(value)
+        if self._owner is None:
+            return
+        if changed:
+            self._owner.on_ha_metric_changed(self._key)
+        elif self._owner.ha_meter_samples is not None:
+            # Un campione invariato è comunque un campione della finestra del measurand
+            self._owner.record_ha_meter_sample(self._key)
+
+    @property
+    def unit(self):
+        """Get the unit of the metric."""
+        return self._unit
+
+    @unit.setter
+    def unit(self, unit: str):
+        """Set the unit of the metric."""
+        if unit == self._unit:
+            return
+        self._unit = unit
+        self._conversion = resolve_unit_conversion(self._key, unit)
+        self._ha_value = self._conversion.convert(self._value)
+        if self._owner is not None:
+            self._owner.on_ha_metric_changed(self._key, value_changed=False)
+
+    @property
+    def ha_value(self):
+        """Get the value of the metric in the home assistant unit."""
+        return self._ha_value
+
     @property
     def ha_unit(self):
         """Get the home assistant unit of the metric."""
-        return UNITS_OCCP_TO_HA.get(self._unit, None)
\ No newline at end of file
+        return self._conversion.ha_unit
+
+    @property
+    def base_value(self):
+        """Get the value of the metric in the base unit (e.g. W, Wh)."""
+        return self._conversion.convert_to_base(self._value)
+
+    @property
+    def extra_attr(self):
+        """Get the extra attributes of the metric."""
+        if self._extra_attr is None:
+            self._extra_attr = HomeAssistantMetricAttributes(self)
+        return self._extra_attr
+
+    @extra_attr.setter
+    def extra_attr(self, extra_attr: dict):
+        """Set the extra attributes of the metric."""
+        changed = (extra_attr or None) != (self._extra_attr or None)
+        self._extra_attr = HomeAssistantMetricAttributes(self, extra_attr) if extra_attr is not None else None
+        if changed:
+            self.notify_changed(value_changed=False)
+
+    # Notifica il livello proprietario del cambiamento della metrica (vedi on_ha_metric_changed)
+    def notify_changed(self, value_changed: bool = True):
+        if self._owner is not None:
+            self._owner.on_ha_metric_changed(self._key, value_changed)
+
+    @property
+    def has_extra_attr(self) -> bool:
+        return bool(self._extra_attr)
+
+    @property
+    def is_empty(self) -> bool:
+        return self._value is None and self._unit is None and not self._extra_attr
+
+    def get_size(self) -> int:
+        size = sys.getsizeof(self)
+        if self._extra_attr is not None:
+            size += sys.getsizeof(self._extra_attr)
+        return size
\ No newline at end of file
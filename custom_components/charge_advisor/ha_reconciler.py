@@ -0,0 +1,91 @@
+"""
+La classe HomeAssistantEntityReconciler si occupa di rimuovere dall'entity registry di Home Assistant le entità di un
+Charge Point / Charging Station (e dei suoi EVSE / Connettori) non più configurate dall'integrazione, tenendo traccia
+del numero di esecuzioni, delle entità rimosse e del tempo impiegato.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+import time
+from collections.abc import Callable
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .logger import OcppLog
+
+
+class HomeAssistantEntityReconciler:
+    """One-shot orphan entity reconciliation of a Charge Point / Charging Station, with timing counters."""
+
+    def __init__(
+        self,
+        name: str,
+        remove_function: Callable[[], int]
+    ):
+        # Nome del dispositivo (usato nei log)
+        self._name = name
+
+        # Funzione che rimuove le entità orfane e restituisce il numero di entità rimosse
+        self._remove_function = remove_function
+
+        # Contatori: riconciliazioni eseguite, entità rimosse, durata dell'ultima riconciliazione e durata totale
+        self._runs = 0
+        self._removed = 0
+        self._last_duration = 0.0
+        self._total_duration = 0.0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def runs(self) -> int:
+        return self._runs
+
+    @property
+    def removed(self) -> int:
+        return self._removed
+
+    @property
+    def last_duration(self) -> float:
+        """Duration in seconds of the last reconciliation."""
+        return self._last_duration
+
+    @property
+    def total_duration(self) -> float:
+        """Cumulative duration in seconds of all the reconciliations."""
+        return self._total_duration
+
+    # Aggiornamento del 17/10/2026
+    # La riconciliazione viene eseguita una sola volta al termine delle fasi che cambiano l'insieme delle entità
+    # configurate (post_connect, add_evses / add_connectors, on_notify_report) e NON ad ogni aggiornamento delle
+    # entità, che si limita a riportare su Home Assistant lo stato corrente delle metriche.
+    def reconcile(self) -> int:
+        start = time.monotonic()
+        removed = self._remove_function()
+        self._last_duration = time.monotonic() - start
+        self._total_duration += self._last_duration
+        self._runs += 1
+        self._removed += removed
+        OcppLog.log_d(
+            f"{self._name}: riconciliazione delle entità Home Assistant completata in "
+            f"{self._last_duration * 1000:.1f} ms ({removed} entità orfane rimosse)"
+        )
+        return removed
@@ -0,0 +1,150 @@
+"""
+La classe HomeAssistantRegistryCache mantiene in memoria, per ogni dispositivo dell'integrazione (Charge Point /
+Charging Station, EVSE, Connector), l'id del dispositivo nel device registry e la mappa unique_id -> entity_id delle sue
+entità nell'entity registry, evitando di interrogare i registri ad ogni aggiornamento delle entità.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry, entity_registry
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class HomeAssistantRegistryCache:
+    """Cache of the device and entity registry lookups of the integration devices."""
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        # Identificatori del dispositivo -> id del dispositivo nel device registry
+        self._device_ids: dict[frozenset, str] = {}
+        # Id del dispositivo -> mappa unique_id -> entity_id delle entità del dispositivo
+        self._device_entities: dict[str, dict[str, str]] = {}
+        # entity_id -> id del dispositivo (per invalidare la cache alla rimozione di una entità)
+        self._entity_devices: dict[str, str] = {}
+        # Contatori: interrogazioni servite dalla cache ed interrogazioni dei registri
+        self._hits = 0
+        self._misses = 0
+        self._unsub_listeners = []
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def get_report(self) -> dict:
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "devices": len(self._device_ids),
+            "device_entities": len(self._device_entities),
+        }
+
+    @callback
+    def async_start(self):
+        self._unsub_listeners = [
+            self._hass.bus.async_listen(
+                device_registry.EVENT_DEVICE_REGISTRY_UPDATED,
+                self._async_handle_device_registry_updated
+            ),
+            self._hass.bus.async_listen(
+                entity_registry.EVENT_ENTITY_REGISTRY_UPDATED,
+                self._async_handle_entity_registry_updated
+            ),
+        ]
+
+    @callback
+    def async_stop(self):
+        for unsub in self._unsub_listeners:
+            unsub()
+        self._unsub_listeners = []
+        self.invalidate()
+
+    def invalidate(self):
+        self._device_ids.clear()
+        self._device_entities.clear()
+        self._entity_devices.clear()
+
+    def invalidate_device(self, device_id: str):
+        entities = self._device_entities.pop(device_id, None)
+        if entities is not None:
+            for entity_id in entities.values():
+                self._entity_devices.pop(entity_id, None)
+
+    # Restituisce l'id del dispositivo nel device registry (None se il dispositivo non è registrato)
+    def get_device_id(self, identifiers: set) -> str | None:
+        key = frozenset(identifiers)
+        device_id = self._device_ids.get(key)
+        if device_id is not None:
+            self._hits += 1
+            return device_id
+        self._misses += 1
+        device = device_registry.async_get(self._hass).async_get_device(identifiers)
+        if device is None:
+            return None
+        self._device_ids[key] = device.id
+        return device.id
+
+    # Restituisce la mappa unique_id -> entity_id delle entità registrate per il dispositivo
+    def get_entities(self, identifiers: set) -> dict[str, str]:
+        device_id = self.get_device_id(identifiers)
+        if device_id is None:
+            return {}
+        entities = self._device_entities.get(device_id)
+        if entities is not None:
+            self._hits += 1
+            return entities
+        self._misses += 1
+        er = entity_registry.async_get(self._hass)
+        entities = {
+            entry.unique_id: entry.entity_id
+            for entry in entity_registry.async_entries_for_device(er, device_id)
+        }
+        self._device_entities[device_id] = entities
+        for entity_id in entities.values():
+            self._entity_devices[entity_id] = device_id
+        return entities
+
+    @callback
+    def _async_handle_device_registry_updated(self, event: Event):
+        # Alla rimozione e all'aggiornamento (gli identificatori del dispositivo possono essere cambiati, es. aggiunta
+        # del numero di serie) vengono rimossi sia l'id del dispositivo sia le sue entità
+        device_id = event.data.get("device_id")
+        for key in [key for key, value in self._device_ids.items() if value == device_id]:
+            self._device_ids.pop(key)
+        self.invalidate_device(device_id)
+
+    @callback
+    def _async_handle_entity_registry_updated(self, event: Event):
+        for entity_id in (event.data.get("entity_id"), event.data.get("old_entity_id")):
+            if entity_id is None:
+                continue
+            device_id = self._entity_devices.get(entity_id)
+            if device_id is not None:
+                self.invalidate_device(device_id)
+        if event.data.get("action") != "remove":
+            entry = entity_registry.async_get(self._hass).async_get(event.data.get("entity_id"))
+            if entry is not None and entry.device_id is not None:
+                self.invalidate_device(entry.device_id)
@@ -0,0 +1,96 @@
+"""
+La classe HomeAssistantUpdateScheduler si occupa di serializzare e accorpare gli aggiornamenti delle entità Home
+Assistant di un singolo livello (Central System, Charge Point / Charging Station, EVSE, Connector).
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+import asyncio
+from collections.abc import Awaitable, Callable
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class HomeAssistantUpdateScheduler:
+    """Coalescing scheduler for the Home Assistant entities updates of a tier."""
+
+    def __init__(
+        self,
+        name: str,
+        update_function: Callable[[], Awaitable[None]]
+    ):
+        # Nome del livello (usato nei log)
+        self._name = name
+
+        # Coroutine function che esegue l'aggiornamento vero e proprio
+        self._update_function = update_function
+
+        # Un solo aggiornamento alla volta per livello
+        self._lock = asyncio.Lock()
+
+        # Flag che indica che il livello ha delle modifiche non ancora riportate su Home Assistant
+        self._dirty = False
+
+        # Contatori: richieste di aggiornamento ricevute ed aggiornamenti effettivamente eseguiti
+        self._requests = 0
+        self._runs = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    @property
+    def requests(self) -> int:
+        return self._requests
+
+    @property
+    def runs(self) -> int:
+        return self._runs
+
+    @property
+    def coalesced(self) -> int:
+        """Number of update requests served by an update run triggered by another request."""
+        return self._requests - self._runs
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    # Aggiornamento del 17/10/2026
+    # Ogni richiesta marca il livello come "sporco" e si mette in coda sul lock. Chi ottiene il lock e trova il livello
+    # ancora sporco esegue l'aggiornamento (che riporta lo stato corrente di TUTTE le metriche); chi lo trova pulito
+    # ritorna subito, perché il suo cambiamento è già stato riportato da un aggiornamento partito dopo la richiesta.
+    # In questo modo N richieste arrivate durante un aggiornamento in corso si traducono in UN solo aggiornamento.
+    async def async_request_update(self):
+        self._dirty = True
+        self._requests += 1
+        async with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._runs += 1
+            await self._update_function()
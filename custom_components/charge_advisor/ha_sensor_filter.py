@@ -0,0 +1,85 @@
+"""
+La classe HomeAssistantSensorFilter decide, in base ai pattern di inclusione ed esclusione configurati nelle opzioni
+dell'integrazione, quali measurand (OCPP 1.6 e 2.0.1) e quali variabili del device model (OCPP 2.0.1) diventano sensori.
+
+Ogni pattern (sintassi fnmatch, es. "Voltage*", "*Ctrlr*") viene confrontato con il nome della metrica (measurand oppure
+chiave component/variable). Un pattern nella forma "<livello>:<pattern>", con livello ChargingStation, EVSE oppure
+Connector, si applica solo alle metriche di quel livello (es. "Connector:Power.*").
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+import re
+from fnmatch import translate
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+# Livelli a cui può essere associata una metrica
+SENSOR_FILTER_TIERS = ["ChargingStation", "EVSE", "Connector"]
+
+
+class HomeAssistantSensorFilter:
+    """Include/exclude matcher for measurand and device model sensors, compiled once."""
+
+    def __init__(
+        self,
+        include: str | None,
+        exclude: str | None
+    ):
+        self._include = HomeAssistantSensorFilter.compile_patterns(include)
+        self._exclude = HomeAssistantSensorFilter.compile_patterns(exclude)
+
+        # Esito già calcolato per ogni coppia (livello, nome della metrica)
+        self._results: dict[tuple[str, str], bool] = {}
+
+    @property
+    def active(self) -> bool:
+        return self._include is not None or self._exclude is not None
+
+    # Trasforma una lista di pattern separati da virgola in un'unica espressione regolare applicata a "<livello>:<nome>"
+    # (None se la lista è vuota)
+    @staticmethod
+    def compile_patterns(patterns: str | None) -> re.Pattern | None:
+        regexes = []
+        for pattern in (patterns or "").split(","):
+            pattern = pattern.strip()
+            if len(pattern) == 0:
+                continue
+            tier, separator, name = pattern.partition(":")
+            if separator and tier in SENSOR_FILTER_TIERS:
+                regexes.append(translate(f"{tier}:{name}"))
+            else:
+                regexes.append(translate(f"*:{pattern}"))
+        if len(regexes) == 0:
+            return None
+        return re.compile("|".join(regexes))
+
+    # Indica se la metrica "name" del livello "tier" deve diventare un sensore
+    def matches(self, tier: str, name: str) -> bool:
+        key = (tier, name)
+        result = self._results.get(key)
+        if result is None:
+            subject = f"{tier}:{name}"
+            result = (
+                (self._include is None or self._include.match(subject) is not None)
+                and (self._exclude is None or self._exclude.match(subject) is None)
+            )
+            self._results[key] = result
+        return result
@@ -0,0 +1,169 @@
+"""
+La classe HomeAssistantMetricsStore mantiene, in un unico file Store di Home Assistant per ogni Central System, l'ultimo
+valore delle metriche persistenti (sensori DIAGNOSTIC) di ogni livello (Central System, Charge Point / Charging Station,
+EVSE, Connector) e l'ultimo valore delle entità Number. Il file viene caricato una sola volta all'avvio e le metriche
+dei livelli vengono inizializzate alla loro creazione, prima che vengano create le entità: in questo modo le entità non
+devono più interrogare singolarmente lo stato salvato da Home Assistant (RestoreSensor / RestoreNumber).
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+from datetime import datetime
+from typing import Any
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .const import DOMAIN, METRICS_STORAGE_SAVE_DELAY, METRICS_STORAGE_VERSION
+from .logger import OcppLog
+
+
+class HomeAssistantMetricsStore:
+    """Single snapshot of the persistent metrics and number values of the integration devices."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        self._store = Store(hass, METRICS_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.metrics")
+        # Identificatore del dispositivo -> {chiave della metrica: valore codificato}
+        self._metrics: dict[str, dict[str, Any]] = {}
+        # unique_id dell'entità Number -> valore
+        self._numbers: dict[str, Any] = {}
+        # Livelli inizializzati dallo snapshot, i cui valori vengono letti ad ogni salvataggio
+        self._tiers: dict[str, Any] = {}
+        # Contatori: livelli inizializzati, metriche inizializzate e salvataggi richiesti
+        self._seeded_tiers = 0
+        self._seeded_metrics = 0
+        self._saves = 0
+        # Flag che indica che un salvataggio ritardato è già programmato
+        self._save_pending = False
+
+    @property
+    def seeded_tiers(self) -> int:
+        return self._seeded_tiers
+
+    @property
+    def seeded_metrics(self) -> int:
+        return self._seeded_metrics
+
+    @property
+    def saves(self) -> int:
+        return self._saves
+
+    async def async_load(self):
+        data = await self._store.async_load()
+        if not isinstance(data, dict):
+            return
+        self._metrics = data.get("metrics", {})
+        self._numbers = data.get("numbers", {})
+
+    # Scrive subito lo snapshot (es. alla rimozione dell'integrazione)
+    async def async_save(self):
+        await self._store.async_save(self._data_to_save())
+
+    # Le richieste successive alla prima, fino al salvataggio, sono già servite dal salvataggio programmato (che legge i
+    # valori correnti dei livelli)
+    @callback
+    def async_schedule_save(self):
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._saves += 1
+        self._store.async_delay_save(self._delayed_data_to_save, METRICS_STORAGE_SAVE_DELAY)
+
+    # Aggiornamento del 17/10/2026
+    # Rimuove dallo snapshot i valori di un dispositivo rimosso (livello, metriche ed entità Number), così che non
+    # vengano conservati e riscritti ad ogni salvataggio
+    @callback
+    def async_remove_device(self, identifiers, number_unique_ids=()):
+        removed = False
+        for identifier in identifiers:
+            removed |= self._tiers.pop(identifier, None) is not None
+            removed |= self._metrics.pop(identifier, None) is not None
+        for unique_id in number_unique_ids:
+            removed |= unique_id in self._numbers
+            self._numbers.pop(unique_id, None)
+        if removed:
+            self.async_schedule_save()
+
+    # Inizializza le metriche del livello con i valori dello snapshot (senza sovrascrivere quelli già ricevuti) e
+    # collega il livello allo store, che da questo momento ne salverà le metriche persistenti
+    def seed(self, tier):
+        identifier = tier.ha_device_identifier
+        self._tiers[identifier] = tier
+        tier.ha_metrics_store = self
+        snapshot = self._metrics.get(identifier)
+        if not snapshot:
+            return
+        self._seeded_tiers += 1
+        for key, value in snapshot.items():
+            if tier.get_metric_value(key) is None:
+                tier.set_metric_value(key, self._decode(value))
+                self._seeded_metrics += 1
+        OcppLog.log_d(f"{identifier}: {len(snapshot)} metriche ripristinate dallo snapshot")
+
+    # Indica se lo snapshot contiene i valori del livello (altrimenti, es. al primo avvio dopo l'aggiornamento, le
+    # entità ricorrono allo stato salvato da Home Assistant)
+    def has_metrics(self, tier) -> bool:
+        return tier.ha_device_identifier in self._metrics
+
+    def has_number_value(self, unique_id: str) -> bool:
+        return unique_id in self._numbers
+
+    def get_number_value(self, unique_id: str):
+        return self._numbers.get(unique_id)
+
+    @callback
+    def set_number_value(self, unique_id: str, value):
+        if unique_id in self._numbers and self._numbers[unique_id] == value:
+            return
+        self._numbers[unique_id] = value
+        self.async_schedule_save()
+
+    def _delayed_data_to_save(self) -> dict:
+        self._save_pending = False
+        return self._data_to_save()
+
+    def _data_to_save(self) -> dict:
+        for identifier, tier in self._tiers.items():
+            snapshot = {
+                key: self._encode(value)
+                for key, value in tier.get_ha_metrics_snapshot().items()
+            }
+            if snapshot:
+                self._metrics[identifier] = snapshot
+        return {
+            "metrics": self._metrics,
+            "numbers": self._numbers,
+        }
+
+    # I valori datetime (es. sensori TIMESTAMP) sono salvati in formato ISO e ricostruiti al caricamento
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, datetime):
+            return {"__type": "datetime", "isoformat": value.isoformat()}
+        return value
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, dict) and value.get("__type") == "datetime":
+            return dt_util.parse_datetime(value["isoformat"])
+        return value
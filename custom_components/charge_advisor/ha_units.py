@@ -0,0 +1,85 @@
+"""
+Conversione delle unità di misura OCPP nelle unità di misura di Home Assistant. Ogni coppia (measurand, unità OCPP)
+viene risolta una sola volta in un fattore di scala e nella unità di misura Home Assistant di destinazione: i valori
+vengono normalizzati quando sono scritti nelle metriche (vedi HomeAssistantMetric) e le entità leggono valori già
+normalizzati, senza dover convertire ad ogni rendering.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from ocpp.v16.enums import Measurand
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .const import UNITS_OCCP_TO_HA, UNITS_OCPP_NORMALIZATION
+
+# Le chiavi delle metriche dei measurand iniziano con il nome del measurand (es. "Power.Active.Import")
+MEASURAND_PREFIXES = tuple(measurand.value for measurand in Measurand)
+
+# Fattore di scala dalle unità normalizzate (es. kW) alle unità base (es. W)
+UNITS_OCPP_BASE_FACTORS = {
+    normalized_unit: 1 / factor
+    for normalized_unit, factor in UNITS_OCPP_NORMALIZATION.values()
+}
+
+
+@dataclass(frozen=True, slots=True)
+class UnitConversion:
+    """Scale factor and target units of a (measurand, OCPP unit) pair."""
+
+    ocpp_unit: str | None
+    ha_unit: str | None
+    factor: float = 1.0
+    # Fattore di scala dal valore OCPP all'unità base (es. kW -> W), risolto insieme alla conversione
+    base_factor: float = 1.0
+
+    def convert(self, value):
+        if self.factor == 1.0 or type(value) not in (int, float):
+            return value
+        return value * self.factor
+
+    def convert_to_base(self, value):
+        if self.base_factor == 1.0 or type(value) not in (int, float):
+            return value
+        return value * self.base_factor
+
+
+@lru_cache(maxsize=1024)
+def resolve_unit_conversion(metric_key: str | None, ocpp_unit: str | None) -> UnitConversion:
+    if (
+        ocpp_unit is not None
+        and type(metric_key) is str
+        and metric_key.startswith(MEASURAND_PREFIXES)
+        and ocpp_unit in UNITS_OCPP_NORMALIZATION
+    ):
+        normalized_unit, factor = UNITS_OCPP_NORMALIZATION[ocpp_unit]
+        return UnitConversion(
+            ocpp_unit=normalized_unit,
+            ha_unit=UNITS_OCCP_TO_HA.get(normalized_unit, None),
+            factor=factor
+        )
+    return UnitConversion(
+        ocpp_unit=ocpp_unit,
+        ha_unit=UNITS_OCCP_TO_HA.get(ocpp_unit, None),
+        base_factor=UNITS_OCPP_BASE_FACTORS.get(ocpp_unit, 1.0)
+    )
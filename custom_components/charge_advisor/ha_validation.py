@@ -0,0 +1,119 @@
+"""
+La classe HomeAssistantValidationPolicy decide, per ogni chiamata OCPP ricevuta da un Charge Point / Charging Station,
+se il payload deve essere validato con lo schema JSON dell'azione. Il livello di validazione dipende dall'azione (vedi
+SCHEMA_VALIDATION_POLICY in const.py): le azioni di controllo vengono sempre validate, la telemetria ad alta frequenza
+(es. MeterValues, TransactionEvent) viene validata a campione oppure mai (es. Heartbeat).
+
+La validazione vera e propria resta quella della libreria ocpp, che compila il validatore di ogni coppia (azione,
+versione OCPP) una sola volta e lo condivide tra tutte le connessioni: la policy è unica per la Central System e
+mantiene i contatori delle chiamate validate e di quelle non validate.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Python packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Home Assistant packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# External packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local packages
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Local files
+# ----------------------------------------------------------------------------------------------------------------------
+
+from .enums import HASchemaValidationLevel
+
+# Chiave della route map della libreria ocpp che disabilita la validazione dello schema di un'azione
+ROUTE_SKIP_SCHEMA_VALIDATION = "_skip_schema_validation"
+# Chiave in cui viene conservato il valore originale (impostato con @on(..., skip_schema_validation=True))
+ROUTE_HANDLER_SKIP_SCHEMA_VALIDATION = "_ha_handler_skip_schema_validation"
+
+
+class HomeAssistantValidationPolicy:
+    """Per-action schema validation policy of the incoming OCPP calls, shared by all the chargers."""
+
+    def __init__(
+        self,
+        skip_all: bool,
+        sample_rate: int,
+        policy: dict[str, HASchemaValidationLevel]
+    ):
+        self._skip_all = skip_all
+        self._sample_rate = max(1, sample_rate)
+        self._policy = dict(policy)
+        # Contatori per azione: azione -> [chiamate validate, chiamate non validate]
+        self._counters: dict[str, list[int]] = {}
+
+    def get_level(self, action: str) -> HASchemaValidationLevel:
+        if self._skip_all:
+            return HASchemaValidationLevel.none
+        return self._policy.get(action, HASchemaValidationLevel.full)
+
+    # Indica se la chiamata corrente dell'azione deve essere validata (e aggiorna i contatori)
+    def should_validate(self, action: str) -> bool:
+        counters = self._counters.get(action)
+        if counters is None:
+            counters = self._counters[action] = [0, 0]
+        match self.get_level(action):
+            case HASchemaValidationLevel.full:
+                validate = True
+            case HASchemaValidationLevel.sampled:
+                # La prima chiamata viene sempre validata, poi una ogni "sample_rate"
+                validate = (counters[0] + counters[1]) % self._sample_rate == 0
+            case _:
+                validate = False
+        counters[0 if validate else 1] += 1
+        return validate
+
+    # Indica se la chiamata ricevuta deve essere validata: un handler dichiarato con skip_schema_validation=True non
+    # viene mai validato
+    def should_validate_call(self, route_map: dict, action: str) -> bool:
+        handlers = route_map.get(action)
+        if handlers is None:
+            return False
+        if ROUTE_HANDLER_SKIP_SCHEMA_VALIDATION not in handlers:
+            handlers[ROUTE_HANDLER_SKIP_SCHEMA_VALIDATION] = handlers.get(ROUTE_SKIP_SCHEMA_VALIDATION, False)
+        if handlers[ROUTE_HANDLER_SKIP_SCHEMA_VALIDATION]:
+            return False
+        return self.should_validate(action)
+
+    # Imposta nella route map del Charge Point se la libreria ocpp deve validare la chiamata ricevuta
+    def apply(self, route_map: dict, action: str):
+        validate = self.should_validate_call(route_map, action)
+        handlers = route_map.get(action)
+        if handlers is not None and not handlers[ROUTE_HANDLER_SKIP_SCHEMA_VALIDATION]:
+            handlers[ROUTE_SKIP_SCHEMA_VALIDATION] = not validate
+
+    # Indica alla libreria ocpp di non validare la chiamata ricevuta (es. perché già validata nell'executor)
+    @staticmethod
+    def skip(route_map: dict, action: str):
+        handlers = route_map.get(action)
+        if handlers is not None and not handlers.get(ROUTE_HANDLER_SKIP_SCHEMA_VALIDATION, False):
+            handlers[ROUTE_SKIP_SCHEMA_VALIDATION] = True
+
+    def get_report(self) -> dict:
+        validated = sum(counters[0] for counters in self._counters.values())
+        skipped = sum(counters[1] for counters in self._counters.values())
+        return {
+            "sample_rate": self._sample_rate,
+            "validated": validated,
+            "skipped": skipped,
+            "actions": {
+                action: {
+                    "level": self.get_level(action).value,
+                    "validated": counters[0],
+                    "skipped": counters[1],
+                }
+                for action, counters in sorted(self._counters.items())
+            },
+        }
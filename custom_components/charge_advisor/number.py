@@ -75,81 +75,79 @@ NUMBERS: Final = [
 ]
 
 
+def get_charge_point_entities(hass, entry, central_system, charge_point):
+    """Return the number entities of a Charge Point and its Connectors (OCPP 1.6) or EVSEs (OCPP 2.0.1)."""
+
+    entities = []
+    # --------------------------------------------------------------------------------------------------------------
+    # For each entity described in the NUMBERS array...
+    # --------------------------------------------------------------------------------------------------------------
+    for ent in NUMBERS:
+        # ----------------------------------------------------------------------------------------------------------
+        # If the entity's key is "maximum_current"...
+        # ----------------------------------------------------------------------------------------------------------
+        if ent.key == "maximum_current":
+            ent.initial_value = 0
+            ent.native_max_value = entry.data.get(CONF_MAX_CURRENT, DEFAULT_MAX_CURRENT)
+        # ----------------------------------------------------------------------------------------------------------
+        # Add a ChargePointOcppNumber instance to the list of entities.
+        # ----------------------------------------------------------------------------------------------------------
+        entities.append(ChargePointOcppNumber(hass, central_system, charge_point, ent))
+    # --------------------------------------------------------------------------------------------------------------
+    # Check whether the OCPP version of the charge point is 1.6 or 2.0.1...
+    # --------------------------------------------------------------------------------------------------------------
+    if charge_point.connection_ocpp_version == SubProtocol.OcppV16.value:
+        # ----------------------------------------------------------------------------------------------------------
+        # If it's 1.6, loop through all the connectors...
+        # ----------------------------------------------------------------------------------------------------------
+        for connector in charge_point.connectors:
+            for ent in NUMBERS:
+                # --------------------------------------------------------------------------------------------------
+                # If the entity's key is "maximum_current"...
+                # --------------------------------------------------------------------------------------------------
+                if ent.key == "maximum_current":
+                    ent.initial_value = 0
+                    ent.native_max_value = entry.data.get(CONF_MAX_CURRENT, DEFAULT_MAX_CURRENT)
+                # --------------------------------------------------------------------------------------------------
+                # Add a ChargePointConnectorOcppNumber object to the entity list.
+                # --------------------------------------------------------------------------------------------------
+                entities.append(ChargePointConnectorOcppNumber(hass, central_system, charge_point, connector, ent))
+    elif charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
+        # ----------------------------------------------------------------------------------------------------------
+        # If it's 2.0.1, loop through all the EVSEs...
+        # ----------------------------------------------------------------------------------------------------------
+        for evse in charge_point.evses:
+            for ent in NUMBERS:
+                # --------------------------------------------------------------------------------------------------
+                # If the entity's key is "maximum_current"...
+                # --------------------------------------------------------------------------------------------------
+                if ent.key == "maximum_current":
+                    ent.initial_value = 0
+                    ent.native_max_value = entry.data.get(CONF_MAX_CURRENT, 375)
+                # --------------------------------------------------------------------------------------------------
+                # Add a ChargePointConnectorOcppNumber object to the entity list.
+                # --------------------------------------------------------------------------------------------------
+                entities.append(ChargePointConnectorOcppNumber(hass, central_system, charge_point, evse, ent))
+
+    return entities
+
+
 async def async_setup_entry(hass, entry, async_add_devices):
     """Configure the number platform."""
     # ------------------------------------------------------------------------------------------------------------------
     # Retrieve the central system object.
     # ------------------------------------------------------------------------------------------------------------------
     central_system: CentralSystem = hass.data[DOMAIN][entry.entry_id]
-
-    entities = []
-    # ------------------------------------------------------------------------------------------------------------------
-    # Loop through the IDs of all the charge points of the central system in question...
-    # ------------------------------------------------------------------------------------------------------------------
-    for cp_id in central_system.charge_points:
-        # --------------------------------------------------------------------------------------------------------------
-        # Retrieve the charge point object itself.
-        # --------------------------------------------------------------------------------------------------------------
-        charge_point: HomeAssistantChargePoint = central_system.charge_points[cp_id]
-        # --------------------------------------------------------------------------------------------------------------
-        # For each entity described in the NUMBERS array...
-        # --------------------------------------------------------------------------------------------------------------
-        for ent in NUMBERS:
-            # ----------------------------------------------------------------------------------------------------------
-            # If the entity's key is "maximum_current"...
-            # ----------------------------------------------------------------------------------------------------------
-            if ent.key == "maximum_current":
-                ent.initial_value = 0
-                ent.native_max_value = entry.data.get(CONF_MAX_CURRENT, DEFAULT_MAX_CURRENT)
-            # ----------------------------------------------------------------------------------------------------------
-            # Add a ChargePointOcppNumber instance to the list of entities.
-            # ----------------------------------------------------------------------------------------------------------
-            entities.append(ChargePointOcppNumber(hass, central_system, charge_point, ent))
-        # --------------------------------------------------------------------------------------------------------------
-        # Check whether the OCPP version of the charge point is 1.6 or 2.0.1...
-        # --------------------------------------------------------------------------------------------------------------
-        if charge_point.connection_ocpp_version == SubProtocol.OcppV16.value:
-            # ----------------------------------------------------------------------------------------------------------
-            # If it's 1.6, loop through all the connectors...
-            # ----------------------------------------------------------------------------------------------------------
-            for connector in charge_point.connectors:
-                for ent in NUMBERS:
-                    # --------------------------------------------------------------------------------------------------
-                    # If the entity's key is "maximum_current"...
-                    # --------------------------------------------------------------------------------------------------
-                    if ent.key == "maximum_current":
-                        ent.initial_value = 0
-                        ent.native_max_value = entry.data.get(CONF_MAX_CURRENT, DEFAULT_MAX_CURRENT)
-                    # --------------------------------------------------------------------------------------------------
-                    # Add a ChargePointConnectorOcppNumber object to the entity list.
-                    # --------------------------------------------------------------------------------------------------
-                    entities.append(ChargePointConnectorOcppNumber(hass, central_system, charge_point, connector, ent))
-        elif charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
-            # ----------------------------------------------------------------------------------------------------------
-            # If it's 2.0.1, loop through all the EVSEs...
-            # ----------------------------------------------------------------------------------------------------------
-            for evse in charge_point.evses:
-                for ent in NUMBERS:
-                    # --------------------------------------------------------------------------------------------------
-                    # If the entity's key is "maximum_current"...
-                    # --------------------------------------------------------------------------------------------------
-                    if ent.key == "maximum_current":
-                        ent.initial_value = 0
-                        ent.native_max_value = entry.data.get(CONF_MAX_CURRENT, 375)
-                    # --------------------------------------------------------------------------------------------------
-                    # Add a ChargePointConnectorOcppNumber object to the entity list.
-                    # --------------------------------------------------------------------------------------------------
-                    entities.append(ChargePointConnectorOcppNumber(hass, central_system, charge_point, evse, ent))
-    # ------------------------------------------------------------------------------------------------------------------
-    # Aggiungiamo gli unique_id di ogni entità registrata in fase di setup al
-    # Charge Point o al Connector
-    # ------------------------------------------------------------------------------------------------------------------
-    for entity in entities:
-        entity.append_entity_unique_id()
     # ------------------------------------------------------------------------------------------------------------------
-    # Add all the entities as devices.
+    # Add the entities of every charge point in bounded chunks (after appending their unique_id to the Charge Point or
+    # Connector), then register the platform on the central system, so that the entities of new charge points, EVSEs
+    # or connectors can later be added without reloading the whole platform.
     # ------------------------------------------------------------------------------------------------------------------
-    async_add_devices(entities, False)
+    await central_system.async_setup_ha_platform(
+        NUMBER,
+        async_add_devices,
+        lambda charge_point: get_charge_point_entities(hass, entry, central_system, charge_point)
+    )
 
 
 class ChargePointOcppNumber(RestoreNumber, NumberEntity):
@@ -182,16 +180,32 @@ class ChargePointOcppNumber(RestoreNumber, NumberEntity):
         self._attr_native_value = self.entity_description.initial_value
         self._attr_should_poll = False
         self._attr_available = True
+        self._last_written_state = None
 
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added."""
         await super().async_added_to_hass()
-        if restored := await self.async_get_last_number_data():
-            self._attr_native_value = restored.native_value
+        # Il valore è ripristinato dallo snapshot delle metriche (vedi ha_store.py): lo stato salvato da Home Assistant
+        # viene letto solo se lo snapshot non contiene ancora il numero (es. primo avvio dopo l'aggiornamento)
+        metrics_store = self._central_system.ha_metrics_store
+        if metrics_store.has_number_value(self.unique_id):
+            value = metrics_store.get_number_value(self.unique_id)
+        else:
+            restored = await self.async_get_last_number_data()
+            value = restored.native_value if restored else None
+            metrics_store.set_number_value(self.unique_id, value)
+        if value is not None:
+            self._attr_native_value = value
             self.target.limit_amps = self._attr_native_value
-        async_dispatcher_connect(
+        # Il numero è indicizzato dal target (vedi "append_entity_unique_id") fino alla sua rimozione
+        self.async_on_remove(lambda: self.target.remove_ha_entity(self))
+        # Segnale del dispositivo a cui appartiene il numero e segnale globale (eventi dell'intera flotta)
+        self.async_on_remove(async_dispatcher_connect(
+            self._hass, self.target.ha_data_updated_signal, self._schedule_immediate_update
+        ))
+        self.async_on_remove(async_dispatcher_connect(
             self._hass, DATA_UPDATED, self._schedule_immediate_update
-        )
+        ))
 
     @property
     def target(self):
@@ -203,7 +217,7 @@ class ChargePointOcppNumber(RestoreNumber, NumberEntity):
 
     @callback
     def _schedule_immediate_update(self):
-        self.async_schedule_update_ha_state(True)
+        self.async_write_ha_state_if_changed()
 
     # @property
     # def available(self) -> bool:
@@ -245,6 +259,7 @@ class ChargePointOcppNumber(RestoreNumber, NumberEntity):
                 # ------------------------------------------------------------------------------------------------------
                 if resp is True:
                     self._attr_native_value = num_value
+                    self._central_system.ha_metrics_store.set_number_value(self.unique_id, num_value)
                     self.async_write_ha_state()
         elif self._charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
             if self.target.is_available() and self._charge_point.get_metric("SmartChargingCtrlr.Available"):
@@ -293,11 +308,25 @@ class ChargePointOcppNumber(RestoreNumber, NumberEntity):
                 # ------------------------------------------------------------------------------------------------------
                 if resp is True:
                     self._attr_native_value = num_value
+                    self._central_system.ha_metrics_store.set_number_value(self.unique_id, num_value)
                     self.async_write_ha_state()
 
     def append_entity_unique_id(self):
         if self.unique_id not in self.target.ha_entity_unique_ids:
-            self.target.ha_entity_unique_ids.append(self.unique_id)
+            self.target.ha_entity_unique_ids.add(self.unique_id)
+        # Il valore è impostato dall'utente: lo stato dipende dalle metriche solo per la disponibilità
+        self.target.add_ha_entity(self)
+
+    # Scrive lo stato in Home Assistant solo se è cambiato rispetto all'ultima scrittura
+    @callback
+    def async_write_ha_state_if_changed(self):
+        if self.hass is None:
+            return
+        state = (self.available, self._attr_native_value)
+        if state == self._last_written_state:
+            return
+        self._last_written_state = state
+        self.async_write_ha_state()
 
 class ChargePointConnectorOcppNumber(ChargePointOcppNumber):
 
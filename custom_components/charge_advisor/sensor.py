@@ -6,8 +6,12 @@
 
 from __future__ import annotations
 
+import re
 import traceback
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from fnmatch import translate
+from functools import lru_cache
 from typing import Final
 from datetime import timedelta
 
@@ -48,6 +52,7 @@ from ocpp.v201.enums import ConnectorStatusType, ChargingStateType
 from .const import *
 from .enums import *
 from .logger import OcppLog
+from .ha_metric import MetricPublishRule
 
 from ocpp_central_system.ComponentsV201.enums_v201 import TierLevel
 
@@ -66,6 +71,11 @@ V201_CONNECTOR_CHARGING_SESSION_SENSORS_AVAILABILTY_SET: Final = [
     ConnectorStatusType.occupied.value
 ]
 
+# Espressione regolare equivalente ai pattern di LAZY_DEVICE_MODEL_SENSORS_ALLOWLIST
+LAZY_DEVICE_MODEL_SENSORS_ALLOWLIST_RE: Final = re.compile(
+    "|".join(translate(pattern) for pattern in LAZY_DEVICE_MODEL_SENSORS_ALLOWLIST)
+)
+
 V201_CONNECTOR_CHARGING_SESSION_SENSORS_CHARGING_STATE_SET: Final = [
     ChargingStateType.charging.value,
     ChargingStateType.ev_connected.value,
@@ -75,6 +85,97 @@ V201_CONNECTOR_CHARGING_SESSION_SENSORS_CHARGING_STATE_SET: Final = [
 ]
 
 
+@dataclass(frozen=True)
+class OcppSensorClassification:
+    """Home Assistant classification of a metric key, resolved once per key."""
+
+    device_class: SensorDeviceClass | None
+    state_class: SensorStateClass | None
+    icon: str
+    default_unit: str | None
+
+
+# Aggiornamento del 17/10/2026
+# La classificazione di una metrica dipende solo dalla sua chiave: viene calcolata una sola volta per chiave e poi
+# condivisa da tutte le descrizioni e da tutti i sensori che rappresentano quella metrica.
+@lru_cache(maxsize=None)
+def classify_metric_key(metric_key: str | None) -> OcppSensorClassification:
+
+    # Aggiornamento del 08/02/2023
+    # I measurand di Energia e Potenza REATTIVA non hanno in Home Assistant una unità di misura standardizzata.
+    # Home Assistant supporta solo W, kW, Wh e kWh.
+    #
+    # Pertanto, impostando Energia e Potenza REATTIVA con le loro unità di misura (var, kvar per la potenza e
+    # varh, kvarh per la energia) nelle classi Home Assistant SensorDeviceClass.ENERGY e SensorDeviceClass.POWER
+    # dà i seguenti errori:
+    # a) WARNING(MainThread)[homeassistant.components.sensor] Entity sensor.charge_point_1_1_energy_reactive_export_interval
+    #    (<class 'custom_components.ocpp.sensor.ChargePointConnectorMetric'> ) is using native unit of measurement
+    #    'UnitOfMeasure.kvarh' which is not a valid unit for the device
+    # b) WARNING(MainThread)[homeassistant.components.sensor] Entity sensor.charge_point_1_1_power_reactive_import
+    #    (<class 'custom_components.ocpp.sensor.ChargePointConnectorMetric'> ) is using native unit of measurement
+    #    'UnitOfMeasure.kvar' which is not a valid unit for the device
+    #
+    # Per ovviare al problema, evitiamo di attribuire tali classi ai sensori di Energia e Potenza REATTIVA
+
+    # Device class
+    device_class = None
+    mk = (metric_key or "").lower()
+    if mk.startswith("current."):
+        device_class = SensorDeviceClass.CURRENT
+    elif mk.startswith("voltage"):
+        device_class = SensorDeviceClass.VOLTAGE
+    elif mk.startswith("energy."):
+        device_class = SensorDeviceClass.ENERGY
+    elif metric_key in [
+            Measurand.frequency.value,
+            Measurand.rpm.value,
+        ] or mk.startswith("frequency"):
+        device_class = SensorDeviceClass.FREQUENCY
+    elif mk.startswith(tuple(["power.active", "power.offered"])):
+        device_class = SensorDeviceClass.POWER
+    elif mk.startswith("power.reactive"):
+        device_class = SensorDeviceClass.REACTIVE_POWER
+    elif mk.startswith("temperature."):
+        device_class = SensorDeviceClass.TEMPERATURE
+    elif mk.startswith("session.time") or mk.startswith("latency"):
+        device_class = SensorDeviceClass.DURATION
+    elif mk.startswith("session.energy"):
+        device_class = SensorDeviceClass.ENERGY
+    elif mk.startswith("timestamp.") or metric_key in [
+            HAChargePointSensors.config_response.value,
+            HAChargePointSensors.data_response.value,
+            HAChargePointSensors.heartbeat.value,
+        ]:
+        device_class = SensorDeviceClass.TIMESTAMP
+    elif mk.startswith("soc"):
+        device_class = SensorDeviceClass.BATTERY
+
+    # State class
+    state_class = None
+    if device_class is SensorDeviceClass.ENERGY:
+        state_class = SensorStateClass.TOTAL_INCREASING
+    elif device_class in [
+        SensorDeviceClass.CURRENT,
+        SensorDeviceClass.VOLTAGE,
+        SensorDeviceClass.POWER,
+        SensorDeviceClass.TEMPERATURE,
+        SensorDeviceClass.BATTERY,
+        SensorDeviceClass.FREQUENCY,
+        SensorDeviceClass.DURATION
+    ] or metric_key in [
+        HAChargePointSensors.latency_ping.value,
+        HAChargePointSensors.latency_pong.value,
+    ]:
+        state_class = SensorStateClass.MEASUREMENT
+
+    return OcppSensorClassification(
+        device_class=device_class,
+        state_class=state_class,
+        icon=MEASURAND_ICON.get(metric_key, ICON),
+        default_unit=DEFAULT_CLASS_UNITS_HA.get(device_class)
+    )
+
+
 @dataclass
 class OcppSensorDescription(SensorEntityDescription):
     """Class to describe a Sensor entity."""
@@ -88,6 +189,38 @@ class OcppSensorDescription(SensorEntityDescription):
     visible_by_default: bool | None = False
     native_uom: str | None = None
     native_value: any | None = None
+    device_model: bool = False  # sensor of an OCPP 2.0.1 device model variable
+    measurand: bool = False  # sensor of a measurand reported by the charger
+    deadband: float | None = None  # minimum absolute change to publish a new value
+    deadband_relative: float | None = None  # minimum change relative to the last published value
+    min_interval: float | None = None  # minimum seconds between two published values
+    heartbeat: float | None = None  # maximum seconds of silence before a change is published anyway
+    meter_statistic: bool = False  # sensor of a rolling statistic of the recent samples of a measurand
+    unit_metric_key: str | None = None  # metric providing the unit of measurement (default: metric_key)
+
+    @property
+    def publish_rule(self) -> MetricPublishRule | None:
+        if self.deadband is None and self.deadband_relative is None \
+                and self.min_interval is None and self.heartbeat is None:
+            return None
+        return MetricPublishRule(
+            deadband=self.deadband,
+            deadband_relative=self.deadband_relative,
+            min_interval=self.min_interval,
+            heartbeat=self.heartbeat
+        )
+
+    @property
+    def tier(self) -> str:
+        if self.connector_id is not None:
+            return "Connector"
+        if self.evse_id is not None:
+            return "EVSE"
+        return "ChargingStation"
+
+    @property
+    def classification(self) -> OcppSensorClassification:
+        return classify_metric_key(self.metric_key)
 
 
 class OcppSensor:
@@ -109,15 +242,97 @@ class OcppSensor:
     def get_native_value_by_metric_key(metric_key):
         return None
 
-    # Metodo per il recupero delle entità di tipo Sensore per uno specifico Charge Point
+    # Aggiornamento del 17/10/2026
+    # Utilizzare questo metodo (e la tabella METRIC_PUBLISH_RULES) per attribuire a specifiche metriche delle regole di
+    # pubblicazione: deadband, intervallo minimo ed heartbeat
     @staticmethod
-    def get_charge_point_entities(
-        hass,
-        charge_point
-    ):
+    def get_publish_rules_by_metric_key(metric_key):
+        return METRIC_PUBLISH_RULES.get(metric_key, {})
+
+    # Aggiornamento del 17/10/2026
+    # Descrizioni dei sensori già calcolate, indicizzate per versione OCPP, vendor, modello, firmware ed inventario dei
+    # componenti del Charge Point: Charge Point identici (e i ricaricamenti della piattaforma) riusano le stesse
+    # descrizioni, che non vengono mai modificate dalle entità. Vengono conservati al più
+    # SENSOR_DESCRIPTIONS_CACHE_SIZE insiemi di descrizioni (i meno usati di recente vengono scartati).
+    _sensor_descriptions_cache: OrderedDict[tuple, list[OcppSensorDescription]] = OrderedDict()
+    sensor_descriptions_cache_hits = 0
+    sensor_descriptions_cache_misses = 0
+
+    # Restituisce la chiave che identifica l'insieme dei sensori di uno specifico Charge Point
+    @staticmethod
+    def get_charge_point_inventory_key(charge_point) -> tuple:
 
-        # Recupero della Central System
-        central_system = charge_point.central_system
+        if charge_point.connection_ocpp_version == SubProtocol.OcppV16.value:
+            inventory = (
+                charge_point.num_connectors,
+                tuple(charge_point.measurands)
+            )
+
+        elif charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
+
+            # L'inventario viene ricalcolato solo se la Charging Station ha ricevuto un nuovo report del device model
+            generation = charge_point.ha_device_model_generation
+            if charge_point.ha_sensor_inventory is not None and charge_point.ha_sensor_inventory[0] == generation:
+                inventory = charge_point.ha_sensor_inventory[1]
+            else:
+                def get_tier_inventory(tier):
+                    components = []
+                    for component_name in tier.componentsList:
+                        component = tier.get_component(component_name)
+                        variables = []
+                        for variable_name in list(component.get_variables()):
+                            for variable_instance_name in component.get_variable_instances(variable_name):
+                                variable = component.get_variable(variable_name, variable_instance_name)
+                                # I tipi degli attributi sono convertiti in stringa: la chiave resta hashable qualunque
+                                # sia il loro tipo
+                                variables.append((
+                                    variable.name,
+                                    variable.instance,
+                                    tuple(str(attribute_type) for attribute_type in variable.variable_attributes)
+                                ))
+                        components.append((component.name, component.instance, tuple(variables)))
+                    return tuple(components), tuple(tier.measurands_list)
+
+                tiers = [get_tier_inventory(charge_point)]
+                for evse in charge_point.evses:
+                    tiers.append((evse.id, get_tier_inventory(evse)))
+                    for connector in evse.connectors:
+                        tiers.append((evse.id, connector.id, get_tier_inventory(connector)))
+                # La tupla stessa (e non il suo hash) è la chiave: Charge Point diversi non possono collidere
+                inventory = tuple(tiers)
+                charge_point.ha_sensor_inventory = (generation, inventory)
+
+        else:
+            inventory = None
+
+        return (
+            charge_point.connection_ocpp_version,
+            charge_point.get_vendor(),
+            charge_point.get_model(),
+            charge_point.get_firmware_version(),
+            inventory
+        )
+
+    # Metodo per il recupero delle descrizioni dei sensori per uno specifico Charge Point
+    @staticmethod
+    def get_charge_point_sensor_descriptions(charge_point) -> list[OcppSensorDescription]:
+        key = OcppSensor.get_charge_point_inventory_key(charge_point)
+        cache = OcppSensor._sensor_descriptions_cache
+        sensors = cache.get(key)
+        if sensors is not None:
+            OcppSensor.sensor_descriptions_cache_hits += 1
+            cache.move_to_end(key)
+            return sensors
+        OcppSensor.sensor_descriptions_cache_misses += 1
+        sensors = OcppSensor.create_charge_point_sensor_descriptions(charge_point)
+        cache[key] = sensors
+        while len(cache) > SENSOR_DESCRIPTIONS_CACHE_SIZE:
+            cache.popitem(last=False)
+        return sensors
+
+    # Metodo per la creazione delle descrizioni dei sensori per uno specifico Charge Point
+    @staticmethod
+    def create_charge_point_sensor_descriptions(charge_point) -> list[OcppSensorDescription]:
 
         # --------------------------------------------------------------------------------------------------------------
         # Sensori associati al Charge Point
@@ -149,6 +364,10 @@ class OcppSensor:
                     )
                 )
 
+        # Aggiornamento del 17/10/2026
+        # Percentili della latenza end-to-end delle chiamate OCPP ricevute (vedi ha_latency.py)
+        sensors.extend(OcppSensor.create_latency_sensor_descriptions())
+
         # --------------------------------------------------------------------------------------------------------------
         # Sensori associati a ciascun Connettore del Charge Point - OCPP 1.6
         # --------------------------------------------------------------------------------------------------------------
@@ -187,9 +406,18 @@ class OcppSensor:
                             connector_id=connector_id,
                             availability_set=CONNECTOR_CHARGING_SESSION_SENSORS_AVAILABILTY_SET,
                             native_uom=OcppSensor.get_native_uom_by_metric_key(metric_key),
-                            native_value=OcppSensor.get_native_value_by_metric_key(metric_key)
+                            native_value=OcppSensor.get_native_value_by_metric_key(metric_key),
+                            measurand=True,
+                            **OcppSensor.get_publish_rules_by_metric_key(metric_key)
                         )
                     )
+                sensors.extend(
+                    OcppSensor.create_meter_statistics_sensor_descriptions(
+                        charge_point.measurands,
+                        CONNECTOR_CHARGING_SESSION_SENSORS_AVAILABILTY_SET,
+                        connector_id=connector_id
+                    )
+                )
 
         # --------------------------------------------------------------------------------------------------------------
         # Sensori associati a ciascun Connettore di ciascun EVSE del Charging Station - OCPP 2.0.1
@@ -248,7 +476,8 @@ class OcppSensor:
                                             evse_id=evse_id,
                                             entity_category=EntityCategory.DIAGNOSTIC,
                                             native_uom=OcppSensor.get_native_uom_by_metric_key(metric_key),
-                                            native_value=OcppSensor.get_native_value_by_metric_key(metric_key)
+                                            native_value=OcppSensor.get_native_value_by_metric_key(metric_key),
+                                            device_model=True
                                         )
                                     sensors.append(desc)
 
@@ -273,7 +502,9 @@ class OcppSensor:
                             connector_id=connector_id,
                             availability_set=V201_CONNECTOR_CHARGING_SESSION_SENSORS_AVAILABILTY_SET,
                             native_uom=OcppSensor.get_native_uom_by_metric_key(metric_key),
-                            native_value=OcppSensor.get_native_value_by_metric_key(metric_key)
+                            native_value=OcppSensor.get_native_value_by_metric_key(metric_key),
+                            measurand=True,
+                            **OcppSensor.get_publish_rules_by_metric_key(metric_key)
                         )
                     sensors.append(
                         desc
@@ -301,6 +532,110 @@ class OcppSensor:
                 for connector in evse.connectors:
                     create_sensors_from_include_components(connector, sensors)
                     create_sensors_from_tier_level(connector, sensors)
+                    sensors.extend(
+                        OcppSensor.create_meter_statistics_sensor_descriptions(
+                            connector.measurands_list,
+                            V201_CONNECTOR_CHARGING_SESSION_SENSORS_AVAILABILTY_SET,
+                            evse_id=evse.id,
+                            connector_id=connector.connector_id
+                        )
+                    )
+
+        return sensors
+
+    # Aggiornamento del 17/10/2026
+    # Sensori delle statistiche sulle finestre scorrevoli dei measurand di un Connettore (vedi ha_meter_samples.py),
+    # solo per i measurand effettivamente campionati dal Charge Point. I sensori vengono scartati in
+    # "get_charge_point_entities" se non sono abilitati nella configurazione dell'integrazione.
+    @staticmethod
+    def create_meter_statistics_sensor_descriptions(
+        measurands,
+        availability_set,
+        evse_id=None,
+        connector_id=None
+    ) -> list[OcppSensorDescription]:
+        return [
+            OcppSensorDescription(
+                key=metric_key.lower(),
+                name=metric_key.replace(".", " "),
+                metric_key=metric_key,
+                evse_id=evse_id,
+                connector_id=connector_id,
+                availability_set=availability_set,
+                meter_statistic=True,
+                unit_metric_key=measurand,
+                **OcppSensor.get_publish_rules_by_metric_key(measurand)
+            )
+            for metric_key, (measurand, statistic, window) in METER_STATISTICS_SENSORS.items()
+            if measurand in measurands
+        ]
+
+    # Aggiornamento del 17/10/2026
+    # Sensori (DIAGNOSTIC) dei percentili della latenza end-to-end delle chiamate OCPP ricevute, di un Charge Point o
+    # dell'intera flotta (Central System). I valori sono in secondi, arrotondati al decimo di millisecondo.
+    @staticmethod
+    def create_latency_sensor_descriptions() -> list[OcppSensorDescription]:
+        return [
+            OcppSensorDescription(
+                key=metric_key.lower(),
+                name=metric_key.replace(".", " "),
+                metric_key=metric_key,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                scale=LATENCY_SENSORS_SCALE
+            )
+            for metric_key in LATENCY_SENSORS
+        ]
+
+    # Aggiornamento del 17/10/2026
+    # In modalità "lazy" un sensore del device model OCPP 2.0.1 viene creato solo se la sua metrica ha già ricevuto un
+    # valore, se è nella allowlist o se è già registrato in Home Assistant. Le chiavi delle altre metriche finiscono nel
+    # catalogo del livello (Charging Station, EVSE, Connettore), che crea il sensore all'arrivo del primo valore.
+    @staticmethod
+    def is_lazy_sensor_materialized(
+        charge_point,
+        tier,
+        tier_ids: list[str],
+        sensor: OcppSensorDescription
+    ) -> bool:
+        if not sensor.device_model or not charge_point.ha_lazy_device_model_sensors:
+            return True
+        if tier.get_metric_value(sensor.metric_key) is not None:
+            return True
+        if LAZY_DEVICE_MODEL_SENSORS_ALLOWLIST_RE.match(sensor.metric_key):
+            return True
+        # Stesso unique_id dei sensori ChargePointMetric, EVSEMetric ed EVSEConnectorMetric
+        unique_id = ".".join([SENSOR_DOMAIN, DOMAIN, charge_point.id, *tier_ids, sensor.key])
+        registry_cache = charge_point.central_system.ha_registry_cache
+        return unique_id in registry_cache.get_entities({(DOMAIN, tier.ha_device_identifier)})
+
+    # Metodo per il recupero delle entità di tipo Sensore per uno specifico Charge Point
+    @staticmethod
+    def get_charge_point_entities(
+        hass,
+        charge_point
+    ):
+
+        # Recupero della Central System
+        central_system = charge_point.central_system
+
+        # Descrizioni dei sensori del Charge Point (eventualmente già calcolate per un Charge Point identico)
+        sensors = OcppSensor.get_charge_point_sensor_descriptions(charge_point)
+
+        # Aggiornamento del 17/10/2026
+        # I sensori delle statistiche dei measurand sono opzionali
+        if not charge_point.ha_meter_statistics_sensors:
+            sensors = [sensor for sensor in sensors if not sensor.meter_statistic]
+
+        # Aggiornamento del 17/10/2026
+        # Measurand e variabili del device model vengono filtrati con i pattern di inclusione / esclusione configurati
+        # nelle opzioni dell'integrazione
+        sensor_filter = central_system.ha_sensor_filter
+        if sensor_filter.active:
+            sensors = [
+                sensor for sensor in sensors
+                if not (sensor.measurand or sensor.device_model)
+                or sensor_filter.matches(sensor.tier, sensor.metric_key)
+            ]
 
         # --------------------------------------------------------------------------------------------------------------
         # Entità associate ai sensori del Charge Point
@@ -331,10 +666,30 @@ class OcppSensor:
                         )
                     )
         elif charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
+            # Il catalogo delle metriche senza sensore viene ricostruito ad ogni recupero delle entità
+            charge_point.ha_lazy_metric_keys = set()
+            for evse in charge_point.evses:
+                evse.ha_lazy_metric_keys = set()
+                for connector in evse.connectors:
+                    connector.ha_lazy_metric_keys = set()
+
             for sensor in sensors:
                 connector_id = sensor.connector_id
                 evse_id = sensor.evse_id
 
+                if sensor.device_model:
+                    tier = charge_point
+                    tier_ids = []
+                    if evse_id is not None:
+                        tier = charge_point.get_evse_by_id(int(evse_id))
+                        tier_ids.append(str(tier.id))
+                        if connector_id is not None:
+                            tier = tier.get_connector_by_id(int(connector_id))
+                            tier_ids.append(str(tier.connector_id))
+                    if not OcppSensor.is_lazy_sensor_materialized(charge_point, tier, tier_ids, sensor):
+                        tier.ha_lazy_metric_keys.add(sensor.metric_key)
+                        continue
+
                 if connector_id is None and evse_id is None:
                     entities.append(
                         ChargePointMetric(
@@ -379,22 +734,24 @@ async def async_setup_entry(hass, entry, async_add_devices):
     # Configure the sensor platform
     central_system: CentralSystem = hass.data[DOMAIN][entry.entry_id]
 
-    entities = []
+    # Sensori della Central System: percentili della latenza dell'intera flotta
+    entities = [
+        CentralSystemMetric(hass, central_system, description)
+        for description in OcppSensor.create_latency_sensor_descriptions()
+    ]
 
-    for cp_id in central_system.charge_points:
-        charge_point = central_system.charge_points[cp_id]
-        charge_point_entities = OcppSensor.get_charge_point_entities(hass, charge_point)
-        for charge_point_entity in charge_point_entities:
-            entities.append(charge_point_entity)
-
-    # Aggiungiamo gli unique_id di ogni entità registrata in fase di setup al
+    # Le entità di ogni Charge Point vengono aggiunte a blocchi, dopo aver aggiunto i loro unique_id al
     # - Charge Point / Charging Station
     # - EVSE
     # - Connector
-    for entity in entities:
-        entity.append_entity_unique_id()
-
-    async_add_devices(entities, False)
+    # La piattaforma viene poi registrata presso la Central System, per poter aggiungere in seguito le sole entità di
+    # nuovi Charge Point, EVSE o Connettori senza ricaricare la piattaforma
+    await central_system.async_setup_ha_platform(
+        SENSOR,
+        async_add_devices,
+        lambda charge_point: OcppSensor.get_charge_point_entities(hass, charge_point),
+        entities
+    )
 
 
 # source: https://developers.home-assistant.io/docs/core/entity/sensor?_highlight=restoresensor#restoring-sensor-states
@@ -433,6 +790,12 @@ class ChargePointMetric(RestoreSensor, SensorEntity):
         self._attr_native_unit_of_measurement = description.native_uom
         self._attr_native_value = description.native_value
         self._visible_by_default = self.entity_description.visible_by_default
+        # Classificazione (device class, state class, icona, unità di misura di default) della metrica
+        self._classification = description.classification
+        # Metrica da cui viene letta l'unità di misura (es. il measurand di una statistica)
+        self._unit_metric_key = description.unit_metric_key or description.metric_key
+        # Ultimo stato scritto in Home Assistant (disponibilità, valore, unità di misura, attributi)
+        self._last_written_state = None
 
     @property
     def target(self):
@@ -450,9 +813,7 @@ class ChargePointMetric(RestoreSensor, SensorEntity):
     @property
     def icon(self) -> str | None:
         # Icon of the entity.
-        if self._metric_key in MEASURAND_ICON:
-            return MEASURAND_ICON[self._metric_key]
-        return ICON
+        return self._classification.icon
 
     @property
     def available(self) -> bool:
@@ -462,12 +823,19 @@ class ChargePointMetric(RestoreSensor, SensorEntity):
     def should_poll(self):
         # Return True if entity has to be polled for state.
         # False if entity pushes its state to HA.
-        return True
+        # Aggiornamento del 17/10/2026
+        # Lo stato viene scritto quando cambia la metrica associata (vedi "async_added_to_hass")
+        return False
 
     @property
     def force_update(self):
+        # Gli stati invariati non devono generare scritture nella state machine (e quindi nel recorder)
+        return False
 
-        return True
+    # Chiave della metrica che determina la disponibilità del sensore (None se dipende solo dal target)
+    @property
+    def _availability_metric_key(self):
+        return None
 
     @property
     def extra_state_attributes(self):
@@ -477,87 +845,31 @@ class ChargePointMetric(RestoreSensor, SensorEntity):
     @property
     def state_class(self):
         # Return the state class of the sensor.
-        state_class = None
-        #OcppLog.log_w(f"Device Class del sensore {self._attr_name}: {self.device_class}.")
-        #OcppLog.log_w(f"Unità di misura nativa di {self._attr_name}: {self.native_unit_of_measurement}.")
-        if self.device_class is SensorDeviceClass.ENERGY:
-            state_class = SensorStateClass.TOTAL_INCREASING
-        elif self.device_class in [
-            SensorDeviceClass.CURRENT,
-            SensorDeviceClass.VOLTAGE,
-            SensorDeviceClass.POWER,
-            SensorDeviceClass.TEMPERATURE,
-            SensorDeviceClass.BATTERY,
-            SensorDeviceClass.FREQUENCY,
-            SensorDeviceClass.DURATION
-        ] or self._metric_key in [
-            HAChargePointSensors.latency_ping.value,
-            HAChargePointSensors.latency_pong.value,
-        ]:
-            state_class = SensorStateClass.MEASUREMENT
-
-        return state_class
+        return self._classification.state_class
 
     def append_entity_unique_id(self):
         if self._attr_unique_id not in self.target.ha_entity_unique_ids:
-            self.target.ha_entity_unique_ids.append(self._attr_unique_id)
-
-    # Aggiornamento del 08/02/2023
-    # I measurand di Energia e Potenza REATTIVA non hanno in Home Assistant una unità di misura standardizzata.
-    # Home Assistant supporta solo W, kW, Wh e kWh.
-    #
-    # Pertanto, impostando Energia e Potenza REATTIVA con le loro unità di misura (var, kvar per la potenza e
-    # varh, kvarh per la energia) nelle classi Home Assistant SensorDeviceClass.ENERGY e SensorDeviceClass.POWER
-    # dà i seguenti errori:
-    # a) WARNING(MainThread)[homeassistant.components.sensor] Entity sensor.charge_point_1_1_energy_reactive_export_interval
-    #    (<class 'custom_components.ocpp.sensor.ChargePointConnectorMetric'> ) is using native unit of measurement
-    #    'UnitOfMeasure.kvarh' which is not a valid unit for the device
-    # b) WARNING(MainThread)[homeassistant.components.sensor] Entity sensor.charge_point_1_1_power_reactive_import
-    #    (<class 'custom_components.ocpp.sensor.ChargePointConnectorMetric'> ) is using native unit of measurement
-    #    'UnitOfMeasure.kvar' which is not a valid unit for the device
-    #
-    # Per ovviare al problema, evitiamo di attribuire tali classi ai sensori di Energia e Potenza REATTIVA
+            self.target.ha_entity_unique_ids.add(self._attr_unique_id)
+        # Lo stato del sensore viene scritto solo quando cambia la metrica associata (o quella da cui dipende la
+        # disponibilità del sensore)
+        self.target.add_ha_entity(self, [self._metric_key, self._availability_metric_key])
+        # Le variazioni della metrica che non rispettano le regole di pubblicazione non vengono scritte
+        self.target.set_metric_publish_rule(self._metric_key, self.entity_description.publish_rule)
+        # L'ultimo valore dei sensori DIAGNOSTIC viene salvato nello snapshot delle metriche (vedi ha_store.py)
+        if self.entity_description.entity_category == EntityCategory.DIAGNOSTIC:
+            self.target.add_ha_persistent_metric_key(self._metric_key)
 
     @property
     def device_class(self):
         # Return the device class of the sensor.
-        device_class = None
-        mk = self._metric_key.lower()
-        if mk.startswith("current."):
-            device_class = SensorDeviceClass.CURRENT
-        elif mk.startswith("voltage"):
-            device_class = SensorDeviceClass.VOLTAGE
-        elif mk.startswith("energy."):
-            device_class = SensorDeviceClass.ENERGY
-        elif self._metric_key in [
-                Measurand.frequency.value,
-                Measurand.rpm.value,
-            ] or mk.startswith("frequency"):
-            device_class = SensorDeviceClass.FREQUENCY
-        elif mk.startswith(tuple(["power.active", "power.offered"])):
-            device_class = SensorDeviceClass.POWER
-        elif mk.startswith("power.reactive"):
-            device_class = SensorDeviceClass.REACTIVE_POWER
-        elif mk.startswith("temperature."):
-            device_class = SensorDeviceClass.TEMPERATURE
-        elif mk.startswith("session.time") or mk.startswith("latency"):
-            device_class = SensorDeviceClass.DURATION
-        elif mk.startswith("session.energy"):
-            device_class = SensorDeviceClass.ENERGY
-        elif mk.startswith("timestamp.") or self._metric_key in [
-                HAChargePointSensors.config_response.value,
-                HAChargePointSensors.data_response.value,
-                HAChargePointSensors.heartbeat.value,
-            ]:
-            device_class = SensorDeviceClass.TIMESTAMP
-        elif mk.startswith("soc"):
-            device_class = SensorDeviceClass.BATTERY
-        return device_class
+        return self._classification.device_class
 
     @property
     def native_value(self):
         # Return the state of the sensor, rounding if a number.
-        value = self.target.get_metric_value(self._metric_key)
+        # Valore già normalizzato nella unità di misura restituita da "native_unit_of_measurement" (per le metriche con
+        # una regola di pubblicazione, l'ultimo valore pubblicato)
+        value = self.target.get_metric_published_ha_value(self._metric_key)
         if isinstance(value, float):
             value = round(value, self.entity_description.scale)
         if value is not None or self.native_unit_of_measurement is not None:
@@ -569,13 +881,11 @@ class ChargePointMetric(RestoreSensor, SensorEntity):
     @property
     def native_unit_of_measurement(self):
         # Return the native unit of measurement.
-        uom = self.target.get_metric_ha_unit(self._metric_key)
+        uom = self.target.get_metric_ha_unit(self._unit_metric_key)
         if uom is not None:
             self._attr_native_unit_of_measurement = uom
         else:
-            self._attr_native_unit_of_measurement = DEFAULT_CLASS_UNITS_HA.get(
-                self.device_class
-            )
+            self._attr_native_unit_of_measurement = self._classification.default_unit
         return self._attr_native_unit_of_measurement
 
     """
@@ -585,24 +895,78 @@ class ChargePointMetric(RestoreSensor, SensorEntity):
     the state should extend RestoreSensor and call await self.async_get_last_sensor_data from async_added_to_hass to get 
     access to the stored native_value and native_unit_of_measurement.
     source: https://developers.home-assistant.io/docs/core/entity/sensor?_highlight=restoresensor#restoring-sensor-states
+
+    Aggiornamento del 17/10/2026
+    Il valore dei sensori DIAGNOSTIC è ripristinato dallo snapshot delle metriche (vedi ha_store.py), che inizializza le
+    metriche del target alla sua creazione. Lo stato salvato da Home Assistant viene letto solo se lo snapshot non
+    contiene ancora il target (es. primo avvio dopo l'aggiornamento); l'unità di misura è sempre ricalcolata dalla
+    metrica (vedi "native_unit_of_measurement").
     """
     async def async_added_to_hass(self) -> None:
         # Handle entity which will be added.
         await super().async_added_to_hass()
 
-        if restored := await self.async_get_last_sensor_data():
-            # Recuperiamo il valore solo se i sensori sono di categoria DIAGNOSTIC
-            if self.entity_description.entity_category == EntityCategory.DIAGNOSTIC:
+        metrics_store = self.target.ha_metrics_store
+        if (
+            self.entity_description.entity_category == EntityCategory.DIAGNOSTIC
+            and (metrics_store is None or not metrics_store.has_metrics(self.target))
+            and self.target.get_metric_value(self._metric_key) is None
+        ):
+            if restored := await self.async_get_last_sensor_data():
                 self._attr_native_value = restored.native_value
-            self._attr_native_unit_of_measurement = restored.native_unit_of_measurement
-
-        async_dispatcher_connect(
+                self._attr_native_unit_of_measurement = restored.native_unit_of_measurement
+                if restored.native_value is not None:
+                    self.target.set_metric_value(self._metric_key, restored.native_value)
+
+        # Il sensore è indicizzato dal target (vedi "append_entity_unique_id") fino alla sua rimozione
+        self.async_on_remove(lambda: self.target.remove_ha_entity(self))
+
+        # Segnale del dispositivo a cui appartiene il sensore e segnale globale (eventi dell'intera flotta)
+        self.async_on_remove(async_dispatcher_connect(
+            self._hass, self.target.ha_data_updated_signal, self._schedule_immediate_update
+        ))
+        self.async_on_remove(async_dispatcher_connect(
             self._hass, DATA_UPDATED, self._schedule_immediate_update
-        )
+        ))
 
     @callback
     def _schedule_immediate_update(self):
-        self.async_schedule_update_ha_state(True)
+        self.async_write_ha_state_if_changed()
+
+    # Scrive lo stato in Home Assistant solo se è cambiato rispetto all'ultima scrittura
+    @callback
+    def async_write_ha_state_if_changed(self):
+        if self.hass is None:
+            return
+        extra_state_attributes = self.extra_state_attributes
+        state = (
+            self.available,
+            self.native_value,
+            self.native_unit_of_measurement,
+            dict(extra_state_attributes) if extra_state_attributes else None
+        )
+        if state == self._last_written_state:
+            return
+        self._last_written_state = state
+        self.async_write_ha_state()
+
+class CentralSystemMetric(ChargePointMetric):
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        central_system: CentralSystem,
+        description: OcppSensorDescription
+    ):
+        super().__init__(hass, central_system, central_system, description)
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._central_system.id)}
+        )
+
+    @property
+    def target(self):
+        return self._central_system
+
 
 class ChargePointConnectorMetric(ChargePointMetric):
 
@@ -636,6 +1000,12 @@ class ChargePointConnectorMetric(ChargePointMetric):
     def target(self):
         return self._connector
 
+    @property
+    def _availability_metric_key(self):
+        if self.entity_description.availability_set is not None:
+            return HAConnectorSensors.status.value
+        return None
+
     @property
     def available(self) -> bool:
         # Return if sensor is available
@@ -680,6 +1050,12 @@ class EVSEMetric(ChargePointMetric):
     def target(self):
         return self._evse
 
+    @property
+    def _availability_metric_key(self):
+        if self.entity_description.availability_set is not None:
+            return "EVSE.AvailabilityState"
+        return None
+
     @property
     def available(self) -> bool:
 
@@ -727,6 +1103,12 @@ class EVSEConnectorMetric(EVSEMetric):
     def target(self):
         return self._connector
 
+    @property
+    def _availability_metric_key(self):
+        if self.entity_description.availability_set is not None:
+            return "Connector.AvailabilityState"
+        return None
+
     @property
     def available(self) -> bool:
 
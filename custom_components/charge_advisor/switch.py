@@ -18,6 +18,7 @@ from homeassistant.components.switch import (
     SwitchEntityDescription,
 )
 from homeassistant.const import UnitOfPower
+from homeassistant.core import callback
 from homeassistant.helpers.entity import DeviceInfo
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -31,7 +32,7 @@ from ocpp.v201.enums import OperationalStatusType, ConnectorStatusType
 # Local packages
 # ----------------------------------------------------------------------------------------------------------------------
 
-from .const import DOMAIN, ICONS
+from .const import DOMAIN, ICONS, SWITCH
 from .enums import HACentralSystemServices, HAChargePointServices, HAConnectorSensors, SubProtocol
 from .logger import OcppLog
 
@@ -177,91 +178,94 @@ EVSE_CONNECTOR_SWITCHES: Final = [
 ]
 
 
-async def async_setup_entry(hass, entry, async_add_devices):
-    """Configure the switch platform."""
-
-    # Get the Central system instance
-    central_system = hass.data[DOMAIN][entry.entry_id]    
-
-    entities = [CentralSystemSwitchEntity(central_system, CENTRAL_SYSTEM_SWITCHES[0])]
-
-    # Per ogni ID Charge Point...
-    for cp_id in central_system.charge_points:
-        # Recuperare il Charge Point vero e proprio.
-        charge_point = central_system.charge_points[cp_id]
-        #OcppLog.log_i(f"CHARGE POINT IN ESAME: {charge_point}.")
-        #OcppLog.log_i(f"Tipo del charge point in esame: {type(charge_point)}.")
-        # Per ogni switch da aggiungere al Charge Point.
-        for desc in CHARGE_POINT_SWITCHES:
-            # Creare un oggetto di tipo ChargePointSwitchEntity sulla base della descrizione che si trova nella
-            # lista CHARGE_POINT_SWITCHES e aggiungere tale oggetto alle entità del Charge Point in esame.
-            entities.append(ChargePointSwitchEntity(central_system, charge_point, desc))
-        # Se la versione di OCPP in uso è la 1.6...
-        if charge_point.connection_ocpp_version == SubProtocol.OcppV16.value:
-            #OcppLog.log_i(f"Versione protocollo OCPP: 1.6.")
-            # Aggiungere i connettori direttamente al Charge Point.
-            for connector in charge_point.connectors:
-                for ent in CHARGE_POINT_CONNECTOR_SWITCHES:
-                    entities.append(
-                        ChargePointConnectorSwitchEntity(
-                            central_system,
-                            charge_point,
-                            connector,
-                            ent
-                        )
+def get_charge_point_entities(central_system, charge_point):
+    """Return the switch entities of a Charge Point, its EVSEs and its Connectors."""
+
+    entities = []
+
+    #OcppLog.log_i(f"CHARGE POINT IN ESAME: {charge_point}.")
+    #OcppLog.log_i(f"Tipo del charge point in esame: {type(charge_point)}.")
+    # Per ogni switch da aggiungere al Charge Point.
+    for desc in CHARGE_POINT_SWITCHES:
+        # Creare un oggetto di tipo ChargePointSwitchEntity sulla base della descrizione che si trova nella
+        # lista CHARGE_POINT_SWITCHES e aggiungere tale oggetto alle entità del Charge Point in esame.
+        entities.append(ChargePointSwitchEntity(central_system, charge_point, desc))
+    # Se la versione di OCPP in uso è la 1.6...
+    if charge_point.connection_ocpp_version == SubProtocol.OcppV16.value:
+        #OcppLog.log_i(f"Versione protocollo OCPP: 1.6.")
+        # Aggiungere i connettori direttamente al Charge Point.
+        for connector in charge_point.connectors:
+            for ent in CHARGE_POINT_CONNECTOR_SWITCHES:
+                entities.append(
+                    ChargePointConnectorSwitchEntity(
+                        central_system,
+                        charge_point,
+                        connector,
+                        ent
                     )
-        # Altrimenti, se la versione usata è la 2.0.1...
-        # elif charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
-        else:
-            # Scorrere gli switch per gli EVSE del Charge Point e aggiungerli alle entità.
-            #OcppLog.log_i(f"Versione protocollo OCPP: 2.0.1.")
-            #OcppLog.log_i(f"EVSE disponibili: {charge_point.evses}.")
-            # Per ogni EVSE...
-            for evse in charge_point.evses:
-
-                #OcppLog.log_w(f"EVSE in esame: {evse}.")
-                #OcppLog.log_w(f"Tipo dell'EVSE in esame: {type(evse)}.")
-                # Per ogni switch da aggiungere all'EVSE...
-                # OcppLog.log_w(f"Descrizioni di switch disponibili per gli EVSE: {CHARGE_POINT_EVSE_SWITCHES}")
-                for desc in CHARGE_POINT_EVSE_SWITCHES:
-                    #OcppLog.log_w(f"Nome switch in esame: {desc.name}. Per EVSE {evse.id} con identificatore {evse.identifier}.")
-                    # Inserire lo switch tra le entità dell'EVSE, usando la descrizione fornita dalla lista
-                    # CHARGE_POINT_EVSE_SWITCHES per creare un oggetto di tipo EVSESwitchEntity.
-                    #OcppLog.log_w(f"Inserimento switch EVSE...")
+                )
+    # Altrimenti, se la versione usata è la 2.0.1...
+    # elif charge_point.connection_ocpp_version == SubProtocol.OcppV201.value:
+    else:
+        # Scorrere gli switch per gli EVSE del Charge Point e aggiungerli alle entità.
+        #OcppLog.log_i(f"Versione protocollo OCPP: 2.0.1.")
+        #OcppLog.log_i(f"EVSE disponibili: {charge_point.evses}.")
+        # Per ogni EVSE...
+        for evse in charge_point.evses:
+
+            #OcppLog.log_w(f"EVSE in esame: {evse}.")
+            #OcppLog.log_w(f"Tipo dell'EVSE in esame: {type(evse)}.")
+            # Per ogni switch da aggiungere all'EVSE...
+            # OcppLog.log_w(f"Descrizioni di switch disponibili per gli EVSE: {CHARGE_POINT_EVSE_SWITCHES}")
+            for desc in CHARGE_POINT_EVSE_SWITCHES:
+                #OcppLog.log_w(f"Nome switch in esame: {desc.name}. Per EVSE {evse.id} con identificatore {evse.identifier}.")
+                # Inserire lo switch tra le entità dell'EVSE, usando la descrizione fornita dalla lista
+                # CHARGE_POINT_EVSE_SWITCHES per creare un oggetto di tipo EVSESwitchEntity.
+                #OcppLog.log_w(f"Inserimento switch EVSE...")
+                entities.append(
+                    EVSESwitchEntity(
+                        central_system,
+                        charge_point,
+                        evse,
+                        desc
+                    )
+                )
+
+            # Aggiungere gli switch dei connettori relativi all'EVSE in esame.
+            for connector in evse.connectors:
+                #OcppLog.log_w(f"Connector in esame: {connector}.")
+                for conn_desc in EVSE_CONNECTOR_SWITCHES:
+                    #OcppLog.log_w(f"Descrizione switch per connector: {conn_desc}.")
                     entities.append(
-                        EVSESwitchEntity(
+                        EVSEConnectorSwitchEntity(
                             central_system,
                             charge_point,
                             evse,
-                            desc
+                            connector,
+                            conn_desc
                         )
                     )
 
-                # Aggiungere gli switch dei connettori relativi all'EVSE in esame.
-                for connector in evse.connectors:
-                    #OcppLog.log_w(f"Connector in esame: {connector}.")
-                    for conn_desc in EVSE_CONNECTOR_SWITCHES:
-                        #OcppLog.log_w(f"Descrizione switch per connector: {conn_desc}.")
-                        entities.append(
-                            EVSEConnectorSwitchEntity(
-                                central_system,
-                                charge_point,
-                                evse,
-                                connector,
-                                conn_desc
-                            )
-                        )
+    return entities
+
+
+async def async_setup_entry(hass, entry, async_add_devices):
+    """Configure the switch platform."""
+
+    # Get the Central system instance
+    central_system = hass.data[DOMAIN][entry.entry_id]    
 
-    #OcppLog.log_i(f"Entità switch aggiunte: {entities}.")
-    # Aggiungiamo gli unique_id di ogni entità registrata in fase di setup al
-    # Charge Point o al Connector
-    for entity in entities:
-        entity.append_entity_unique_id()
-        #OcppLog.log_i(f"Entità aggiunta e suo ID: {entity.name}, {entity.entity_id}.")
-        #OcppLog.log_i(f"Tipo entità aggiunta: {type(entity)}.")
+    entities = [CentralSystemSwitchEntity(central_system, CENTRAL_SYSTEM_SWITCHES[0])]
 
-    async_add_devices(entities, False)
-    #OcppLog.log_i(f"Inserimento terminato.")
+    # Le entità della Central System e di ogni Charge Point vengono aggiunte a blocchi, dopo aver aggiunto i loro
+    # unique_id al Charge Point o al Connector. La piattaforma viene poi registrata presso la Central System, per poter
+    # aggiungere in seguito le sole entità di nuovi Charge Point, EVSE o Connettori senza ricaricare la piattaforma
+    await central_system.async_setup_ha_platform(
+        SWITCH,
+        async_add_devices,
+        lambda charge_point: get_charge_point_entities(central_system, charge_point),
+        entities
+    )
 
 class CentralSystemSwitchEntity(SwitchEntity):
     _attr_has_entity_name = True
@@ -275,6 +279,9 @@ class CentralSystemSwitchEntity(SwitchEntity):
         self._central_system = central_system
         self.entity_description = description
         self._state = self.entity_description.default_state
+        # Lo stato viene scritto quando cambia una metrica da cui dipende (vedi "metric_keys")
+        self._attr_should_poll = False
+        self._last_written_state = None
         self._attr_unique_id = ".".join([
             SWITCH_DOMAIN,
             DOMAIN,
@@ -294,6 +301,30 @@ class CentralSystemSwitchEntity(SwitchEntity):
     def target(self):
         return self._central_system
 
+    # Chiavi delle metriche da cui dipende lo stato dello switch
+    @property
+    def metric_keys(self):
+        metric_keys = [self.entity_description.metric_key]
+        if self.entity_description.key == "charge_control":
+            metric_keys.append(Measurand.power_active_import.value)
+        return metric_keys
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Lo switch è indicizzato dal target (vedi "append_entity_unique_id") fino alla sua rimozione
+        self.async_on_remove(lambda: self.target.remove_ha_entity(self))
+
+    # Scrive lo stato in Home Assistant solo se è cambiato rispetto all'ultima scrittura
+    @callback
+    def async_write_ha_state_if_changed(self):
+        if self.hass is None:
+            return
+        state = (self.available, self.is_on)
+        if state == self._last_written_state:
+            return
+        self._last_written_state = state
+        self.async_write_ha_state()
+
     @property
     def available(self) -> bool:
         # Return if switch is available.
@@ -339,7 +370,8 @@ class CentralSystemSwitchEntity(SwitchEntity):
 
     def append_entity_unique_id(self):
         if self.unique_id not in self.target.ha_entity_unique_ids:
-            self.target.ha_entity_unique_ids.append(self.unique_id)
+            self.target.ha_entity_unique_ids.add(self.unique_id)
+        self.target.add_ha_entity(self, self.metric_keys)
 
 
 
@@ -359,6 +391,9 @@ class ChargePointSwitchEntity(SwitchEntity):
         self._central_system = central_system
         self.entity_description = description
         self._state = self.entity_description.default_state
+        # Lo stato viene scritto quando cambia una metrica da cui dipende (vedi "metric_keys")
+        self._attr_should_poll = False
+        self._last_written_state = None
         self._attr_unique_id = ".".join([
             SWITCH_DOMAIN,
             DOMAIN,
@@ -376,6 +411,30 @@ class ChargePointSwitchEntity(SwitchEntity):
     def target(self):
         return self._charge_point
 
+    # Chiavi delle metriche da cui dipende lo stato dello switch
+    @property
+    def metric_keys(self):
+        metric_keys = [self.entity_description.metric_key]
+        if self.entity_description.key == "charge_control":
+            metric_keys.append(Measurand.power_active_import.value)
+        return metric_keys
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Lo switch è indicizzato dal target (vedi "append_entity_unique_id") fino alla sua rimozione
+        self.async_on_remove(lambda: self.target.remove_ha_entity(self))
+
+    # Scrive lo stato in Home Assistant solo se è cambiato rispetto all'ultima scrittura
+    @callback
+    def async_write_ha_state_if_changed(self):
+        if self.hass is None:
+            return
+        state = (self.available, self.is_on)
+        if state == self._last_written_state:
+            return
+        self._last_written_state = state
+        self.async_write_ha_state()
+
     @property
     def available(self) -> bool:
         return self.target.is_available()
@@ -422,16 +481,14 @@ class ChargePointSwitchEntity(SwitchEntity):
     def current_power_w(self) -> Any:
         """Return the current power usage in W."""
         if self.entity_description.key == "charge_control":
-            value = self.target.get_metric_value(Measurand.power_active_import.value)
-            ha_unit = self.target.get_metric_ha_unit(Measurand.power_active_import.value)
-            if ha_unit == UnitOfPower.KILO_WATT:
-                value = value * 1000
-            return value
+            # Il fattore di scala verso i W è risolto insieme all'unità della metrica (vedi ha_units.py)
+            return self.target.get_metric_base_value(Measurand.power_active_import.value)
         return None
 
     def append_entity_unique_id(self):
         if self.unique_id not in self.target.ha_entity_unique_ids:
-            self.target.ha_entity_unique_ids.append(self.unique_id)
+            self.target.ha_entity_unique_ids.add(self.unique_id)
+        self.target.add_ha_entity(self, self.metric_keys)
 
 class ChargePointConnectorSwitchEntity(ChargePointSwitchEntity):
     """Individual switch for charge point."""
@@ -546,16 +603,14 @@ class EVSESwitchEntity(ChargePointSwitchEntity):
     def current_power_w(self) -> Any:
         """Return the current power usage in W."""
         if self.entity_description.key == "charge_control":
-            value = self.target.get_metric_value(Measurand.power_active_import.value)
-            ha_unit = self.target.get_metric_ha_unit(Measurand.power_active_import.value)
-            if ha_unit == UnitOfPower.KILO_WATT:
-                value = value * 1000
-            return value
+            # Il fattore di scala verso i W è risolto insieme all'unità della metrica (vedi ha_units.py)
+            return self.target.get_metric_base_value(Measurand.power_active_import.value)
         return None
 
     def append_entity_unique_id(self):
         if self.unique_id not in self.target.ha_entity_unique_ids:
-            self.target.ha_entity_unique_ids.append(self.unique_id)
+            self.target.ha_entity_unique_ids.add(self.unique_id)
+        self.target.add_ha_entity(self, self.metric_keys)
 
 class EVSEConnectorSwitchEntity(EVSESwitchEntity):
 
@@ -622,4 +677,5 @@ class EVSEConnectorSwitchEntity(EVSESwitchEntity):
 
     def append_entity_unique_id(self):
         if self.unique_id not in self.target.ha_entity_unique_ids:
-            self.target.ha_entity_unique_ids.append(self.unique_id)
+            self.target.ha_entity_unique_ids.add(self.unique_id)
+        self.target.add_ha_entity(self, self.metric_keys)
@@ -0,0 +1,62 @@
+"""Tests of the reconnect token buckets of the admission controller."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("ocpp_central_system")
+
+from custom_components.charge_advisor import ha_admission
+from custom_components.charge_advisor.exception import AdmissionRejectedError
+from custom_components.charge_advisor.ha_admission import HomeAssistantAdmissionController
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ha_admission.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_then_reject(clock):
+    controller = HomeAssistantAdmissionController(reconnect_burst=2, reconnect_interval=60)
+    controller.check_connection("cp1")
+    controller.check_connection("cp1")
+    with pytest.raises(AdmissionRejectedError):
+        controller.check_connection("cp1")
+    # I bucket sono indipendenti per Charge Point
+    controller.check_connection("cp2")
+    assert controller.get_report() == {"admitted": 3, "rejected": 1, "buckets": 2}
+
+
+def test_refill(clock):
+    controller = HomeAssistantAdmissionController(reconnect_burst=1, reconnect_interval=60)
+    controller.check_connection("cp1")
+    clock[0] += 30
+    with pytest.raises(AdmissionRejectedError):
+        controller.check_connection("cp1")
+    clock[0] += 30
+    controller.check_connection("cp1")
+    assert controller.admitted == 2
+    assert controller.rejected == 1
+
+
+def test_no_interval_never_rejects(clock):
+    controller = HomeAssistantAdmissionController(reconnect_burst=1, reconnect_interval=0)
+    for _ in range(5):
+        controller.check_connection("cp1")
+    assert controller.rejected == 0
+
+
+def test_idle_buckets_are_pruned(clock):
+    controller = HomeAssistantAdmissionController(reconnect_burst=2, reconnect_interval=60)
+    controller.check_connection("cp1")
+    clock[0] += 100
+    controller.check_connection("cp2")
+    controller.check_connection("cp2")
+    # cp1 si è ricaricato completamente (60 s per un token), cp2 no (120 s per due token)
+    clock[0] += 20
+    controller.check_connection("cp3")
+    assert controller.get_report()["buckets"] == 2
+    clock[0] += 120
+    controller.check_connection("cp3")
+    assert controller.get_report()["buckets"] == 1
@@ -0,0 +1,81 @@
+"""Tests of the queue counters of the state flusher."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("ocpp_central_system")
+
+from custom_components.charge_advisor import ha_flusher
+from custom_components.charge_advisor.ha_flusher import HomeAssistantStateFlusher
+
+
+class FakeEntity:
+
+    def __init__(self):
+        self.writes = 0
+
+    def async_write_ha_state_if_changed(self):
+        self.writes += 1
+
+
+class FakeTier:
+
+    def __init__(self, keys):
+        self.entities = {key: FakeEntity() for key in keys}
+
+    def get_ha_entities(self):
+        return self.entities.values()
+
+    def get_metric_entities(self, key):
+        entity = self.entities.get(key)
+        return (entity,) if entity is not None else ()
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    # Il flush viene eseguito esplicitamente dai test
+    calls = []
+
+    def fake_call_later(hass, delay, action):
+        calls.append(action)
+        return lambda: None
+
+    monkeypatch.setattr(ha_flusher, "async_call_later", fake_call_later)
+    return calls
+
+
+def test_merge(scheduled):
+    flusher = HomeAssistantStateFlusher(None, "cp", window=1.0, max_depth=10)
+    tier = FakeTier(["a", "b"])
+    flusher.mark_dirty(tier, "a")
+    flusher.mark_dirty(tier, "a")
+    flusher.mark_dirty(tier, "b")
+    assert len(scheduled) == 1
+    assert (flusher.depth, flusher.merged, flusher.dropped) == (2, 1, 0)
+    flusher.async_flush()
+    assert flusher.depth == 0
+    assert flusher.get_report()["writes"] == 2
+    assert flusher.last_batch_size == 2
+    assert flusher.batching_ratio == 3.0
+    assert tier.entities["a"].writes == 1
+
+
+def test_overflow_rewrites_all_entities(scheduled):
+    flusher = HomeAssistantStateFlusher(None, "cp", window=1.0, max_depth=1)
+    tier = FakeTier(["a", "b", "c"])
+    flusher.mark_dirty(tier, "a")
+    flusher.mark_dirty(tier, "b")
+    flusher.mark_dirty(tier, "c")
+    assert (flusher.depth, flusher.peak_depth, flusher.dropped) == (1, 1, 2)
+    flusher.async_flush()
+    assert all(entity.writes == 1 for entity in tier.entities.values())
+    assert not flusher.has_pending
+
+
+def test_zero_window_writes_immediately(scheduled):
+    flusher = HomeAssistantStateFlusher(None, "cp", window=0, max_depth=10)
+    tier = FakeTier(["a"])
+    flusher.mark_dirty(tier, "a")
+    assert not scheduled
+    assert tier.entities["a"].writes == 1
+    assert flusher.flushes == 1
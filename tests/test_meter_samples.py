@@ -0,0 +1,50 @@
+"""Tests of the ring buffers and window statistics of the meter samples."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("ocpp_central_system")
+pytest.importorskip("numpy")
+
+from custom_components.charge_advisor.ha_meter_samples import HomeAssistantMeterSamples
+
+
+def test_ring_buffer_keeps_the_last_samples():
+    samples = HomeAssistantMeterSamples(["Power"], 4)
+    for index in range(10):
+        assert samples.append("Power", index, timestamp=float(index))
+    assert samples.get_sample_count("Power") == 4
+    assert sorted(samples.get_window("Power", 100, now=10.0)) == [6, 7, 8, 9]
+
+
+def test_only_tracked_numeric_samples_are_stored():
+    samples = HomeAssistantMeterSamples(["Power"], 4)
+    assert not samples.append("Voltage", 230)
+    assert not samples.append("Power", True)
+    assert not samples.append("Power", "n/a")
+    assert samples.append("Power", "1.5")
+    assert samples.get_sample_count("Power") == 1
+
+
+def test_window_statistics():
+    samples = HomeAssistantMeterSamples(["Power"], 16)
+    for index in range(1, 11):
+        samples.append("Power", index, timestamp=float(index))
+    # Finestra degli ultimi 5 secondi: campioni 5..10
+    statistics = samples.get_statistics("Power", 5, now=10.0)
+    assert statistics["samples"] == 6
+    assert statistics["mean"] == 7.5
+    assert (statistics["min"], statistics["max"]) == (5.0, 10.0)
+    assert statistics["p50"] == 7.5
+    assert samples.get_statistics("Power", 5, now=100.0) is None
+
+
+def test_stale_derived_values():
+    samples = HomeAssistantMeterSamples(["Power", "Current"], 8, {"Power.Max": ("Power", "max", 60)})
+    samples.append("Current", 16, timestamp=1.0)
+    assert not samples.has_stale_derived
+    samples.append("Power", 3, timestamp=1.0)
+    samples.append("Power", 5, timestamp=2.0)
+    assert samples.has_stale_derived
+    assert samples.pop_stale_derived_values(now=2.0) == [("Power.Max", 5.0)]
+    assert samples.pop_stale_derived_values(now=2.0) == []
@@ -0,0 +1,31 @@
+"""Tests of the include/exclude patterns of the sensor filter."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("ocpp_central_system")
+
+from custom_components.charge_advisor.ha_sensor_filter import HomeAssistantSensorFilter
+
+
+def test_no_patterns():
+    sensor_filter = HomeAssistantSensorFilter(None, " , ")
+    assert not sensor_filter.active
+    assert sensor_filter.matches("Connector", "Power.Active.Import")
+
+
+def test_include_and_exclude():
+    sensor_filter = HomeAssistantSensorFilter("Power.*, Current.*", "*.Offered")
+    assert sensor_filter.active
+    assert sensor_filter.matches("Connector", "Power.Active.Import")
+    assert not sensor_filter.matches("Connector", "Power.Offered")
+    assert not sensor_filter.matches("Connector", "Voltage")
+
+
+def test_tier_prefix():
+    sensor_filter = HomeAssistantSensorFilter(None, "EVSE:Temperature*, Unknown:Voltage")
+    assert not sensor_filter.matches("EVSE", "Temperature")
+    assert sensor_filter.matches("Connector", "Temperature")
+    # Un prefisso che non è un livello fa parte del pattern
+    assert sensor_filter.matches("EVSE", "Voltage")
+    assert not sensor_filter.matches("EVSE", "Unknown:Voltage")
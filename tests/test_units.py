@@ -0,0 +1,36 @@
+"""Tests of the memoized unit conversions."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("ocpp_central_system")
+
+from custom_components.charge_advisor.ha_units import resolve_unit_conversion
+
+
+def test_measurand_is_normalized():
+    conversion = resolve_unit_conversion("Power.Active.Import", "W")
+    assert conversion.ocpp_unit == "kW"
+    assert conversion.convert(1500) == 1.5
+    assert conversion.convert("n/a") == "n/a"
+
+
+def test_normalized_unit_base_factor():
+    conversion = resolve_unit_conversion("Power.Active.Import", "kW")
+    assert conversion.convert(1.5) == 1.5
+    assert conversion.convert_to_base(1.5) == 1500
+
+
+def test_other_metrics_are_not_converted():
+    conversion = resolve_unit_conversion("Heartbeat", "W")
+    assert conversion.factor == 1.0
+    assert conversion.convert(1500) == 1500
+
+
+def test_conversions_are_cached():
+    resolve_unit_conversion.cache_clear()
+    first = resolve_unit_conversion("Energy.Active.Import.Register", "Wh")
+    second = resolve_unit_conversion("Energy.Active.Import.Register", "Wh")
+    assert first is second
+    info = resolve_unit_conversion.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
@@ -0,0 +1,54 @@
+"""Tests of the per-action schema validation policy."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("ocpp_central_system")
+
+from custom_components.charge_advisor.enums import HASchemaValidationLevel
+from custom_components.charge_advisor.ha_validation import (
+    ROUTE_SKIP_SCHEMA_VALIDATION,
+    HomeAssistantValidationPolicy,
+)
+
+POLICY = {
+    "MeterValues": HASchemaValidationLevel.sampled,
+    "Heartbeat": HASchemaValidationLevel.none,
+}
+
+
+def test_levels():
+    policy = HomeAssistantValidationPolicy(False, 3, POLICY)
+    assert [policy.should_validate("MeterValues") for _ in range(7)] == [True, False, False, True, False, False, True]
+    assert not policy.should_validate("Heartbeat")
+    assert policy.should_validate("BootNotification")
+    report = policy.get_report()
+    assert (report["validated"], report["skipped"]) == (4, 5)
+    assert report["actions"]["MeterValues"] == {"level": "sampled", "validated": 3, "skipped": 4}
+
+
+def test_skip_all():
+    policy = HomeAssistantValidationPolicy(True, 3, POLICY)
+    assert not policy.should_validate("BootNotification")
+    assert policy.get_level("BootNotification") == HASchemaValidationLevel.none
+
+
+def test_apply_to_route_map():
+    policy = HomeAssistantValidationPolicy(False, 1, POLICY)
+    route_map = {"Heartbeat": {}, "BootNotification": {}}
+    policy.apply(route_map, "Heartbeat")
+    policy.apply(route_map, "BootNotification")
+    assert route_map["Heartbeat"][ROUTE_SKIP_SCHEMA_VALIDATION] is True
+    assert route_map["BootNotification"][ROUTE_SKIP_SCHEMA_VALIDATION] is False
+    assert not policy.should_validate_call(route_map, "Unknown")
+
+
+def test_handler_skip_is_preserved():
+    policy = HomeAssistantValidationPolicy(False, 1, POLICY)
+    route_map = {"DataTransfer": {ROUTE_SKIP_SCHEMA_VALIDATION: True}}
+    assert not policy.should_validate_call(route_map, "DataTransfer")
+    policy.apply(route_map, "DataTransfer")
+    assert route_map["DataTransfer"][ROUTE_SKIP_SCHEMA_VALIDATION] is True
+    # Dopo una chiamata decodificata nell'executor il flag resta quello dell'handler
+    HomeAssistantValidationPolicy.skip(route_map, "DataTransfer")
+    assert route_map["DataTransfer"][ROUTE_SKIP_SCHEMA_VALIDATION] is True